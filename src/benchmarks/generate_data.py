@@ -0,0 +1,341 @@
+import argparse
+import json
+import os
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+import tqdm
+
+# Define paths
+script_folder: Path = Path(__file__).parent
+data_folder: Path = script_folder.parent.parent / "data"
+output_folder: Path = data_folder / "synthetic"
+
+# Team names, extended with numbered teams when more are requested
+TEAM_NAMES: List[str] = [
+    "Australia",
+    "England",
+    "India",
+    "New Zealand",
+    "Pakistan",
+    "South Africa",
+    "Sri Lanka",
+    "West Indies",
+    "Bangladesh",
+    "Zimbabwe",
+    "Afghanistan",
+    "Ireland",
+    "Scotland",
+    "Netherlands",
+    "Kenya",
+    "Canada",
+]
+
+# Dismissals, and the kinds that do not cost the batting side a wicket
+WICKET_KINDS: List[str] = ["caught", "bowled", "lbw", "run out", "stumped"]
+WICKETS_NO_LOSS: List[str] = ["retired hurt"]
+
+# Runs off the bat and their relative frequencies
+BAT_RUNS: List[int] = [0, 1, 2, 3, 4, 6]
+BAT_RUNS_WEIGHTS: List[float] = [0.45, 0.32, 0.08, 0.01, 0.1, 0.04]
+
+# Per-delivery and per-match event rates
+WICKET_RATE: float = 0.03
+NO_LOSS_RATE: float = 0.001
+EXTRA_BALL_RATE: float = 0.03
+LEG_BYE_RATE: float = 0.02
+DUPLICATE_RATE: float = 0.0005
+FEMALE_RATE: float = 0.05
+NO_RESULT_RATE: float = 0.03
+DL_RATE: float = 0.03
+
+SQUAD_SIZE: int = 16
+FIRST_MATCHID: int = 200_000
+FIRST_DATE: date = date(2005, 1, 1)
+
+
+class JsonArrayWriter:
+    """
+    Write a JSON array to a file one element at a time.
+
+    Nothing but the current element is held in memory, so files of any size
+    can be written.
+    """
+
+    def __init__(self, file: TextIO) -> None:
+        self._file = file
+        self._encoder = json.JSONEncoder()
+        self._first = True
+        self._file.write("[")
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._file.write("\n" if self._first else ",\n")
+        self._file.write(self._encoder.encode(record))
+        self._first = False
+
+    def close(self) -> None:
+        self._file.write("\n]\n")
+
+
+def main(
+    matches: int = 1000,
+    overs: int = 50,
+    teams: int = 12,
+    seed: int = 0,
+    output: Optional[str] = None,
+) -> None:
+    """
+    Generate synthetic match and innings results in the provided JSON layout.
+
+    Args:
+        matches (int): Number of matches to generate.
+        overs (int): Scheduled overs per innings.
+        teams (int): Number of distinct teams.
+        seed (int): Random seed. The same arguments always give the same files.
+        output (Optional[str]): Output folder. Defaults to data/synthetic.
+    """
+    output = output or str(output_folder)
+    os.makedirs(output, exist_ok=True)
+
+    counts = generate(output, matches, overs, teams, seed)
+    print(
+        f"Done. {counts['matches']} match rows and {counts['deliveries']} "
+        f"deliveries saved to {output}"
+    )
+
+
+def generate(
+    output: str, num_matches: int, overs: int, num_teams: int, seed: int
+) -> Dict[str, int]:
+    """
+    Stream ``match_results.json`` and ``innings_results.json`` into ``output``.
+
+    Matches are generated and written one at a time, so memory use does not
+    grow with ``num_matches``.
+
+    Returns:
+        Dict[str, int]: Number of match rows and deliveries written.
+    """
+    if num_matches < 0 or overs < 1 or num_teams < 2:
+        raise ValueError("Need matches >= 0, overs >= 1 and teams >= 2")
+
+    rng = random.Random(seed)
+    team_names = get_team_names(num_teams)
+    squads = {
+        team: [f"{team} Player {number}" for number in range(1, SQUAD_SIZE + 1)]
+        for team in team_names
+    }
+
+    counts = {"matches": 0, "deliveries": 0}
+    match_file = os.path.join(output, "match_results.json")
+    innings_file = os.path.join(output, "innings_results.json")
+    with open(match_file, "w") as match_f, open(innings_file, "w") as innings_f:
+        match_writer = JsonArrayWriter(match_f)
+        innings_writer = JsonArrayWriter(innings_f)
+
+        for index in tqdm.tqdm(range(num_matches), desc="Generating matches"):
+            match_rows, deliveries = generate_match(
+                rng,
+                FIRST_MATCHID + index,
+                FIRST_DATE + timedelta(days=index * 3 % 7300),
+                rng.sample(team_names, 2),
+                squads,
+                overs,
+            )
+            for row in match_rows:
+                match_writer.write(row)
+            for delivery in deliveries:
+                innings_writer.write(delivery)
+            counts["matches"] += len(match_rows)
+            counts["deliveries"] += len(deliveries)
+
+        match_writer.close()
+        innings_writer.close()
+    return counts
+
+
+def get_team_names(num_teams: int) -> List[str]:
+    """
+    Pick ``num_teams`` team names, numbering extra teams beyond the known ones.
+    """
+    extra = [f"Team {number}" for number in range(len(TEAM_NAMES) + 1, num_teams + 1)]
+    return (TEAM_NAMES + extra)[:num_teams]
+
+
+def generate_match(
+    rng: random.Random,
+    matchid: int,
+    match_date: date,
+    teams: List[str],
+    squads: Dict[str, List[str]],
+    overs: int,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Simulate one match.
+
+    The outcome recorded for the match agrees with its deliveries: the side
+    batting second wins by its remaining wickets once it passes the target,
+    otherwise the side batting first wins by the run difference, or the match
+    is tied. A few matches are rain-affected, decided by D/L or abandoned
+    without a result.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: The match rows, one
+        per team, and the deliveries of both innings.
+    """
+    no_result = rng.random() < NO_RESULT_RATE
+    dl = not no_result and rng.random() < DL_RATE
+
+    first, second = teams
+    lineups = {team: rng.sample(squads[team], 11) for team in teams}
+
+    first_overs = rng.randint(1, overs) if no_result else overs
+    first_deliveries, first_runs, _ = simulate_innings(
+        rng, matchid, 1, first, lineups[first], lineups[second], first_overs, None
+    )
+
+    # Rain reduces the chase, and D/L scales the target to the overs left
+    second_overs = rng.randint(max(overs // 5, 1), overs) if dl else overs
+    target = first_runs + 1
+    if dl:
+        target = int(first_runs * second_overs / overs) + 1
+    if no_result:
+        second_overs = rng.randint(0, overs)
+    second_deliveries, second_runs, second_wickets = simulate_innings(
+        rng, matchid, 2, second, lineups[second], lineups[first], second_overs, target
+    )
+
+    match: Dict[str, Any] = {
+        "matchid": matchid,
+        "match_type": "ODI",
+        "dates": match_date.isoformat(),
+        "gender": "female" if rng.random() < FEMALE_RATE else "male",
+        "overs": overs,
+    }
+    if no_result:
+        match["result"] = "no result"
+    elif second_runs >= target:
+        match["outcome.winner"] = second
+        match["outcome.wickets"] = 10 - second_wickets
+    elif second_runs < target - 1:
+        match["outcome.winner"] = first
+        match["outcome.runs"] = target - 1 - second_runs
+    else:
+        match["result"] = "tie"
+    if dl:
+        match["outcome.method"] = "D/L"
+
+    match_rows = [dict(match, teams=team) for team in teams]
+    return match_rows, first_deliveries + second_deliveries
+
+
+def simulate_innings(
+    rng: random.Random,
+    matchid: int,
+    innings: int,
+    team: str,
+    batting_order: List[str],
+    fielders: List[str],
+    overs: int,
+    target: Optional[int],
+) -> Tuple[List[Dict[str, Any]], int, int]:
+    """
+    Simulate one innings ball by ball.
+
+    The innings ends when its overs run out, ten wickets fall or ``target`` is
+    reached. Wides and no-balls are re-bowled, so an over can have more than
+    six deliveries (``over`` values past ``.6``).
+
+    Returns:
+        Tuple[List[Dict[str, Any]], int, int]: The deliveries, the runs scored
+        and the wickets lost.
+    """
+    deliveries: List[Dict[str, Any]] = []
+    bowlers = fielders[-5:]
+    striker, non_striker, next_batter = 0, 1, 2
+    runs = wickets = 0
+
+    for over in range(overs):
+        bowler = bowlers[over % len(bowlers)]
+        legal_balls = ball = 0
+        while legal_balls < 6:
+            ball += 1
+            bat_runs = rng.choices(BAT_RUNS, BAT_RUNS_WEIGHTS)[0]
+            extras = 0
+            if rng.random() < EXTRA_BALL_RATE:
+                # Wide or no-ball: one extra and the ball is bowled again
+                extras = 1
+                bat_runs = 0
+            else:
+                legal_balls += 1
+                if bat_runs == 0 and rng.random() < LEG_BYE_RATE:
+                    extras = 1
+
+            delivery: Dict[str, Any] = {
+                "batsman": batting_order[striker],
+                "bowler": bowler,
+                "non_striker": batting_order[non_striker],
+                "over": float(f"{over}.{ball}"),
+                "team": team,
+                "innings": innings,
+                "matchid": matchid,
+                "runs.batsman": bat_runs,
+                "runs.extras": extras,
+                "runs.total": bat_runs + extras,
+            }
+            runs += bat_runs + extras
+
+            out = extras == 0 and rng.random() < WICKET_RATE
+            if out:
+                delivery["wicket.kind"] = rng.choice(WICKET_KINDS)
+                wickets += 1
+            elif rng.random() < NO_LOSS_RATE:
+                # Recorded like a dismissal, but the batter stays in
+                delivery["wicket.kind"] = rng.choice(WICKETS_NO_LOSS)
+
+            deliveries.append(delivery)
+            if rng.random() < DUPLICATE_RATE:
+                # The provided data contains some repeated deliveries
+                deliveries.append(dict(delivery))
+
+            if out:
+                if wickets == 10:
+                    return deliveries, runs, wickets
+                striker, next_batter = next_batter, next_batter + 1
+            elif (bat_runs + extras) % 2 == 1:
+                striker, non_striker = non_striker, striker
+
+            if target is not None and runs >= target:
+                return deliveries, runs, wickets
+
+        striker, non_striker = non_striker, striker
+
+    return deliveries, runs, wickets
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic match and innings results JSON"
+    )
+    parser.add_argument(
+        "--matches", type=int, default=1000, help="Number of matches to generate"
+    )
+    parser.add_argument(
+        "--overs", type=int, default=50, help="Scheduled overs per innings"
+    )
+    parser.add_argument(
+        "--teams", type=int, default=12, help="Number of distinct teams"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Output folder (defaults to data/synthetic)",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(**vars(parse_args()))
@@ -0,0 +1,706 @@
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from statistics import median
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from generate_data import generate
+
+# Define paths
+script_folder: Path = Path(__file__).parent
+repo_folder: Path = script_folder.parent.parent
+data_folder: Path = repo_folder / "data"
+output_folder: Path = data_folder / "benchmarks"
+
+sys.path.append(str(script_folder.parent / "parsing"))
+from parquet_dataset import PARQUET_ENGINE, read_parquet_dataset
+
+sys.path.append(str(script_folder.parent / "model_package"))
+from run_model import QueryIndex, load_model, read_data, run_batch
+
+# Pipeline stages in run order. "rows" is the dataset each stage processes,
+# relative to the workspace, used for the rows per second figure.
+STAGES: List[Dict[str, Any]] = [
+    {
+        "name": "parse_match_results",
+        "script": "src/parsing/parse_match_results.py",
+        "rows": "data/parsed/match_results.parquet",
+    },
+    {
+        "name": "parse_innings_results",
+        "script": "src/parsing/parse_innings_results.py",
+        "rows": "data/parsed/innings_results.parquet",
+    },
+    {
+        "name": "filter_innings_results",
+        "script": "src/dataset_curation/filter_innings_results.py",
+        "rows": "data/parsed/innings_results.parquet",
+    },
+    {
+        "name": "q3a",
+        "script": "src/dataset_curation/q3a.py",
+        "rows": "data/intermediate/filtered_innings.parquet",
+    },
+    {
+        "name": "create_training_data",
+        "script": "src/dataset_curation/create_training_data.py",
+        "rows": "data/intermediate/filtered_innings.parquet",
+    },
+    {
+        "name": "train",
+        "script": "src/training/train.py",
+        "rows": "data/training/training_data.parquet",
+    },
+    {
+        "name": "run_model",
+        "script": "src/model_package/run_model.py",
+        "rows": "src/model_package/data.parquet",
+    },
+]
+
+# Default relative slowdown above which compare flags a stage
+DEFAULT_THRESHOLD: float = 0.1
+
+# Slowdowns smaller than this many seconds are treated as noise
+MIN_SLOWDOWN_SECONDS: float = 0.1
+
+# ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+RSS_UNITS_PER_MB: int = 1 << 20 if sys.platform == "darwin" else 1 << 10
+
+LFS_POINTER_PREFIX: bytes = b"version https://git-lfs"
+
+model_package_folder: Path = script_folder.parent / "model_package"
+
+# run_model start-up scenarios, with the exit code each is expected to end with.
+# "{team}" is replaced by the most common batting team of the data.
+STARTUP_SCENARIOS: List[Dict[str, Any]] = [
+    {"name": "help", "args": ["--help"], "exit_code": 0},
+    {"name": "invalid_team", "args": ["--batting-team", "Atlantis"], "exit_code": 2},
+    {"name": "first_prediction", "args": ["--batting-team", "{team}"], "exit_code": 0},
+    {
+        "name": "first_prediction_live",
+        "args": ["--batting-team", "{team}", "--predictions", "missing.parquet"],
+        "exit_code": 0,
+    },
+]
+
+
+def run(
+    inputs: str = "synthetic",
+    matches: int = 200,
+    seed: int = 0,
+    repeat: int = 1,
+    stage_args: Optional[List[str]] = None,
+    output: Optional[str] = None,
+    workspace: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Run every pipeline stage on fixed inputs and record its resource usage.
+
+    The source tree is copied into a scratch workspace so that the stages'
+    outputs, including the model package files, never touch the checkout.
+    Each stage runs in its own process and its wall time, CPU time (user +
+    system, including its worker processes) and peak RSS are taken from the
+    process accounting of that child.
+
+    Args:
+        inputs (str): "synthetic" to generate ``matches`` matches with ``seed``,
+            or "real" to use the provided JSON files.
+        matches (int): Number of synthetic matches.
+        seed (int): Seed of the synthetic data.
+        repeat (int): Runs per stage; the median run is reported.
+        stage_args (Optional[List[str]]): Extra arguments as ``STAGE=ARGS``,
+            e.g. ``parse_innings_results=--workers -1``.
+        output (Optional[str]): Results file. Defaults to
+            data/benchmarks/results.json.
+        workspace (Optional[str]): Folder to run in. Defaults to a temporary
+            folder that is removed afterwards.
+
+    Returns:
+        Dict[str, Any]: The results written to ``output``.
+    """
+    if repeat < 1:
+        raise ValueError("repeat must be at least 1")
+    extra_args = parse_stage_args(stage_args or [])
+    output = output or str(output_folder / "results.json")
+
+    workspace_path = Path(workspace or tempfile.mkdtemp(prefix="benchmark-"))
+    try:
+        input_info = prepare_workspace(workspace_path, inputs, matches, seed)
+
+        stages: Dict[str, Any] = {}
+        for stage in STAGES:
+            args = get_stage_command_args(stage, workspace_path)
+            args += extra_args.get(stage["name"], [])
+            runs = [
+                run_stage(stage["name"], stage["script"], args, workspace_path)
+                for _ in range(repeat)
+            ]
+            rows = count_rows(workspace_path / stage["rows"])
+            if stage["name"] == "run_model":
+                rows = count_team_rows(workspace_path / stage["rows"], args)
+            stages[stage["name"]] = summarize_runs(runs, rows, args)
+            print(
+                f"{stage['name']}: {stages[stage['name']]['wall_s']:.2f}s wall, "
+                f"{stages[stage['name']]['peak_rss_mb']:.0f} MB peak RSS"
+            )
+    finally:
+        if workspace is None:
+            shutil.rmtree(workspace_path, ignore_errors=True)
+
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": repeat,
+        "input": input_info,
+        "stages": stages,
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Done. Results saved to {output}")
+    return results
+
+
+def compare(
+    baseline: str,
+    results: str,
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[str]:
+    """
+    Compare a results file against a stored baseline and flag slowdowns.
+
+    A stage is flagged when its wall time grew by more than ``threshold``
+    (relative) and by more than ``MIN_SLOWDOWN_SECONDS`` (absolute).
+
+    Args:
+        baseline (str): Path of the baseline results file.
+        results (str): Path of the results file to check.
+        threshold (float): Allowed relative slowdown, e.g. 0.1 for 10%.
+
+    Returns:
+        List[str]: Names of the stages that slowed down.
+    """
+    with open(baseline, "r") as f:
+        baseline_stages = json.load(f)["stages"]
+    with open(results, "r") as f:
+        result_stages = json.load(f)["stages"]
+
+    regressions: List[str] = []
+    print(f"{'stage':<24}{'baseline':>10}{'current':>10}{'change':>9}  rss change")
+    for name, current in result_stages.items():
+        if name not in baseline_stages:
+            print(f"{name:<24}{'-':>10}{current['wall_s']:>9.2f}s{'new':>9}")
+            continue
+        base = baseline_stages[name]
+        change = current["wall_s"] / base["wall_s"] - 1 if base["wall_s"] else 0.0
+        rss_change = current["peak_rss_mb"] - base["peak_rss_mb"]
+        slower = (
+            change > threshold
+            and current["wall_s"] - base["wall_s"] > MIN_SLOWDOWN_SECONDS
+        )
+        if slower:
+            regressions.append(name)
+        print(
+            f"{name:<24}{base['wall_s']:>9.2f}s{current['wall_s']:>9.2f}s"
+            f"{change:>+9.1%}  {rss_change:+.0f} MB{'  SLOWER' if slower else ''}"
+        )
+
+    if regressions:
+        print(f"Slowdowns beyond {threshold:.0%}: {', '.join(regressions)}")
+    else:
+        print(f"No slowdowns beyond {threshold:.0%}")
+    return regressions
+
+
+def startup(
+    model_package: Optional[str] = None,
+    command: Optional[str] = None,
+    repeat: int = 5,
+    output: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Measure how long run_model takes to start, fail validation and predict.
+
+    Each scenario of ``STARTUP_SCENARIOS`` is a fresh process, so the times
+    include the interpreter start-up and every import. They are reported
+    under "stages", so two results files can be checked with ``compare``.
+
+    Args:
+        model_package (Optional[str]): Folder with run_model.py, the model, the
+            data and its prediction table. Defaults to src/model_package.
+        command (Optional[str]): Command that runs run_model, e.g.
+            ``docker run --rm expected-runs``. Defaults to running the
+            model package's run_model.py with this interpreter. For a
+            container, only the wall time covers the container itself.
+        repeat (int): Runs per scenario; the median run is reported.
+        output (Optional[str]): Results file. Defaults to
+            data/benchmarks/startup.json.
+
+    Returns:
+        Dict[str, Any]: The results written to ``output``.
+
+    Raises:
+        RuntimeError: If a scenario exits with an unexpected code.
+    """
+    if repeat < 1:
+        raise ValueError("repeat must be at least 1")
+    folder = Path(model_package or model_package_folder)
+    if command is None:
+        prefix = [sys.executable, str(folder / "run_model.py")]
+    else:
+        prefix = shlex.split(command)
+    output = output or str(output_folder / "startup.json")
+
+    df = pd.read_parquet(
+        folder / "data.parquet", columns=["team"], engine=PARQUET_ENGINE
+    )
+    team = df["team"].value_counts().index[0]
+
+    stages: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="startup-") as log_folder:
+        for scenario in STARTUP_SCENARIOS:
+            args = [arg.replace("{team}", team) for arg in scenario["args"]]
+            log_file = Path(log_folder) / f"{scenario['name']}.log"
+            runs = []
+            for _ in range(repeat):
+                returncode, usage = measure_command(prefix + args, folder, log_file)
+                if returncode != scenario["exit_code"]:
+                    with open(log_file, "r") as f:
+                        tail = f.read()[-2000:]
+                    raise RuntimeError(
+                        f"Scenario {scenario['name']} exited with {returncode}, "
+                        f"expected {scenario['exit_code']}:\n{tail}"
+                    )
+                runs.append(usage)
+            summary = summarize_runs(runs, 0, args)
+            stages[scenario["name"]] = summary
+            print(
+                f"{scenario['name']}: {summary['wall_s'] * 1000:.0f} ms wall, "
+                f"{summary['peak_rss_mb']:.0f} MB peak RSS"
+            )
+
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": repeat,
+        "command": prefix,
+        "stages": stages,
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Done. Results saved to {output}")
+    return results
+
+
+def batch(
+    model_package: Optional[str] = None,
+    queries: int = 200,
+    seed: int = 0,
+    repeat: int = 5,
+    output: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Compare run_model's batch mode with answering the same queries one by one.
+
+    The model package's model and data are loaded once. ``queries`` distinct
+    random queries are then answered by one ``run_batch`` call for all of
+    them, and by one ``run_batch`` call, and so one predict call, per query.
+    The prediction table is not used, so both predict with the model. The
+    two are reported under "stages" as "batch" and "single_queries", so two
+    results files can be checked with ``compare``.
+
+    Args:
+        model_package (Optional[str]): Folder with the model and the data.
+            Defaults to src/model_package.
+        queries (int): Number of queries.
+        seed (int): Seed of the queries.
+        repeat (int): Runs of each; the median run is reported.
+        output (Optional[str]): Results file. Defaults to
+            data/benchmarks/batch.json.
+
+    Returns:
+        Dict[str, Any]: The results written to ``output``.
+    """
+    if repeat < 1:
+        raise ValueError("repeat must be at least 1")
+    folder = Path(model_package or model_package_folder)
+    output = output or str(output_folder / "batch.json")
+
+    model_obj = load_model(str(folder / "expected_runs_model.npz"))
+    index = QueryIndex(read_data(str(folder / "data.parquet")))
+    lines = [
+        json.dumps(query)
+        for query in make_batch_queries(index.df, queries, random.Random(seed))
+    ]
+    answers = [json.loads(answer) for answer in run_batch(model_obj, index, lines)]
+    overs = sum(len(answer.get("predictions", [])) for answer in answers)
+
+    scenarios: Dict[str, Callable[[], Any]] = {
+        "batch": lambda: list(run_batch(model_obj, index, lines)),
+        "single_queries": lambda: [
+            answer for line in lines for answer in run_batch(model_obj, index, [line])
+        ],
+    }
+    stages: Dict[str, Any] = {}
+    for name, answer_queries in scenarios.items():
+        runs = [measure_call(answer_queries) for _ in range(repeat)]
+        stages[name] = summarize_runs(runs, len(lines), [])
+        print(
+            f"{name}: {stages[name]['wall_s'] * 1000:.0f} ms wall, "
+            f"{stages[name]['rows_per_s']:.0f} queries per second"
+        )
+    speedup = stages["single_queries"]["wall_s"] / stages["batch"]["wall_s"]
+    print(f"Batch mode is {speedup:.1f}x as fast as single queries")
+
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": repeat,
+        "model": str(folder / "expected_runs_model.npz"),
+        "queries": len(lines),
+        "overs": overs,
+        "speedup": round(speedup, 2),
+        "stages": stages,
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Done. Results saved to {output}")
+    return results
+
+
+def make_batch_queries(
+    df: pd.DataFrame, num_queries: int, rng: random.Random
+) -> List[Dict[str, Any]]:
+    """
+    Distinct queries of a random batting team, over range and number of
+    matches. Fewer are returned if the data cannot make ``num_queries``.
+    """
+    teams = sorted(df["team"].unique())
+    last_over = int(df["over_num"].max())
+    queries: Dict[str, Dict[str, Any]] = {}
+    for _ in range(10 * num_queries):
+        if len(queries) == num_queries:
+            break
+        start_over = rng.randint(1, last_over)
+        query = {
+            "batting_team": rng.choice(teams),
+            "start_over": start_over,
+            "end_over": rng.randint(start_over, last_over),
+            "num_matches": rng.choice([1, 5, 20, -1]),
+        }
+        queries.setdefault(json.dumps(query), query)
+    return list(queries.values())
+
+
+def measure_call(function: Callable[[], Any]) -> Dict[str, float]:
+    """
+    Call a function in this process and measure it.
+
+    The peak RSS is this process's, so it includes whatever ran before.
+    """
+    start_cpu = time.process_time()
+    start = time.perf_counter()
+    function()
+    wall = time.perf_counter() - start
+    return {
+        "wall_s": wall,
+        "cpu_s": time.process_time() - start_cpu,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        / RSS_UNITS_PER_MB,
+    }
+
+
+def prepare_workspace(
+    workspace: Path, inputs: str, matches: int, seed: int
+) -> Dict[str, Any]:
+    """
+    Copy the source tree into ``workspace`` and place the input JSON files.
+
+    Returns:
+        Dict[str, Any]: Description of the inputs, for the results file.
+    """
+    shutil.copytree(
+        repo_folder / "src",
+        workspace / "src",
+        ignore=shutil.ignore_patterns("__pycache__", "*.pkl", "*.npz", "data.parquet"),
+        dirs_exist_ok=True,
+    )
+    json_folder = workspace / "data" / "provided_json"
+    os.makedirs(json_folder, exist_ok=True)
+
+    info: Dict[str, Any] = {"kind": inputs}
+    if inputs == "synthetic":
+        print(f"Generating {matches} synthetic matches (seed {seed})")
+        counts = generate(str(json_folder), matches, 50, 12, seed)
+        info.update(
+            matches=matches,
+            seed=seed,
+            match_rows=counts["matches"],
+            deliveries=counts["deliveries"],
+        )
+    elif inputs == "real":
+        for name in ["match_results.json", "innings_results.json"]:
+            source = data_folder / "provided_json" / name
+            with open(source, "rb") as f:
+                if f.read(len(LFS_POINTER_PREFIX)) == LFS_POINTER_PREFIX:
+                    raise FileNotFoundError(
+                        f"{source} is a Git LFS pointer; run `git lfs pull` or "
+                        "`dvc pull` first, or benchmark synthetic inputs"
+                    )
+            shutil.copy(source, json_folder / name)
+    else:
+        raise ValueError(f"Unknown inputs: {inputs}. Use 'synthetic' or 'real'")
+
+    info["bytes"] = {
+        path.name: path.stat().st_size for path in sorted(json_folder.glob("*.json"))
+    }
+    return info
+
+
+def get_stage_command_args(stage: Dict[str, Any], workspace: Path) -> List[str]:
+    """
+    Arguments a stage needs to run unattended.
+    """
+    if stage["name"] != "run_model":
+        return []
+    # Predict every over of every match of the most common batting team
+    df = pd.read_parquet(
+        workspace / stage["rows"], columns=["team"], engine=PARQUET_ENGINE
+    )
+    team = df["team"].value_counts().index[0]
+    return [
+        "--batting-team",
+        team,
+        "--start-over",
+        "1",
+        "--end-over",
+        "50",
+        "--num-matches",
+        "-1",
+    ]
+
+
+def run_stage(name: str, script: str, args: List[str], workspace: Path) -> Dict:
+    """
+    Run one stage in a child process and measure it.
+
+    Raises:
+        RuntimeError: If the stage exits with an error.
+    """
+    log_file = workspace / f"{name}.log"
+    returncode, usage = measure_command(
+        [sys.executable, script, *args], workspace, log_file
+    )
+    if returncode != 0:
+        with open(log_file, "r") as f:
+            tail = f.read()[-2000:]
+        raise RuntimeError(f"Stage {name} failed:\n{tail}")
+    return usage
+
+
+def measure_command(
+    command: List[str], cwd: Path, log_file: Path
+) -> Tuple[int, Dict[str, float]]:
+    """
+    Run a command in a child process, logging its output, and measure it.
+
+    Returns:
+        Tuple[int, Dict[str, float]]: The exit code, and the wall time, CPU
+        time and peak RSS of the child.
+    """
+    with open(log_file, "w") as log:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            command, cwd=cwd, stdout=log, stderr=subprocess.STDOUT
+        )
+        _, status, usage = os.wait4(process.pid, 0)
+        wall = time.perf_counter() - start
+    # Let Popen know the child has already been reaped
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+    return process.returncode, {
+        "wall_s": wall,
+        "cpu_s": usage.ru_utime + usage.ru_stime,
+        "peak_rss_mb": usage.ru_maxrss / RSS_UNITS_PER_MB,
+    }
+
+
+def summarize_runs(runs: List[Dict], rows: int, args: List[str]) -> Dict[str, Any]:
+    """
+    Report the median run of a stage, with its throughput.
+    """
+    wall = median(run["wall_s"] for run in runs)
+    return {
+        "args": args,
+        "wall_s": round(wall, 4),
+        "cpu_s": round(median(run["cpu_s"] for run in runs), 4),
+        "peak_rss_mb": round(max(run["peak_rss_mb"] for run in runs), 1),
+        "rows": rows,
+        "rows_per_s": round(rows / wall, 1) if wall else None,
+        "runs": runs,
+    }
+
+
+def count_rows(path: Path) -> int:
+    if path.suffix == ".csv":
+        with open(path, "r") as f:
+            return sum(1 for _ in f) - 1
+    return len(read_parquet_dataset(str(path), columns=["matchid"]))
+
+
+def count_team_rows(path: Path, args: List[str]) -> int:
+    """
+    Number of overs run_model predicts for the batting team in ``args``.
+    """
+    team = args[args.index("--batting-team") + 1]
+    df = pd.read_parquet(path, columns=["team"], engine=PARQUET_ENGINE)
+    return int((df["team"] == team).sum())
+
+
+def parse_stage_args(stage_args: List[str]) -> Dict[str, List[str]]:
+    """
+    Parse ``STAGE=ARGS`` options into argument lists per stage.
+    """
+    names = {stage["name"] for stage in STAGES}
+    parsed: Dict[str, List[str]] = {}
+    for item in stage_args:
+        name, _, args = item.partition("=")
+        if name not in names:
+            raise ValueError(f"Unknown stage '{name}'. Choose from: {sorted(names)}")
+        parsed[name] = shlex.split(args)
+    return parsed
+
+
+def get_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=repo_folder,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages")
+    commands = parser.add_subparsers(dest="subcommand", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument(
+        "--inputs",
+        choices=["synthetic", "real"],
+        default="synthetic",
+        help="Generate synthetic inputs or use data/provided_json",
+    )
+    run_parser.add_argument(
+        "--matches", type=int, default=200, help="Number of synthetic matches"
+    )
+    run_parser.add_argument("--seed", type=int, default=0, help="Synthetic data seed")
+    run_parser.add_argument(
+        "--repeat", type=int, default=1, help="Runs per stage (median is reported)"
+    )
+    run_parser.add_argument(
+        "--stage-args",
+        action="append",
+        default=[],
+        metavar="STAGE=ARGS",
+        help='Extra stage arguments, e.g. "parse_innings_results=--workers -1"',
+    )
+    run_parser.add_argument(
+        "--output", default=None, help="Results file (data/benchmarks/results.json)"
+    )
+    run_parser.add_argument(
+        "--workspace", default=None, help="Keep stage outputs and logs in this folder"
+    )
+
+    startup_parser = commands.add_parser(
+        "startup", help="Measure run_model start-up times"
+    )
+    startup_parser.add_argument(
+        "--model-package",
+        default=None,
+        help="Folder with run_model.py, its model and data (src/model_package)",
+    )
+    startup_parser.add_argument(
+        "--command",
+        default=None,
+        help='Command that runs run_model, e.g. "docker run --rm expected-runs"',
+    )
+    startup_parser.add_argument(
+        "--repeat", type=int, default=5, help="Runs per scenario (median is reported)"
+    )
+    startup_parser.add_argument(
+        "--output", default=None, help="Results file (data/benchmarks/startup.json)"
+    )
+
+    batch_parser = commands.add_parser(
+        "batch", help="Compare run_model's batch mode with single queries"
+    )
+    batch_parser.add_argument(
+        "--model-package",
+        default=None,
+        help="Folder with the .npz model and its data (src/model_package)",
+    )
+    batch_parser.add_argument(
+        "--queries", type=int, default=200, help="Number of queries"
+    )
+    batch_parser.add_argument("--seed", type=int, default=0, help="Query seed")
+    batch_parser.add_argument(
+        "--repeat", type=int, default=5, help="Runs of each (median is reported)"
+    )
+    batch_parser.add_argument(
+        "--output", default=None, help="Results file (data/benchmarks/batch.json)"
+    )
+
+    compare_parser = commands.add_parser(
+        "compare", help="Flag slowdowns against a baseline"
+    )
+    compare_parser.add_argument("baseline", help="Baseline results file")
+    compare_parser.add_argument("results", help="Results file to check")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Allowed relative slowdown (0.1 = 10%%)",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = vars(parse_args())
+    commands = {"run": run, "startup": startup, "batch": batch, "compare": compare}
+    command: Callable = commands[args.pop("subcommand")]
+    result = command(**args)
+    if command is compare and result:
+        sys.exit(1)
@@ -1,9 +1,9 @@
+import argparse
 import pandas as pd
-from collections import defaultdict
 from pathlib import Path
-import tqdm
 import os
-from typing import Dict, List
+import sys
+from typing import List
 
 # Define paths
 script_folder: Path = Path(__file__).parent
@@ -11,69 +11,168 @@ data_folder: Path = script_folder.parent.parent / "data"
 output_folder: Path = data_folder / "training"
 os.makedirs(output_folder, exist_ok=True)
 
+# Intermediate outputs may be single files or multi-part datasets
+sys.path.append(str(script_folder.parent / "parsing"))
+from parquet_dataset import (
+    PARQUET_ENGINE,
+    append_frame,
+    dataset_matchids,
+    open_appendable_dataset,
+    prepare_output,
+    read_parquet_dataset,
+)
 
-def main() -> None:
+# Training data columns are stored in the types the model package reads
+sys.path.append(str(script_folder.parent / "model_package"))
+from features import compact_columns
+
+# Column order of the training data
+TRAINING_COLUMNS: List[str] = [
+    "matchid",
+    "date",
+    "team",
+    "opponent",
+    "inning",
+    "over_num",
+    "initial_batter",
+    "initial_bowler",
+    "num_batsmen",
+    "num_bowlers",
+    "num_deliveries",
+    "remaining_wickets",
+    "remaining_overs",
+    "runs",
+]
+
+# Most overs per row group of the training data. train.py --stream reads one row
+# group at a time, so this bounds the memory of streamed training.
+TRAINING_ROW_GROUP_SIZE: int = 100_000
+
+
+def main(
+    incremental: bool = False, row_group_size: int = TRAINING_ROW_GROUP_SIZE
+) -> None:
     """
     Main function to process filtered innings results, group by match, inning, and over,
     and generate training data with relevant features and targets. The output is saved
     as parquet files for downstream usage.
+
+    Args:
+        incremental (bool): Only process matches that are not yet accounted for
+            in the existing training data and append them to it as a new part.
+            The model package copy is then rewritten from all parts.
+        row_group_size (int): Most overs per row group of the output.
     """
     train_file: str = os.path.join(
         data_folder, "intermediate", "filtered_innings.parquet"
     )
+    output_train_file: str = os.path.join(output_folder, "training_data.parquet")
+    output_model_package_file: str = os.path.join(
+        script_folder.parent, "model_package", "data.parquet"
+    )
 
     print("Reading filtered innings results")
-    df: pd.DataFrame = pd.read_parquet(train_file)
-
-    # Group data by matchid, innings, and over_int
-    df_grouped = df.groupby(by=["matchid", "innings", "over_int"])
-
-    # Dictionary to store training data
-    train_dict: Dict[str, List] = defaultdict(list)
-
-    # Initialize a progress bar
-    pbar = tqdm.tqdm(total=len(df_grouped), desc="Creating training data")
-    for (matchid, inning, over_num), group in df_grouped:
-        # Extract metadata
-        train_dict["matchid"].append(matchid)
-        train_dict["date"].append(group["date"].iloc[0])
-        train_dict["team"].append(group["team"].iloc[0])
-        train_dict["opponent"].append(group["opponent"].iloc[0])
-        train_dict["inning"].append(inning)
-        train_dict["over_num"].append(over_num)
-
-        # Extract features
-        train_dict["initial_batter"].append(group["batsman_number"].iloc[0])
-        train_dict["initial_bowler"].append(group["bowler_number"].iloc[0])
-        train_dict["num_batsmen"].append(group["batsman_number"].nunique())
-        train_dict["num_bowlers"].append(group["bowler_number"].nunique())
-        train_dict["num_deliveries"].append(len(group))
-        train_dict["remaining_wickets"].append(group["remaining_wickets"].min())
-        train_dict["remaining_overs"].append(group["remaining_overs"].iloc[0])
-
-        # Extract target
-        train_dict["runs"].append(group["runs.total"].sum())
-
-        pbar.update(1)
-    pbar.close()
-
-    # Convert to DataFrame
-    print("Converting to DataFrame")
-    train_df: pd.DataFrame = pd.DataFrame(train_dict)
+    if incremental:
+        manifest = open_appendable_dataset(output_train_file)
+        pending = dataset_matchids(train_file) - set(manifest["matchids"])
+        if not pending:
+            print(f"No new matches. {output_train_file} is up to date")
+            return
+        print(f"Processing {len(pending)} new matches")
+        df: pd.DataFrame = read_parquet_dataset(train_file, matchids=pending)
+    else:
+        df = read_parquet_dataset(train_file)
+
+    train_df = create_training_data(df)
 
     # Save training data to parquet files
     print("Writing to parquet")
-    output_train_file: str = os.path.join(output_folder, "training_data.parquet")
-    output_model_package_file: str = os.path.join(
-        script_folder.parent, "model_package", "data.parquet"
-    )
-    train_df.to_parquet(output_train_file, index=False)
-    train_df.to_parquet(output_model_package_file, index=False)
+    if incremental:
+        append_frame(output_train_file, manifest, train_df, pending, row_group_size)
+        train_df = read_parquet_dataset(output_train_file)
+    else:
+        prepare_output(output_train_file)
+        write_training_data(train_df, output_train_file, row_group_size)
+    write_training_data(train_df, output_model_package_file, row_group_size)
 
     print(
         f"Done. Training data saved to {output_train_file} and {output_model_package_file}"
     )
 
 
+def create_training_data(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate filtered deliveries into one training row per match, inning and over.
+
+    Args:
+        df (pd.DataFrame): Filtered innings results.
+
+    Returns:
+        pd.DataFrame: Match metadata, over-level features and the runs target,
+        with the numeric columns downcast to ``features.COLUMN_DTYPES``.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=TRAINING_COLUMNS)
+
+    # Aggregate every (matchid, innings, over_int) group in one pass
+    print("Creating training data")
+    train_df = (
+        df.groupby(by=["matchid", "innings", "over_int"])
+        .agg(
+            # Extract metadata
+            date=("date", "first"),
+            team=("team", "first"),
+            opponent=("opponent", "first"),
+            # Extract features
+            initial_batter=("batsman_number", "first"),
+            initial_bowler=("bowler_number", "first"),
+            num_batsmen=("batsman_number", "nunique"),
+            num_bowlers=("bowler_number", "nunique"),
+            num_deliveries=("batsman_number", "size"),
+            remaining_wickets=("remaining_wickets", "min"),
+            remaining_overs=("remaining_overs", "first"),
+            # Extract target
+            runs=("runs.total", "sum"),
+        )
+        .reset_index()
+        .rename(columns={"innings": "inning", "over_int": "over_num"})
+    )
+
+    return compact_columns(train_df[TRAINING_COLUMNS])
+
+
+def write_training_data(
+    train_df: pd.DataFrame,
+    output_file: str,
+    row_group_size: int = TRAINING_ROW_GROUP_SIZE,
+) -> None:
+    """
+    Write training data to a parquet file in row groups of at most
+    ``row_group_size`` overs, the chunks streamed training reads.
+    """
+    train_df.to_parquet(
+        output_file,
+        index=False,
+        engine=PARQUET_ENGINE,
+        row_group_offsets=row_group_size,
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Create over-level training data")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only process matches not yet in the training data and append them",
+    )
+    parser.add_argument(
+        "--row-group-size",
+        type=int,
+        default=TRAINING_ROW_GROUP_SIZE,
+        help="Most overs per row group, the chunks of streamed training",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    main()
+    main(**vars(parse_args()))
@@ -0,0 +1,199 @@
+import argparse
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+import tqdm
+
+# Define paths
+script_folder: Path = Path(__file__).parent
+data_folder: Path = script_folder.parent.parent / "data"
+
+# Both curation steps, and the dataset and worker helpers of the parsing stage
+sys.path.append(str(script_folder.parent / "parsing"))
+from create_training_data import create_training_data, write_training_data
+from filter_innings_results import GROUP_KEYS, filter_innings
+from parquet_dataset import (
+    PARQUET_ENGINE,
+    dataset_matchids,
+    part_file_name,
+    prepare_output,
+    read_parquet_dataset,
+)
+from sharded import resolve_workers
+
+# Row order of each output, which every bucket already follows on its own
+FILTERED_SORT_KEYS: List[str] = GROUP_KEYS
+TRAINING_SORT_KEYS: List[str] = ["matchid", "inning", "over_num"]
+
+
+def main(workers: int = -1, buckets: Optional[int] = None) -> None:
+    """
+    Run filter_innings_results and create_training_data partitioned by match.
+
+    Matches are hashed into buckets by ``matchid``. Each bucket goes through
+    both curation steps in its own process and writes its own parquet parts,
+    which are then concatenated and stably sorted back into the serial row
+    order. The outputs are therefore identical to running the two stages one
+    after the other, whatever the number of workers or buckets.
+
+    Args:
+        workers (int): Number of processes, or -1 for one per CPU core.
+        buckets (Optional[int]): Number of match buckets. Defaults to one per
+            worker.
+
+    Raises:
+        ValueError: If ``buckets`` is less than 1.
+    """
+    if buckets is not None and buckets < 1:
+        raise ValueError(f"buckets must be at least 1, got {buckets}")
+    workers = resolve_workers(workers)
+    num_buckets = workers if buckets is None else buckets
+
+    parsed_folder = os.path.join(data_folder, "parsed")
+    innings_results_path = os.path.join(parsed_folder, "innings_results.parquet")
+    match_results_path = os.path.join(parsed_folder, "match_results.parquet")
+    filtered_file = os.path.join(
+        data_folder, "intermediate", "filtered_innings.parquet"
+    )
+    training_file = os.path.join(data_folder, "training", "training_data.parquet")
+    model_package_file = os.path.join(
+        script_folder.parent, "model_package", "data.parquet"
+    )
+    staging_folder = os.path.join(data_folder, "intermediate", "_curation_buckets")
+
+    print("Partitioning matches")
+    partitions = partition_matchids(dataset_matchids(innings_results_path), num_buckets)
+
+    prepare_output(staging_folder)
+    os.makedirs(staging_folder)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    curate_bucket,
+                    index,
+                    bucket,
+                    innings_results_path,
+                    match_results_path,
+                    staging_folder,
+                )
+                for index, bucket in enumerate(partitions)
+            ]
+            parts = [
+                future.result()
+                for future in tqdm.tqdm(futures, desc="Curating buckets", unit="bucket")
+            ]
+
+        print("Merging buckets")
+        filtered_df = merge_parts([part[0] for part in parts], FILTERED_SORT_KEYS)
+        training_df = merge_parts([part[1] for part in parts], TRAINING_SORT_KEYS)
+    finally:
+        shutil.rmtree(staging_folder, ignore_errors=True)
+
+    print("Saving to parquet")
+    prepare_output(filtered_file)
+    filtered_df.to_parquet(filtered_file, index=False, engine=PARQUET_ENGINE)
+    for output_file in [training_file, model_package_file]:
+        prepare_output(output_file)
+        write_training_data(training_df, output_file)
+
+    print(
+        f"Done. {len(filtered_df)} deliveries saved to {filtered_file}, "
+        f"{len(training_df)} overs saved to {training_file} and {model_package_file}"
+    )
+
+
+def partition_matchids(matchids: Iterable[int], num_buckets: int) -> List[List[int]]:
+    """
+    Hash match ids into non-empty buckets by ``matchid % num_buckets``.
+
+    Args:
+        matchids (Iterable[int]): Match ids to partition.
+        num_buckets (int): Number of buckets to hash into.
+
+    Returns:
+        List[List[int]]: Sorted match ids of each non-empty bucket, in bucket order.
+    """
+    if num_buckets < 1:
+        raise ValueError("num_buckets must be at least 1")
+
+    buckets: Dict[int, List[int]] = {}
+    for matchid in sorted(matchids):
+        buckets.setdefault(matchid % num_buckets, []).append(matchid)
+    return [buckets[bucket] for bucket in sorted(buckets)]
+
+
+def curate_bucket(
+    index: int,
+    matchids: List[int],
+    innings_results_path: str,
+    match_results_path: str,
+    staging_folder: str,
+) -> Tuple[str, str]:
+    """
+    Run both curation steps on one bucket of matches and write its parts.
+
+    Only the bucket's rows of the parsed results are read, whether they are
+    single files or datasets partitioned some other way.
+
+    Returns:
+        Tuple[str, str]: Paths of the bucket's filtered innings and training
+        data parts.
+    """
+    innings_results = read_parquet_dataset(innings_results_path, matchids=matchids)
+    match_results = read_parquet_dataset(match_results_path, matchids=matchids)
+
+    filtered_df = filter_innings(innings_results, match_results)
+    training_df = create_training_data(filtered_df)
+
+    parts = []
+    for name, df in [("filtered", filtered_df), ("training", training_df)]:
+        part_file = os.path.join(staging_folder, f"{name}-{part_file_name(index)}")
+        df.to_parquet(part_file, index=False, engine=PARQUET_ENGINE)
+        parts.append(part_file)
+    return parts[0], parts[1]
+
+
+def merge_parts(part_files: List[str], sort_keys: List[str]) -> pd.DataFrame:
+    """
+    Concatenate bucket parts and restore the serial row order.
+
+    Rows of one match all live in the same bucket, already in order, so a
+    stable sort on ``sort_keys`` reproduces the unpartitioned output exactly.
+    """
+    frames = [
+        pd.read_parquet(part_file, engine=PARQUET_ENGINE) for part_file in part_files
+    ]
+    if not frames:
+        return pd.DataFrame()
+    non_empty = [frame for frame in frames if len(frame)] or frames[:1]
+    df = pd.concat(non_empty, ignore_index=True)
+    return df.sort_values(sort_keys, kind="stable").reset_index(drop=True)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Run both curation steps in parallel, partitioned by match"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=-1,
+        help="Number of processes (-1 for all cores)",
+    )
+    parser.add_argument(
+        "--buckets",
+        type=int,
+        default=None,
+        help="Number of match buckets (defaults to one per worker)",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(**vars(parse_args()))
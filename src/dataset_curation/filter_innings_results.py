@@ -1,8 +1,9 @@
+import argparse
+import numpy as np
 import pandas as pd
-from collections import defaultdict
 from pathlib import Path
 import os
-import tqdm
+import sys
 from typing import Dict, List, Any
 
 # Suppress warnings for cleaner output
@@ -16,23 +17,83 @@ data_folder: Path = script_folder.parent.parent / "data"
 output_folder: Path = data_folder / "intermediate"
 os.makedirs(output_folder, exist_ok=True)
 
+# Parsed outputs may be single files or multi-part datasets
+sys.path.append(str(script_folder.parent / "parsing"))
+from parquet_dataset import (
+    PARQUET_ENGINE,
+    append_frame,
+    dataset_matchids,
+    open_appendable_dataset,
+    prepare_output,
+    read_parquet_dataset,
+)
 
-def main() -> None:
+# Deliveries are numbered and accumulated per innings of a match
+GROUP_KEYS: List[str] = ["matchid", "innings"]
+
+
+def main(incremental: bool = False) -> None:
     """
     Main function to process and filter innings results, enrich with metadata,
     and save the resulting dataset as a parquet file.
+
+    Args:
+        incremental (bool): Only process matches that are not yet accounted for
+            in the existing output and append them to it as a new part.
     """
+    innings_results_path: str = os.path.join(
+        data_folder, "parsed", "innings_results.parquet"
+    )
+    output_file: str = os.path.join(output_folder, "filtered_innings.parquet")
+
     # Read the innings and match results
     print("Reading innings results")
-    innings_results: pd.DataFrame = pd.read_parquet(
-        os.path.join(data_folder, "parsed", "innings_results.parquet")
-    )
+    if incremental:
+        manifest = open_appendable_dataset(output_file)
+        pending = dataset_matchids(innings_results_path) - set(manifest["matchids"])
+        if not pending:
+            print(f"No new matches. {output_file} is up to date")
+            return
+        print(f"Processing {len(pending)} new matches")
+        innings_results: pd.DataFrame = read_parquet_dataset(
+            innings_results_path, matchids=pending
+        )
+    else:
+        innings_results = read_parquet_dataset(innings_results_path)
 
     print("Reading match results")
-    match_results: pd.DataFrame = pd.read_parquet(
+    match_results: pd.DataFrame = read_parquet_dataset(
         os.path.join(data_folder, "parsed", "match_results.parquet")
     )
 
+    output_df = filter_innings(innings_results, match_results)
+
+    print("Saving to parquet")
+    if incremental:
+        # Record filtered-out matches too, so they are not reprocessed next time
+        append_frame(output_file, manifest, output_df, pending)
+    else:
+        prepare_output(output_file)
+        output_df.to_parquet(output_file, index=False, engine=PARQUET_ENGINE)
+    print("Done")
+
+
+def filter_innings(
+    innings_results: pd.DataFrame, match_results: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Filter innings results to completed male matches and derive the per-delivery
+    state (remaining overs and wickets, player order, opponent and date).
+
+    Args:
+        innings_results (pd.DataFrame): Parsed innings results.
+        match_results (pd.DataFrame): Parsed match results covering every match
+            in ``innings_results``.
+
+    Returns:
+        pd.DataFrame: One row per delivery with the columns of the filtered
+        innings dataset.
+    """
     # Filter out non-results and non-male matches
     innings_results = filter_non_results(innings_results, match_results)
     innings_results = filter_male_matches(innings_results, match_results)
@@ -57,8 +118,6 @@ def main() -> None:
         "runs.total",
     ]
 
-    output_dict: Dict[str, List[Any]] = defaultdict(list)
-
     # Count and remove duplicate rows
     duplicate_rows = innings_results.duplicated().sum()
     print(f"Duplicate rows: {duplicate_rows} / {len(innings_results)}")
@@ -71,40 +130,46 @@ def main() -> None:
             innings_results["wicket.kind"] == wicket_kind, "wicket.kind"
         ] = None
 
-    # Group data by match and innings
-    innings_grouped = innings_results.groupby(by=["matchid", "innings"])
-    pbar = tqdm.tqdm(total=len(innings_grouped), desc="Parsing innings results")
-
-    for (match_id, inning), group in innings_grouped:
-        match_meta = get_match_metadata(
-            match_results, match_id, group["team"].values[0]
-        )
-
-        group = get_remaining_overs(group, match_meta)
-        group = get_remaining_wickets(group)
-
-        for key in ["batsman", "bowler"]:
-            group = encode_by_order(group, key)
-
-        group["opponent"] = match_meta["opponent"]
-        group["date"] = match_meta["date"]
-
-        for key in key_columns:
-            output_dict[key].extend(group[key].tolist())
-
-        pbar.update(1)
-    pbar.close()
-
-    # Convert to DataFrame and save
-    print("Converting to DataFrame")
-    output_df: pd.DataFrame = pd.DataFrame(output_dict)
-
-    print("Saving to parquet")
-    output_df.to_parquet(
-        os.path.join(output_folder, "filtered_innings.parquet"),
-        index=False,
+    if innings_results.empty:
+        return pd.DataFrame(columns=key_columns)
+
+    # Order deliveries by match and innings, keeping their order within an innings
+    df = innings_results.sort_values(GROUP_KEYS, kind="stable").reset_index(drop=True)
+
+    # Look up match metadata once per innings, for the team of its first delivery
+    print("Computing innings features")
+    match_index = build_match_index(match_results)
+    innings_first = df.drop_duplicates(subset=GROUP_KEYS)
+    innings_meta = pd.DataFrame(
+        [
+            get_match_metadata(match_index, match_id, team)
+            for match_id, team in zip(
+                innings_first["matchid"].tolist(), innings_first["team"].tolist()
+            )
+        ]
+    )
+    # Broadcast it to every delivery of the innings
+    innings_meta = innings_meta.iloc[df.groupby(GROUP_KEYS, sort=False).ngroup()]
+
+    df = get_remaining_overs(df, innings_meta["overs"].to_numpy(dtype=np.int64))
+    df = get_remaining_wickets(df)
+
+    for key in ["batsman", "bowler"]:
+        df = encode_by_order(df, key)
+
+    df["opponent"] = innings_meta["opponent"].to_numpy()
+    df["date"] = innings_meta["date"].to_numpy()
+
+    # Store plain values, as in the parsed JSON
+    output_df = df[key_columns]
+    return output_df.astype(
+        {
+            key: object if isinstance(dtype, pd.CategoricalDtype) else np.int64
+            for key, dtype in output_df.dtypes.items()
+            if isinstance(dtype, pd.CategoricalDtype)
+            or pd.api.types.is_integer_dtype(dtype)
+        }
     )
-    print("Done")
 
 
 def filter_non_results(
@@ -127,52 +192,121 @@ def filter_male_matches(
     return innings_results[~innings_results["matchid"].isin(nonmale_matchid)]
 
 
+def build_match_index(match_results: pd.DataFrame) -> Dict[int, Dict[str, Any]]:
+    """
+    Index match metadata by match id for constant-time lookups.
+
+    Match results hold one row per team. The outcome fields are taken from the
+    first row of each match and the teams are kept in row order, so lookups
+    return exactly what a scan of ``match_results`` would.
+
+    Args:
+        match_results (pd.DataFrame): Parsed match results.
+
+    Returns:
+        Dict[int, Dict[str, Any]]: Metadata of each match, keyed by match id.
+    """
+    first_rows = match_results.drop_duplicates(subset="matchid")
+    # Collected in one pass: grouping a categorical column into lists makes
+    # pandas try to cast each list back to a category
+    teams: Dict[int, List[Any]] = {}
+    for match_id, team in zip(
+        match_results["matchid"].tolist(), match_results["teams"].tolist()
+    ):
+        teams.setdefault(match_id, []).append(team)
+    fields = {
+        "date": "dates",
+        "winner": "outcome.winner",
+        "overs": "overs",
+        "wickets": "outcome.wickets",
+        "runs": "outcome.runs",
+        "method": "outcome.method",
+    }
+    values = zip(*(first_rows[column].tolist() for column in fields.values()))
+    return {
+        match_id: {**dict(zip(fields, row)), "teams": teams[match_id]}
+        for match_id, row in zip(first_rows["matchid"].tolist(), values)
+    }
+
+
 def get_match_metadata(
-    match_results: pd.DataFrame, match_id: int, team: str
+    match_index: Dict[int, Dict[str, Any]], match_id: int, team: str
 ) -> Dict[str, Any]:
     """
-    Extract metadata for a given match.
+    Extract metadata for a given match, with the opponent of ``team``.
+
+    Args:
+        match_index (Dict[int, Dict[str, Any]]): Index from ``build_match_index``.
+        match_id (int): Match identifier.
+        team (str): Team name for the current inning.
+
+    Returns:
+        Dict[str, Any]: Metadata dictionary for the match.
     """
-    match_result = match_results[match_results["matchid"] == match_id]
+    match_meta = match_index[match_id]
     return {
-        "date": match_result["dates"].values[0],
-        "winner": match_result["outcome.winner"].values[0],
-        "overs": match_result["overs"].values[0],
-        "wickets": match_result["outcome.wickets"].values[0],
-        "runs": match_result["outcome.runs"].values[0],
-        "method": match_result["outcome.method"].values[0],
-        "opponent": match_result[match_result["teams"] != team]["teams"].values[0],
+        "date": match_meta["date"],
+        "winner": match_meta["winner"],
+        "overs": match_meta["overs"],
+        "wickets": match_meta["wickets"],
+        "runs": match_meta["runs"],
+        "method": match_meta["method"],
+        "opponent": [t for t in match_meta["teams"] if t != team][0],
     }
 
 
-def get_remaining_overs(df: pd.DataFrame, match_meta: Dict[str, Any]) -> pd.DataFrame:
+def get_remaining_overs(df: pd.DataFrame, match_overs: np.ndarray) -> pd.DataFrame:
     """
     Compute remaining overs for each delivery.
+
+    Args:
+        df (pd.DataFrame): Deliveries.
+        match_overs (np.ndarray): Scheduled overs of each delivery's match.
     """
-    df["over_int"] = df["over"].apply(lambda x: int(float(x)) + 1)
-    df["remaining_overs"] = match_meta["overs"] - df["over_int"]
+    over = df["over"].to_numpy(dtype=np.float64)
+    df["over_int"] = np.trunc(over).astype(np.int64) + 1
+    df["remaining_overs"] = match_overs - df["over_int"]
     return df
 
 
 def get_remaining_wickets(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Compute remaining wickets for each delivery.
+    Compute remaining wickets for each delivery, counting down per innings.
     """
-    df["wicket.binary"] = df["wicket.kind"].apply(lambda x: 0 if x is None else 1)
-    df["wickets"] = df["wicket.binary"].cumsum()
-    df["remaining_wickets"] = 10 - df["wickets"]
-    return df.drop(columns=["wicket.binary", "wickets"])
+    wickets = df["wicket.kind"].notna().astype(np.int64)
+    df["remaining_wickets"] = 10 - wickets.groupby(
+        [df[key] for key in GROUP_KEYS], sort=False
+    ).cumsum()
+    return df
 
 
 def encode_by_order(df: pd.DataFrame, key: str) -> pd.DataFrame:
     """
-    Encode a column by its order of appearance.
+    Encode a column by its order of appearance within each innings.
     """
-    unique_values = df[key].unique()
-    value_mapping = {value: i + 1 for i, value in enumerate(unique_values)}
-    df[f"{key}_number"] = df[key].map(value_mapping)
+    innings = [df[k] for k in GROUP_KEYS]
+    first_seen = ~df.duplicated(subset=GROUP_KEYS + [key])
+    order = first_seen.astype(np.int64).groupby(innings, sort=False).cumsum()
+
+    # Every row takes the number given to its value where it first appeared
+    df[f"{key}_number"] = (
+        order.where(first_seen)
+        .groupby(innings + [df[key]], sort=False, dropna=False, observed=True)
+        .transform("first")
+        .astype(np.int64)
+    )
     return df
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Filter and enrich innings results")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only process matches not yet in the output and append them",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    main()
+    main(**vars(parse_args()))
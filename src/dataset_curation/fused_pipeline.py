@@ -0,0 +1,123 @@
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+# Define paths
+script_folder: Path = Path(__file__).parent
+data_folder: Path = script_folder.parent.parent / "data"
+
+# Every step of the pipeline, as used by the individual DVC stages
+sys.path.append(str(script_folder.parent / "parsing"))
+from create_training_data import create_training_data, write_training_data
+from filter_innings_results import filter_innings
+from parquet_dataset import PARQUET_ENGINE, prepare_output
+from parse_innings_results import parse_innings_results
+from parse_match_results import parse_match_results
+from q3a import select_q3a_columns
+
+# Intermediate outputs that are only written to disk when asked for
+INTERMEDIATES: List[str] = ["parsed", "filtered"]
+
+
+def main(materialize: Optional[List[str]] = None) -> None:
+    """
+    Run parsing, filtering, the question 3a export and training data creation
+    in one process, passing DataFrames between the steps in memory.
+
+    The final outputs (q3a.csv, training_data.parquet and the model package
+    copy) are the same files the DVC stages write. Intermediate parquet files
+    are skipped unless listed in ``materialize``.
+
+    Args:
+        materialize (Optional[List[str]]): Intermediates to also write, out of
+            ``INTERMEDIATES``.
+    """
+    materialize = set(materialize or [])
+    unknown = materialize.difference(INTERMEDIATES)
+    if unknown:
+        raise ValueError(f"Unknown intermediates: {sorted(unknown)}")
+
+    outputs = run_pipeline(
+        os.path.join(data_folder, "provided_json", "innings_results.json"),
+        os.path.join(data_folder, "provided_json", "match_results.json"),
+    )
+
+    files: Dict[str, str] = {
+        "q3a": os.path.join(data_folder, "intermediate", "q3a.csv"),
+        "training_data": os.path.join(data_folder, "training", "training_data.parquet"),
+    }
+    if "parsed" in materialize:
+        for name in ["innings_results", "match_results"]:
+            files[name] = os.path.join(data_folder, "parsed", f"{name}.parquet")
+    if "filtered" in materialize:
+        files["filtered_innings"] = os.path.join(
+            data_folder, "intermediate", "filtered_innings.parquet"
+        )
+
+    print("Saving outputs")
+    for name, output_file in files.items():
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        prepare_output(output_file)
+        if output_file.endswith(".csv"):
+            outputs[name].to_csv(output_file, index=False)
+        elif name == "training_data":
+            write_training_data(outputs[name], output_file)
+        else:
+            outputs[name].to_parquet(output_file, index=False, engine=PARQUET_ENGINE)
+        print(f"Saved {output_file}")
+
+    model_package_file = os.path.join(
+        script_folder.parent, "model_package", "data.parquet"
+    )
+    write_training_data(outputs["training_data"], model_package_file)
+    print(f"Done. Training data also saved to {model_package_file}")
+
+
+def run_pipeline(
+    innings_results_file: str, match_results_file: str
+) -> Dict[str, pd.DataFrame]:
+    """
+    Run every curation step on the raw JSON inputs without touching disk.
+
+    Args:
+        innings_results_file (str): Path to the innings results JSON.
+        match_results_file (str): Path to the match results JSON.
+
+    Returns:
+        Dict[str, pd.DataFrame]: The output of each step, keyed by the name of
+        the file the corresponding DVC stage writes (``match_results``,
+        ``innings_results``, ``filtered_innings``, ``q3a`` and ``training_data``).
+    """
+    outputs: Dict[str, pd.DataFrame] = {}
+    outputs["match_results"] = parse_match_results(match_results_file)
+    outputs["innings_results"] = parse_innings_results(innings_results_file)
+
+    print("Filtering innings results")
+    outputs["filtered_innings"] = filter_innings(
+        outputs["innings_results"], outputs["match_results"]
+    )
+    outputs["q3a"] = select_q3a_columns(outputs["filtered_innings"])
+    outputs["training_data"] = create_training_data(outputs["filtered_innings"])
+    return outputs
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Run the curation pipeline in one process, in memory"
+    )
+    parser.add_argument(
+        "--materialize",
+        nargs="+",
+        choices=INTERMEDIATES,
+        default=[],
+        help="Also write these intermediate outputs to disk",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(**vars(parse_args()))
@@ -1,6 +1,7 @@
 import pandas as pd
 from pathlib import Path
 import os
+import sys
 
 # Define paths
 script_folder: Path = Path(__file__).parent
@@ -8,6 +9,10 @@ data_folder: Path = script_folder.parent.parent / "data"
 output_folder: Path = data_folder / "intermediate"
 os.makedirs(output_folder, exist_ok=True)
 
+# Filtered innings may be a single file or a multi-part dataset
+sys.path.append(str(script_folder.parent / "parsing"))
+from parquet_dataset import read_parquet_dataset
+
 
 def main() -> None:
     """
@@ -19,8 +24,27 @@ def main() -> None:
     )
 
     print("Reading filtered innings results")
-    df: pd.DataFrame = pd.read_parquet(filtered_innings_file)
+    df: pd.DataFrame = read_parquet_dataset(filtered_innings_file)
+
+    df_out = select_q3a_columns(df)
+
+    output_file: str = os.path.join(output_folder, "q3a.csv")
+
+    print("Writing to CSV")
+    df_out.to_csv(output_file, index=False)
+    print(f"Done. Output saved to {output_file}")
+
 
+def select_q3a_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Take the renamed and typed subset of filtered innings results for question 3a.
+
+    Args:
+        df (pd.DataFrame): Filtered innings results.
+
+    Returns:
+        pd.DataFrame: The question 3a table.
+    """
     # Define key columns for the output
     key_cols = {
         "matchid": {"dtp": int, "rename": "match_id"},
@@ -38,11 +62,7 @@ def main() -> None:
     for key, val in key_cols.items():
         df_out[val["rename"]] = df[key].astype(val["dtp"])
 
-    output_file: str = os.path.join(output_folder, "q3a.csv")
-
-    print("Writing to CSV")
-    df_out.to_csv(output_file, index=False)
-    print(f"Done. Output saved to {output_file}")
+    return df_out
 
 
 if __name__ == "__main__":
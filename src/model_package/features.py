@@ -0,0 +1,73 @@
+from typing import Dict, List
+
+# numpy is imported where it is used, so run_model can import this module
+# without slowing its start-up
+
+# Model inputs, in training order
+INPUT_FEATURES: List[str] = [
+    "initial_batter",
+    "initial_bowler",
+    "num_batsmen",
+    "num_bowlers",
+    "num_deliveries",
+    "remaining_wickets",
+    "remaining_overs",
+]
+
+# Narrowest integer type of each numeric training data column. The features
+# are small counts: batting and bowling order 1-11, wickets 0-10 and overs
+# 0-50. The schema is fixed, so incrementally appended parts match.
+COLUMN_DTYPES: Dict[str, str] = {
+    "matchid": "int64",
+    "inning": "int8",
+    "over_num": "int8",
+    **{feature: "int8" for feature in INPUT_FEATURES},
+    "runs": "int16",
+}
+
+
+def compact_columns(df):
+    """
+    Downcast the numeric columns of ``df`` to ``COLUMN_DTYPES``.
+
+    Args:
+        df (pd.DataFrame): Training data, or any frame with some of its columns.
+
+    Returns:
+        pd.DataFrame: ``df`` with its ``COLUMN_DTYPES`` columns cast.
+
+    Raises:
+        ValueError: If a column holds values its type cannot.
+    """
+    import numpy as np
+
+    dtypes = {key: dtype for key, dtype in COLUMN_DTYPES.items() if key in df.columns}
+    for column, dtype in dtypes.items():
+        if df.empty:
+            break
+        info = np.iinfo(dtype)
+        low, high = df[column].min(), df[column].max()
+        if low < info.min or high > info.max:
+            raise ValueError(
+                f"Column {column} holds values from {low} to {high}, outside the "
+                f"range of {dtype}"
+            )
+    return df.astype(dtypes)
+
+
+def feature_matrix(df, features: List[str] = INPUT_FEATURES):
+    """
+    Build the model input of ``df`` as a C-ordered float32 array.
+
+    Trees compare features as float32, so estimators use this array as it is
+    instead of converting a copy of the frame on every fit and predict.
+
+    Returns:
+        np.ndarray: One row per row of ``df`` and one column per feature.
+    """
+    import numpy as np
+
+    matrix = np.empty((len(df), len(features)), dtype=np.float32)
+    for index, feature in enumerate(features):
+        matrix[:, index] = df[feature].to_numpy()
+    return matrix
@@ -1,12 +1,30 @@
-import pandas as pd
-import joblib
+from __future__ import annotations
+
 import typer
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Hashable, Iterable, Iterator, List
+from typing import Optional, Sequence, Tuple
+from collections import OrderedDict
 import os
+import json
+import functools
+import hashlib
 import logging
+import threading
+import time
+
+from features import INPUT_FEATURES, feature_matrix
+
+# pandas, numpy and joblib (and sklearn, through the pickle) take most of a
+# second to import, so they are imported where they are used. Help and
+# validation errors then never load them.
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
 
-# Initialize Typer app
-app = typer.Typer()
+# Initialize Typer app. Plain click error messages, as rich takes longer to
+# import than the rest of the start-up.
+app = typer.Typer(rich_markup_mode=None)
 
 # Setup logging to stdout
 logging.basicConfig(
@@ -15,27 +33,75 @@ logging.basicConfig(
 
 script_folder = Path(__file__).parent
 
+# Columns every query needs
+REQUIRED_COLUMNS = ["matchid", "team", "opponent", "over_num"] + INPUT_FEATURES
+
+# Precomputed prediction of every row of data.parquet, kept with the columns
+# queries filter on (and the date, when present). Its metadata file holds the
+# hashes of the model and data it was computed from.
+PREDICTED_COLUMN = "predicted_runs"
+PREDICTION_TABLE_COLUMNS = ["matchid", "team", "opponent", "over_num", PREDICTED_COLUMN]
+
+# Overs predicted per model call in batch mode. Past a few thousand rows a
+# call costs the same per row, so larger calls only hold more memory.
+BATCH_PREDICT_ROWS = 4096
+
+# Query parameters and their defaults, the same as the command line options
+QUERY_DEFAULTS: Dict[str, Any] = {
+    "batting_team": "Ireland",
+    "bowling_team": "None",
+    "start_over": 1,
+    "end_over": 5,
+    "num_matches": 1,
+    "match_order": "oldest",
+}
+
 
 @app.command()
 def main(
     model: str = typer.Option(
-        os.path.join(script_folder, "expected_runs_model.pkl"),
+        os.path.join(script_folder, "expected_runs_model.npz"),
         help="Path to the trained model file",
     ),
     data: str = typer.Option(
         os.path.join(script_folder, "data.parquet"),
         help="Path to the input data file",
     ),
+    predictions: str = typer.Option(
+        os.path.join(script_folder, "predictions.parquet"),
+        help="Precomputed prediction table, used when it matches the model and data",
+    ),
     batting_team: str = typer.Option(None, help="Batting team to filter by"),
     bowling_team: str = typer.Option("None", help="Bowling team to filter by"),
     start_over: int = typer.Option(1, help="Start of over range (inclusive)"),
     end_over: int = typer.Option(5, help="End of over range (inclusive)"),
     num_matches: int = typer.Option(1, help="Number of most recent matches to use"),
     match_order: str = typer.Option("oldest", help="Order of matches to use"),
+    batch: str = typer.Option(
+        None,
+        help="JSONL file of queries ('-' for stdin). Results are written to "
+        "stdout as JSONL and the filter options above are ignored",
+    ),
 ):
     """
     Run predictions for cricket overs.
     """
+    if batch:
+        df, model_obj = load_query_data(model, data, predictions)
+        index = QueryIndex(df)
+
+        logging.info(f"Running queries from {batch}")
+        if batch == "-":
+            lines = list(typer.get_text_stream("stdin"))
+        else:
+            if not os.path.exists(batch):
+                raise typer.BadParameter(f"Invalid batch file path: {batch}")
+            with open(batch, "r") as f:
+                lines = f.readlines()
+        for line in run_batch(model_obj, index, lines):
+            typer.echo(line)
+        return
+
     # Interactive input if team not provided
     if not batting_team:
         batting_team = "Ireland"
@@ -47,10 +113,24 @@ def main(
         f"Start Over: {start_over}\nEnd Over: {end_over}\nNum Matches: {num_matches}"
     )
 
+    # Validate the teams against the data's metadata, before loading the data
+    metadata = load_data_metadata(data)
+    if metadata is not None:
+        validate_query(
+            metadata, batting_team, bowling_team, start_over, end_over, num_matches
+        )
+
+    # Look predictions up when the table matches the model and data
+    table = load_prediction_table(model, data, predictions)
+
     # Load and filter data
-    logging.info(f"Loading data from {data}")
-    data_filtered = load_data(
-        data_path=data,
+    if table is None:
+        logging.info(f"Loading data from {data}")
+        df = read_data(data)
+    else:
+        df = table
+    data_filtered = filter_data(
+        QueryIndex(df),
         batting_team=batting_team,
         bowling_team=bowling_team,
         start_over=start_over,
@@ -59,27 +139,38 @@ def main(
         match_order=match_order,
     )
 
-    # Load the model
-    logging.info(f"Loading model from {model}")
-    model_obj = load_model(model)
-
-    # Input features
-    input_features = [
-        "initial_batter",
-        "initial_bowler",
-        "num_batsmen",
-        "num_bowlers",
-        "num_deliveries",
-        "remaining_wickets",
-        "remaining_overs",
-    ]
-    X = data_filtered[input_features]
+    # Load the model, unless its predictions are precomputed
+    model_obj = None
+    if table is None:
+        logging.info(f"Loading model from {model}")
+        model_obj = load_model(model)
 
     # Make predictions
-    predictions = model_obj.predict(X)
+    result = predict(model_obj, data_filtered)
 
     # Display predictions
-    result = pd.DataFrame(
+    typer.echo("\n" + result.to_string(index=False))
+
+
+def predict(model_obj, data_filtered: pd.DataFrame) -> pd.DataFrame:
+    """
+    Predict the runs of each filtered over and tabulate them with their match.
+
+    Without a model, the predictions are looked up from the prediction table
+    the overs were filtered from.
+    """
+    import pandas as pd
+
+    if model_obj is None:
+        predictions = data_filtered[PREDICTED_COLUMN].to_numpy()
+    else:
+        X = feature_matrix(data_filtered)
+        if hasattr(model_obj, "feature_names_in_"):
+            # sklearn warns when a model fitted on a frame is given an array
+            X = pd.DataFrame(X, columns=INPUT_FEATURES, copy=False)
+        predictions = model_obj.predict(X)
+
+    return pd.DataFrame(
         {
             "matchid": data_filtered["matchid"],
             "date": data_filtered.get("date", pd.NA),
@@ -90,12 +181,409 @@ def main(
         }
     )
 
-    typer.echo("\n" + result.to_string(index=False))
+
+def run_batch(model_obj, index: "QueryIndex", lines: Iterable[str]) -> Iterator[str]:
+    """
+    Answer a batch of JSONL queries with a few large calls to the model.
+
+    Every distinct query is filtered against the same loaded frame, the
+    filtered overs of consecutive queries are predicted together, about
+    ``BATCH_PREDICT_ROWS`` at a time, and the predictions are split back per
+    query. Repeated queries reuse the first one's predictions.
+
+    Args:
+        model_obj: Trained model.
+        index (QueryIndex): Index of the loaded dataset.
+        lines (Iterable[str]): JSON objects with the ``QUERY_DEFAULTS`` keys,
+            one per line. Blank lines are skipped.
+
+    Returns:
+        Iterator[str]: One JSON line per query, in input order, holding its
+        line number, the query and either its predictions or an error.
+    """
+    import pandas as pd
+
+    answers = []
+    frames: Dict[Tuple, pd.DataFrame] = {}
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        answer: Dict[str, Any] = {"line": number}
+        try:
+            answer["query"] = json.loads(line)
+            if not isinstance(answer["query"], dict):
+                raise ValueError("Query must be a JSON object")
+            query = parse_query(answer["query"])
+            answer["key"] = query_key(**query)
+            if answer["key"] not in frames:
+                frames[answer["key"]] = filter_data(index, **query)
+        except (typer.BadParameter, ValueError) as e:
+            answer["error"] = str(e)
+        answers.append(answer)
+
+    records: Dict[Tuple, str] = {}
+    for chunk in chunk_frames(frames, BATCH_PREDICT_ROWS):
+        result = predict(model_obj, pd.concat(chunk.values(), ignore_index=True))
+        start = 0
+        for key, frame in chunk.items():
+            end = start + len(frame)
+            records[key] = result.iloc[start:end].to_json(
+                orient="records", date_format="iso"
+            )
+            start = end
+
+    for answer in answers:
+        key = answer.pop("key", None)
+        if "error" in answer:
+            yield json.dumps(answer)
+        else:
+            # The records are already JSON, so splice them in rather than re-encode
+            yield f'{json.dumps(answer)[:-1]}, "predictions": {records[key]}}}'
+
+
+def chunk_frames(
+    frames: Dict[Tuple, pd.DataFrame], max_rows: int
+) -> Iterator[Dict[Tuple, pd.DataFrame]]:
+    """
+    Group consecutive query frames into chunks of up to ``max_rows`` rows.
+
+    A query's overs are never split, so a query with more overs than
+    ``max_rows`` is a chunk of its own.
+    """
+    chunk: Dict[Tuple, pd.DataFrame] = {}
+    rows = 0
+    for key, frame in frames.items():
+        if chunk and rows + len(frame) > max_rows:
+            yield chunk
+            chunk, rows = {}, 0
+        chunk[key] = frame
+        rows += len(frame)
+    if chunk:
+        yield chunk
+
+
+def parse_query(query: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fill in defaults and convert query parameters to the types filter_data takes.
+
+    Raises:
+        ValueError: If a parameter is unknown or not a valid number.
+    """
+    unknown = set(query).difference(QUERY_DEFAULTS)
+    if unknown:
+        raise ValueError(
+            f"Unknown query parameters: {', '.join(sorted(unknown))}. "
+            f"Choose from: {', '.join(QUERY_DEFAULTS)}"
+        )
+
+    parsed = dict(QUERY_DEFAULTS)
+    for key, value in query.items():
+        try:
+            parsed[key] = type(QUERY_DEFAULTS[key])(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid value for {key}: {value!r}")
+    return parsed
+
+
+def query_key(
+    batting_team: str,
+    bowling_team: str,
+    start_over: int,
+    end_over: int,
+    num_matches: int,
+    match_order: str,
+) -> Tuple:
+    """
+    Normalized form of a query: queries with the same key select the same overs.
+
+    Team names are lower-cased and the over range is clamped to 1-50, the way
+    filter_data matches and clamps them. The match order only matters when a
+    number of matches is asked for.
+    """
+    if start_over <= end_over:
+        start_over, end_over = max(start_over, 1), min(end_over, 50)
+    return (
+        batting_team.lower(),
+        None if bowling_team == "None" else bowling_team.lower(),
+        start_over,
+        end_over,
+        num_matches,
+        None if num_matches == -1 else match_order,
+    )
+
+
+class QueryCache:
+    """
+    Bounded least-recently-used cache of query results that expire after a TTL.
+
+    Safe to share between threads. Hits and misses are counted for ``stats``.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = 300.0):
+        """
+        Args:
+            max_size (int): Most results to keep. 0 disables the cache.
+            ttl (Optional[float]): Seconds a result stays valid, or None to
+                keep results until they are evicted.
+        """
+        if max_size < 0:
+            raise ValueError("max_size must be at least 0")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None:
+                if time.monotonic() - entry[0] > self.ttl:
+                    del self._entries[key]
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any):
+        if self.max_size == 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+            }
+
+
+def load_query_data(
+    model_path: str, data_path: str, predictions_path: str
+) -> Tuple[pd.DataFrame, Any]:
+    """
+    Load the data to query and the model to predict with.
+
+    Returns:
+        Tuple[pd.DataFrame, Any]: The prediction table and None when the table
+        matches the model and data, otherwise the data and the loaded model.
+    """
+    table = load_prediction_table(model_path, data_path, predictions_path)
+    if table is not None:
+        return table, None
+
+    logging.info(f"Loading data from {data_path}")
+    df = read_data(data_path)
+    logging.info(f"Loading model from {model_path}")
+    return df, load_model(model_path)
+
+
+def load_prediction_table(
+    model_path: str, data_path: str, predictions_path: str
+) -> Optional[pd.DataFrame]:
+    """
+    Load the precomputed prediction table if it was built from this model and data.
+
+    The table's metadata file, next to it with a .json suffix, records the
+    hashes of the model and data files it was computed from.
+
+    Returns:
+        Optional[pd.DataFrame]: The table, or None when it is missing or stale
+        and predictions have to be made live.
+    """
+    import pandas as pd
+
+    metadata_path = prediction_metadata_path(predictions_path)
+    paths = [model_path, data_path, predictions_path, metadata_path]
+    if not all(os.path.exists(path) for path in paths):
+        logging.info("No prediction table found - predicting live")
+        return None
+
+    with open(metadata_path, "r") as f:
+        metadata = json.load(f)
+    hashes = prediction_table_hashes(model_path, data_path)
+    if any(metadata.get(key) != value for key, value in hashes.items()):
+        logging.warning(
+            f"Prediction table {predictions_path} does not match the model and "
+            "data - predicting live"
+        )
+        return None
+
+    logging.info(f"Looking predictions up from {predictions_path}")
+    table = pd.read_parquet(predictions_path)
+    missing_columns = set(PREDICTION_TABLE_COLUMNS).difference(table.columns)
+    if missing_columns:
+        logging.warning(
+            f"Prediction table is missing columns {sorted(missing_columns)} - "
+            "predicting live"
+        )
+        return None
+    return table
+
+
+def prediction_metadata_path(predictions_path: str) -> str:
+    return os.path.splitext(predictions_path)[0] + ".json"
+
+
+def prediction_table_hashes(model_path: str, data_path: str) -> Dict[str, str]:
+    """
+    Hashes identifying the model and data a prediction table is computed from.
+    """
+    records = load_file_records(data_path)
+    return {
+        "model_sha256": file_hash(model_path, records),
+        "data_sha256": file_hash(data_path, records),
+    }
+
+
+def file_hash(path: str, records: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    """
+    SHA-256 of a file's contents.
+
+    A hash recorded in ``records`` under the file's name is used as long as
+    the file still has the size and modification time recorded with it, so
+    an unchanged model package is not read to be hashed on every start.
+    Otherwise the hash is computed, and remembered for the file's size and
+    modification time, as the data file is checked against both its metadata
+    and the prediction table.
+    """
+    stat = os.stat(path)
+    record = (records or {}).get(os.path.basename(path), {})
+    if (record.get("size"), record.get("mtime_ns")) == (stat.st_size, stat.st_mtime_ns):
+        return record["sha256"]
+    return hash_file_contents(path, stat.st_size, stat.st_mtime_ns)
+
+
+def file_record(path: str) -> Dict[str, Any]:
+    """
+    The size, modification time and hash of a file, as ``file_hash`` reads them.
+    """
+    stat = os.stat(path)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": hash_file_contents(path, stat.st_size, stat.st_mtime_ns),
+    }
+
+
+@functools.lru_cache(maxsize=16)
+def hash_file_contents(path: str, size: int, mtime_ns: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def data_metadata_path(data_path: str) -> str:
+    return os.path.splitext(data_path)[0] + "_metadata.json"
+
+
+def build_data_metadata(
+    df: pd.DataFrame, data_path: str, hashed_paths: Sequence[str] = ()
+) -> Dict[str, Any]:
+    """
+    Describe the dataset for validating queries without loading it.
+
+    Args:
+        df (pd.DataFrame): The data.
+        data_path (str): Path of the data file.
+        hashed_paths (Sequence[str]): Other files of the model package, such
+            as the model, whose hashes are recorded alongside the data's.
+
+    Returns:
+        Dict[str, Any]: The hash of the data file, the ``file_record`` of it and
+        of ``hashed_paths`` by file name, and, for each batting team in order
+        of first appearance, the sorted opponents it played.
+    """
+    opponents = df.groupby("team", sort=False)["opponent"].unique()
+    records = {
+        os.path.basename(path): file_record(path)
+        for path in [data_path, *hashed_paths]
+    }
+    return {
+        "data_sha256": records[os.path.basename(data_path)]["sha256"],
+        "files": records,
+        "teams": {team: sorted(values) for team, values in opponents.items()},
+    }
+
+
+def load_file_records(data_path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    The file records of the metadata file next to the data, if there is one.
+    """
+    metadata_path = data_metadata_path(data_path)
+    if not os.path.exists(metadata_path):
+        return {}
+    with open(metadata_path, "r") as f:
+        return json.load(f).get("files", {})
+
+
+def load_data_metadata(data_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Load the metadata file next to the data, if it describes the data file.
+    """
+    metadata_path = data_metadata_path(data_path)
+    if not (os.path.exists(metadata_path) and os.path.exists(data_path)):
+        return None
+
+    with open(metadata_path, "r") as f:
+        metadata = json.load(f)
+    if metadata.get("data_sha256") != file_hash(data_path, metadata.get("files")):
+        logging.warning(f"{metadata_path} does not match {data_path} - ignoring it")
+        return None
+    return metadata
+
+
+def validate_query(
+    metadata: Dict[str, Any],
+    batting_team: str,
+    bowling_team: str,
+    start_over: int,
+    end_over: int,
+    num_matches: int,
+):
+    """
+    Raise the errors filter_data would for a query, checking only the metadata.
+
+    Raises:
+        typer.BadParameter: If a team or opponent is unknown, the over range is
+            empty or the number of matches is invalid.
+    """
+    teams: Dict[str, List[str]] = metadata["teams"]
+    matching = [team for team in teams if team.lower() == batting_team.lower()]
+    if not matching:
+        raise unknown_team_error(batting_team, teams)
+
+    if bowling_team != "None":
+        opponents = {opponent for team in matching for opponent in teams[team]}
+        if bowling_team.lower() not in map(str.lower, opponents):
+            raise unknown_opponent_error(bowling_team, matching[0], opponents)
+
+    if start_over > end_over:
+        raise typer.BadParameter("Start over must be less than or equal to end over")
+    if num_matches != -1 and num_matches < 1:
+        raise typer.BadParameter("Number of matches must be at least 1.")
 
 
 def load_model(model_path: str):
     """
     Load the trained model. Raises a ValueError if the model path is invalid.
+
+    A .npz file is a forest flattened by train.py. Its node arrays are mapped
+    read-only from the file, without sklearn, so loading is quick and server
+    processes share them. Any other file is unpickled with joblib.
     """
     if not os.path.exists(model_path):
         raise typer.BadParameter(
@@ -103,6 +591,13 @@ def load_model(model_path: str):
         )
 
     try:
+        if model_path.endswith(".npz"):
+            from forest import FlatForest
+
+            return FlatForest.load(model_path)
+
+        import joblib
+
         return joblib.load(model_path)
     except Exception as e:
         raise ValueError(f"Failed to load model from {model_path}. Error: {e}")
@@ -124,6 +619,24 @@ def load_data(
         FileNotFoundError: If the data file does not exist.
         ValueError: If the dataset is empty or missing critical columns.
     """
+    index = QueryIndex(read_data(data_path))
+    return filter_data(
+        index,
+        batting_team=batting_team,
+        bowling_team=bowling_team,
+        start_over=start_over,
+        end_over=end_over,
+        num_matches=num_matches,
+        match_order=match_order,
+    )
+
+
+def read_data(data_path: str) -> pd.DataFrame:
+    """
+    Load the dataset and check it has the columns queries need.
+    """
+    import pandas as pd
+
     # Validate data file existence
     if not os.path.exists(data_path):
         raise typer.BadParameter(
@@ -139,75 +652,164 @@ def load_data(
         )
 
     # Validate required columns
-    required_columns = [
-        "matchid",
-        "team",
-        "opponent",
-        "over_num",
-        "initial_batter",
-        "initial_bowler",
-        "num_batsmen",
-        "num_bowlers",
-        "num_deliveries",
-        "remaining_wickets",
-        "remaining_overs",
-    ]
-    missing_columns = [col for col in required_columns if col not in df.columns]
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
     if missing_columns:
         raise typer.BadParameter(
             f"Dataset is missing required columns: {', '.join(missing_columns)}"
         )
 
-    # Apply filters
-    try:
-        df = validate_and_filter_team(df, batting_team)
-        df = validate_and_filter_opponent(df, bowling_team)
-        df = filter_by_overs(df, start_over, end_over)
-        df = filter_by_recent_matches(df, num_matches, match_order)
-    except ValueError as e:
-        raise typer.BadParameter(str(e))
+    return df
 
-    # Validate non-empty dataset after filtering
-    if df.empty:
-        raise typer.BadParameter(
-            "No data available after applying filters. Please check your inputs."
-        )
 
-    return df
+class QueryIndex:
+    """
+    Row positions of the dataset grouped for query filtering.
+
+    Built once when the data is loaded. Rows are grouped by lower-cased batting
+    team, and by lower-cased batting team and opponent, and sorted by date,
+    match and over within each group. A query's team and opponent filter is
+    then a slice of one grouping, and its over range and most recent matches
+    are found within that slice instead of by scanning every row.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        import numpy as np
+        import pandas as pd
+
+        self.df = df
+        self.teams = sorted(df["team"].unique())
+
+        team = df["team"].str.lower().to_numpy()
+        opponent = df["opponent"].str.lower().to_numpy()
+        if "date" in df.columns:
+            date = pd.factorize(df["date"], sort=True)[0]
+        else:
+            date = np.zeros(len(df), dtype=np.int64)
+        matchid = df["matchid"].to_numpy()
+        over_num = df["over_num"].to_numpy()
 
+        self.by_team = RowGroups([team], date, matchid, over_num)
+        self.by_pair = RowGroups([team, opponent], date, matchid, over_num)
 
-def validate_and_filter_team(df: pd.DataFrame, filter_team: str) -> pd.DataFrame:
+
+class RowGroups:
     """
-    Validate the team and filter the dataset.
+    Row positions sorted by key, date, match and over, with each key's range.
     """
-    valid_teams = df.team.unique()
-    if filter_team.lower() not in map(str.lower, valid_teams):
-        valid_teams_str = ", ".join(sorted(valid_teams))
-        raise typer.BadParameter(
-            f"Batting team '{filter_team}' not found. Please choose from: {valid_teams_str}"
-        )
-    return df.loc[df["team"].str.lower() == filter_team.lower()]
+
+    def __init__(
+        self,
+        keys: List[np.ndarray],
+        date: np.ndarray,
+        matchid: np.ndarray,
+        over_num: np.ndarray,
+    ):
+        import numpy as np
+        import pandas as pd
+
+        key_codes = [pd.factorize(key)[0] for key in keys]
+        # np.lexsort sorts by its last key first
+        self.rows = np.lexsort([over_num, matchid, date] + key_codes[::-1])
+        self.matchid = matchid[self.rows]
+        self.over_num = over_num[self.rows]
+
+        sorted_keys = [key[self.rows] for key in keys]
+        changed = np.zeros(len(self.rows), dtype=bool)
+        changed[:1] = True
+        for key in sorted_keys:
+            changed[1:] |= key[1:] != key[:-1]
+        starts = np.flatnonzero(changed)
+        stops = np.append(starts[1:], len(self.rows))
+        self.ranges: Dict[Tuple[str, ...], Tuple[int, int]] = {
+            tuple(key[start] for key in sorted_keys): (start, stop)
+            for start, stop in zip(starts, stops)
+        }
 
 
-def validate_and_filter_opponent(df: pd.DataFrame, bowling_team: str) -> pd.DataFrame:
+def filter_data(
+    index: QueryIndex,
+    batting_team: str,
+    bowling_team: str,
+    start_over: int,
+    end_over: int,
+    num_matches: int,
+    match_order: str,
+) -> pd.DataFrame:
     """
-    Validate the opponent and filter the dataset.
+    Select the overs a query asks for, in dataset order.
+
+    Matches played on the same date are ordered by match id when picking the
+    oldest or newest ones.
+
+    Raises:
+        typer.BadParameter: If a filter is invalid or no overs are left.
     """
+    import numpy as np
+
+    team = batting_team.lower()
+    if (team,) not in index.by_team.ranges:
+        raise unknown_team_error(batting_team, index.teams)
+
     if bowling_team == "None":
-        return df
+        groups = index.by_team
+        start, stop = groups.ranges[(team,)]
+    else:
+        groups = index.by_pair
+        if (team, bowling_team.lower()) not in groups.ranges:
+            raise_unknown_opponent(index, team, bowling_team)
+        start, stop = groups.ranges[(team, bowling_team.lower())]
+
+    start_over, end_over = validate_over_range(start_over, end_over)
+    over_num = groups.over_num[start:stop]
+    in_range = (over_num >= start_over) & (over_num <= end_over)
+    rows = groups.rows[start:stop][in_range]
+    matchids = groups.matchid[start:stop][in_range]
+
+    rows = select_recent_matches(rows, matchids, num_matches, match_order)
 
-    valid_opponents = df.opponent.unique()
-    if bowling_team.lower() not in map(str.lower, valid_opponents):
-        valid_opponents_str = ", ".join(sorted(valid_opponents))
+    # Validate non-empty dataset after filtering
+    if len(rows) == 0:
         raise typer.BadParameter(
-            f"Bowling team '{bowling_team}' never played {df.iloc[0]['team']}. Please choose from: {valid_opponents_str}"
+            "No data available after applying filters. Please check your inputs."
         )
-    return df.loc[df["opponent"].str.lower() == bowling_team.lower()]
+
+    return index.df.iloc[np.sort(rows)]
+
+
+def raise_unknown_opponent(index: QueryIndex, team: str, bowling_team: str):
+    """
+    Raise the error for an opponent the batting team never played.
+    """
+    import numpy as np
+
+    start, stop = index.by_team.ranges[(team,)]
+    team_df = index.df.iloc[np.sort(index.by_team.rows[start:stop])]
+    raise unknown_opponent_error(
+        bowling_team, team_df.iloc[0]["team"], team_df.opponent.unique()
+    )
+
+
+def unknown_team_error(
+    batting_team: str, valid_teams: Iterable[str]
+) -> typer.BadParameter:
+    valid_teams_str = ", ".join(sorted(valid_teams))
+    return typer.BadParameter(
+        f"Batting team '{batting_team}' not found. Please choose from: {valid_teams_str}"
+    )
+
+
+def unknown_opponent_error(
+    bowling_team: str, team: str, valid_opponents: Iterable[str]
+) -> typer.BadParameter:
+    valid_opponents_str = ", ".join(sorted(valid_opponents))
+    return typer.BadParameter(
+        f"Bowling team '{bowling_team}' never played {team}. Please choose from: {valid_opponents_str}"
+    )
 
 
-def filter_by_overs(df: pd.DataFrame, start_over: int, end_over: int) -> pd.DataFrame:
+def validate_over_range(start_over: int, end_over: int) -> Tuple[int, int]:
     """
-    Filter the dataset by the specified over range.
+    Validate the over range and clamp it to the overs of a match.
     """
     if start_over > end_over:
         raise typer.BadParameter("Start over must be less than or equal to end over")
@@ -218,37 +820,44 @@ def filter_by_overs(df: pd.DataFrame, start_over: int, end_over: int) -> pd.Data
         logging.warning("End over cannot be greater than 50. Adjusting to 50.")
         end_over = 50
 
-    return df.loc[(df["over_num"] >= start_over) & (df["over_num"] <= end_over)]
+    return start_over, end_over
 
 
-def filter_by_recent_matches(
-    df: pd.DataFrame, num_matches: int, match_order: str
-) -> pd.DataFrame:
+def select_recent_matches(
+    rows: np.ndarray, matchids: np.ndarray, num_matches: int, match_order: str
+) -> np.ndarray:
     """
-    Filter the dataset to the most recent matches.
+    Keep the rows of the oldest or newest matches.
+
+    ``rows`` are sorted by date and match, so the rows of each match are
+    contiguous and the selected matches are a prefix or suffix of them.
     """
+    import numpy as np
+
     if num_matches == -1:
-        return df
+        return rows
 
     if num_matches < 1:
         raise typer.BadParameter("Number of matches must be at least 1.")
-    unique_matches = df["matchid"].unique()
-    if len(unique_matches) >= num_matches:
+    match_starts = np.flatnonzero(np.diff(matchids, prepend=-1) != 0)
+    if len(match_starts) >= num_matches:
 
         if match_order not in ["oldest", "newest"]:
             raise typer.BadParameter(
                 f"match-order must be oldest or newest, not {match_order}"
             )
 
-        asc = match_order == "oldest"
-
-        most_recent_matches = df.sort_values("date", ascending=asc)["matchid"].unique()[
-            :num_matches
-        ]
-
-        df = df[df["matchid"].isin(most_recent_matches)]
+        if match_order == "oldest":
+            stop = (
+                match_starts[num_matches]
+                if num_matches < len(match_starts)
+                else len(rows)
+            )
+            rows = rows[:stop]
+        else:
+            rows = rows[match_starts[-num_matches] :]
         logging.info(f"Filtered to the most recent {num_matches} matches.")
-    return df
+    return rows
 
 
 if __name__ == "__main__":
@@ -1,5 +1,5 @@
 # Define paths
-MODEL_PATH="expected_runs_model.pkl"
+MODEL_PATH="expected_runs_model.npz"
 DATA_PATH="data.parquet"
 TEAM="Ireland"
 OVERS=5
@@ -0,0 +1,203 @@
+import json
+import logging
+import os
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Union
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import typer
+
+from run_model import (
+    QueryCache,
+    QueryIndex,
+    filter_data,
+    load_query_data,
+    parse_query,
+    predict,
+    query_key,
+    script_folder,
+)
+
+# Initialize Typer app
+app = typer.Typer()
+
+
+class ThreadingUnixHTTPServer(
+    socketserver.ThreadingMixIn, socketserver.UnixStreamServer
+):
+    """
+    HTTP server on a Unix socket, answering each connection in its own thread.
+    """
+
+    daemon_threads = True
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """
+    Answer run_model queries from the model and dataset index the server holds.
+
+    ``GET /predict?batting_team=India&end_over=10`` or ``POST /predict`` with a
+    JSON object of the same parameters returns the predictions as JSON.
+    Responses are cached by normalized query. ``GET /health`` reports the
+    server is ready and ``GET /stats`` returns the cache hit and miss counts.
+    """
+
+    # Keep connections open for clients sending many queries
+    protocol_version = "HTTP/1.1"
+
+    # Buffer each response so headers and body leave in one write. Separate
+    # small writes on a kept-alive connection stall on delayed ACKs.
+    wbufsize = -1
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            self.send_json(200, {"status": "ok", "rows": len(self.server.index.df)})
+        elif url.path == "/stats":
+            self.send_json(200, {"cache": self.server.cache.stats()})
+        elif url.path == "/predict":
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            self.answer(query)
+        else:
+            self.send_json(404, {"error": f"Unknown path: {url.path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if url.path != "/predict":
+            self.send_json(404, {"error": f"Unknown path: {url.path}"})
+            return
+        try:
+            query = json.loads(body or b"{}")
+        except json.JSONDecodeError as e:
+            self.send_json(400, {"error": f"Invalid JSON: {e}"})
+            return
+        if not isinstance(query, dict):
+            self.send_json(400, {"error": "Query must be a JSON object"})
+            return
+        self.answer(query)
+
+    def answer(self, query: Dict[str, Any]):
+        try:
+            query = parse_query(query)
+            key = query_key(**query)
+            body = self.server.cache.get(key)
+            if body is None:
+                data_filtered = filter_data(self.server.index, **query)
+                result = predict(self.server.model, data_filtered)
+                records = result.to_json(orient="records", date_format="iso")
+                body = f'{{"predictions": {records}}}'.encode()
+                self.server.cache.put(key, body)
+        except (typer.BadParameter, ValueError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+
+        self.send_body(200, body)
+
+    def send_json(self, status: int, payload: Dict[str, Any]):
+        self.send_body(status, json.dumps(payload).encode())
+
+    def send_body(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Per-request access logs would dominate the latency of small queries
+        logging.debug(format, *args)
+
+
+def make_server(
+    model_obj,
+    data: pd.DataFrame,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    socket_path: Optional[str] = None,
+    cache_size: int = 1024,
+    cache_ttl: Optional[float] = 300.0,
+) -> Union[ThreadingHTTPServer, ThreadingUnixHTTPServer]:
+    """
+    Create a threaded server answering queries against ``model_obj`` and ``data``.
+
+    Args:
+        model_obj: Trained model, or None to look predictions up from ``data``.
+        data (pd.DataFrame): Dataset as returned by ``read_data``, or the
+            prediction table.
+        host (str): Interface to listen on.
+        port (int): TCP port to listen on, or 0 for any free port.
+        socket_path (Optional[str]): Listen on this Unix socket instead of TCP.
+        cache_size (int): Most responses to cache. 0 disables the cache.
+        cache_ttl (Optional[float]): Seconds a cached response stays valid, or
+            None to keep responses until they are evicted.
+
+    Returns:
+        Union[ThreadingHTTPServer, ThreadingUnixHTTPServer]: The bound server.
+    """
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, PredictionHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), PredictionHandler)
+        server.daemon_threads = True
+
+    # The forest is trained with verbose=1, which would log every prediction
+    if hasattr(model_obj, "verbose"):
+        model_obj.verbose = 0
+
+    server.model = model_obj
+    server.index = QueryIndex(data)
+    server.cache = QueryCache(cache_size, cache_ttl)
+    return server
+
+
+@app.command()
+def main(
+    model: str = typer.Option(
+        os.path.join(script_folder, "expected_runs_model.npz"),
+        help="Path to the trained model file",
+    ),
+    data: str = typer.Option(
+        os.path.join(script_folder, "data.parquet"),
+        help="Path to the input data file",
+    ),
+    predictions: str = typer.Option(
+        os.path.join(script_folder, "predictions.parquet"),
+        help="Precomputed prediction table, used when it matches the model and data",
+    ),
+    host: str = typer.Option("127.0.0.1", help="Interface to listen on"),
+    port: int = typer.Option(8000, help="TCP port to listen on"),
+    socket_path: str = typer.Option(
+        None, "--socket", help="Listen on this Unix socket instead of TCP"
+    ),
+    cache_size: int = typer.Option(
+        1024, help="Most query results to cache (0 disables the cache)"
+    ),
+    cache_ttl: float = typer.Option(
+        300.0, help="Seconds a cached result stays valid (0 for no expiry)"
+    ),
+):
+    """
+    Serve run_model predictions over HTTP, loading the model and data once.
+    """
+    df, model_obj = load_query_data(model, data, predictions)
+    server = make_server(
+        model_obj, df, host, port, socket_path, cache_size, cache_ttl or None
+    )
+    logging.info(f"Serving predictions on {socket_path or f'http://{host}:{port}'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Shutting down")
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,238 @@
+import json
+import math
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import fastparquet
+import numpy as np
+import pandas as pd
+
+# Schema type -> array typecode for fixed-width numeric columns
+NUMERIC_TYPECODES: Dict[str, str] = {
+    "int8": "b",
+    "int16": "h",
+    "int32": "i",
+    "int64": "q",
+    "float32": "f",
+    "float64": "d",
+}
+DICTIONARY: str = "dictionary"
+
+# Number of records per parquet row group when writing incrementally
+DEFAULT_ROW_GROUP_SIZE: int = 500_000
+
+
+class ColumnarBuilder:
+    """
+    Accumulate JSON records straight into typed, per-column buffers.
+
+    Numeric columns are appended to fixed-width ``array.array`` buffers and
+    string columns are dictionary encoded (one int32 code per row plus a
+    shared list of distinct values), so no boxed Python objects are kept per
+    row and the resulting DataFrame needs no dtype inference.
+
+    Dictionaries are append-only and survive ``clear``: codes written in an
+    earlier row group stay valid against the categories of any later one.
+
+    Float columns store missing values as NaN and dictionary columns as a
+    missing category. Integer columns need a value in every record: a record
+    without one is rejected, where ``json_normalize`` turned the whole column
+    into floats. A nullable column could not be appended to the row groups
+    already written without one, so declare a float column for values that
+    may be missing.
+    """
+
+    def __init__(self, schema: Dict[str, str]) -> None:
+        """
+        Args:
+            schema (Dict[str, str]): Ordered mapping of column name to type, one of
+                the keys of ``NUMERIC_TYPECODES`` or ``"dictionary"``.
+        """
+        unknown = {
+            name: kind
+            for name, kind in schema.items()
+            if kind != DICTIONARY and kind not in NUMERIC_TYPECODES
+        }
+        if unknown:
+            raise ValueError(f"Unsupported column types in schema: {unknown}")
+
+        self.schema: Dict[str, str] = dict(schema)
+        self._values: Dict[str, List[Any]] = {}
+        self._lookup: Dict[str, Dict[Any, int]] = {}
+        for name, kind in self.schema.items():
+            if kind == DICTIONARY:
+                self._values[name] = []
+                self._lookup[name] = {}
+        self.clear()
+
+    def clear(self) -> None:
+        """
+        Drop the buffered rows, keeping the string dictionaries.
+        """
+        self._num_rows = 0
+        self._buffers: Dict[str, array] = {
+            name: array("i" if kind == DICTIONARY else NUMERIC_TYPECODES[kind])
+            for name, kind in self.schema.items()
+        }
+        self._appenders: List[Callable[[Any], None]] = [
+            self._make_appender(name) for name in self.schema
+        ]
+
+    def _make_appender(self, name: str) -> Callable[[Any], None]:
+        kind = self.schema[name]
+        buffer = self._buffers[name]
+
+        if kind == DICTIONARY:
+            values = self._values[name]
+            lookup = self._lookup[name]
+
+            def append_code(value: Any) -> None:
+                if value is None:
+                    buffer.append(-1)
+                    return
+                code = lookup.get(value)
+                if code is None:
+                    code = lookup[value] = len(values)
+                    values.append(value)
+                buffer.append(code)
+
+            return append_code
+
+        if kind.startswith("float"):
+            return lambda value: buffer.append(
+                math.nan if value is None else float(value)
+            )
+
+        return buffer.append
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """
+        Append one record, taking ``None`` for any column it does not have.
+        """
+        name: Optional[str] = None
+        try:
+            for name, append in zip(self.schema, self._appenders):
+                append(record.get(name))
+        except (TypeError, ValueError, OverflowError) as e:
+            # Roll back the partially appended row so every column stays aligned
+            for buffer in self._buffers.values():
+                if len(buffer) > self._num_rows:
+                    buffer.pop()
+            if record.get(name) is None:
+                raise ValueError(
+                    f"Missing value for {self.schema[name]} column '{name}': "
+                    "integer columns need a value in every record"
+                ) from e
+            raise ValueError(
+                f"Invalid value {record.get(name)!r} for {self.schema[name]} "
+                f"column '{name}'"
+            ) from e
+        self._num_rows += 1
+
+    def __len__(self) -> int:
+        return self._num_rows
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Build a DataFrame over the buffered rows without copying numeric data.
+        """
+        columns: Dict[str, Any] = {}
+        for name, kind in self.schema.items():
+            buffer = self._buffers[name]
+            if kind == DICTIONARY:
+                columns[name] = pd.Categorical.from_codes(
+                    np.frombuffer(buffer, dtype=np.int32),
+                    categories=pd.Index(self._values[name], dtype=object),
+                )
+            else:
+                columns[name] = np.frombuffer(buffer, dtype=kind)
+        return pd.DataFrame(columns)
+
+
+class ParquetRowGroupWriter:
+    """
+    Write successive DataFrames as row groups of a single parquet file.
+
+    Frames written here are expected to come from one ``ColumnarBuilder``,
+    so the categories of each frame extend those of the previous one.
+    """
+
+    def __init__(self, output_file: str) -> None:
+        self.output_file: str = output_file
+        self.num_rows: int = 0
+        self._last_frame: Optional[pd.DataFrame] = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        """
+        Append ``df`` to the file as a new row group.
+        """
+        fastparquet.write(
+            self.output_file,
+            df,
+            write_index=False,
+            append=self._last_frame is not None,
+            object_encoding="utf8",
+            # Same codec as DataFrame.to_parquet; fastparquet cannot read back an
+            # uncompressed empty dictionary page (an all-null string column)
+            compression="SNAPPY",
+        )
+        self.num_rows += len(df)
+        self._last_frame = df
+
+    def close(self) -> None:
+        """
+        Record the final category counts in the file's pandas metadata.
+
+        fastparquet sizes the category codes on read from the metadata of the
+        first write, which would be too narrow once later row groups have
+        introduced more distinct values.
+        """
+        if self._last_frame is None:
+            return
+
+        pf = fastparquet.ParquetFile(self.output_file)
+        pandas_metadata = json.loads(pf.key_value_metadata["pandas"])
+        for column in pandas_metadata["columns"]:
+            if column["pandas_type"] != "categorical":
+                continue
+            codes = self._last_frame[column["name"]].cat.codes
+            column["metadata"]["num_categories"] = len(
+                self._last_frame[column["name"]].cat.categories
+            )
+            column["numpy_type"] = str(codes.dtype)
+
+        fastparquet.update_file_custom_metadata(
+            self.output_file, {"pandas": json.dumps(pandas_metadata)}
+        )
+
+
+def write_records(
+    records: Iterable[Dict[str, Any]],
+    schema: Dict[str, str],
+    output_file: str,
+    row_group_size: int,
+) -> int:
+    """
+    Write records to a parquet file, one row group per ``row_group_size`` rows.
+
+    Only one row group is buffered at a time, so memory stays bounded however
+    many records the iterable yields.
+
+    Returns:
+        int: Number of records written.
+    """
+    if row_group_size < 1:
+        raise ValueError("row_group_size must be at least 1")
+
+    builder = ColumnarBuilder(schema)
+    writer = ParquetRowGroupWriter(output_file)
+    for record in records:
+        builder.append(record)
+        if len(builder) == row_group_size:
+            writer.write(builder.to_frame())
+            builder.clear()
+
+    if len(builder) or not writer.num_rows:
+        writer.write(builder.to_frame())
+    writer.close()
+    return writer.num_rows
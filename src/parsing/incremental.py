@@ -0,0 +1,67 @@
+import os
+from typing import Any, Dict, Iterable, Iterator, Set, Tuple
+
+import tqdm
+
+from columnar import DEFAULT_ROW_GROUP_SIZE, write_records
+from json_stream import iter_json_array
+from parquet_dataset import (
+    KEY_COLUMN,
+    next_part_file,
+    open_appendable_dataset,
+    register_part,
+)
+
+
+def ingest_new_matches(
+    input_file: str,
+    output_path: str,
+    schema: Dict[str, str],
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    desc: str = "Ingesting new matches",
+) -> Tuple[int, Set[int]]:
+    """
+    Append the records of not-yet-ingested matches to a parquet dataset.
+
+    The JSON array is streamed and every record whose ``matchid`` is already
+    listed in the dataset manifest is skipped, so only unseen matches are
+    converted and written, as one new part file. ``input_file`` can be the
+    full history or a file holding just the latest matches.
+
+    Args:
+        input_file (str): Path to the JSON array of flat records.
+        output_path (str): Dataset directory to append to. A single parquet
+            file from a full run is converted into the first part.
+        schema (Dict[str, str]): ``ColumnarBuilder`` schema of the output.
+        row_group_size (int): Number of records per row group of the new part.
+        desc (str): Progress bar label.
+
+    Returns:
+        Tuple[int, Set[int]]: Number of records appended and the new match ids.
+    """
+    manifest = open_appendable_dataset(output_path)
+    manifest.setdefault("schema", schema)
+    manifest["source"] = os.path.basename(input_file)
+
+    known: Set[int] = set(manifest["matchids"])
+    new_matchids: Set[int] = set()
+
+    def unseen(records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for record in records:
+            matchid = record.get(KEY_COLUMN)
+            if matchid in known:
+                continue
+            new_matchids.add(matchid)
+            yield record
+
+    part_file = next_part_file(output_path, manifest)
+    with open(input_file, "r") as f:
+        records = tqdm.tqdm(iter_json_array(f), desc=desc, unit="records")
+        num_rows = write_records(unseen(records), schema, part_file, row_group_size)
+
+    if not new_matchids:
+        os.remove(part_file)
+        return 0, new_matchids
+
+    register_part(output_path, manifest, part_file, num_rows, new_matchids)
+    return num_rows, new_matchids
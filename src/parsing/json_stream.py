@@ -0,0 +1,247 @@
+import codecs
+import json
+import os
+import re
+from typing import Any, BinaryIO, Iterator, List, Optional, TextIO, Tuple
+
+# Number of characters read from disk per refill of the decode buffer
+DEFAULT_CHUNK_SIZE: int = 1 << 20
+
+_WHITESPACE: str = " \t\n\r"
+
+# The gap between two consecutive records of an array of flat JSON objects.
+# The same bytes may also appear inside a string value.
+_RECORD_GAP = re.compile(rb"\}\s*,\s*\{")
+
+# Records decoded from a candidate gap before it is taken as a record boundary
+_CONFIRM_RECORDS: int = 8
+
+
+def iter_json_array(
+    file: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[Any]:
+    """
+    Lazily yield the elements of a top-level JSON array, one at a time.
+
+    Only the element currently being decoded (plus at most one chunk of
+    look-ahead) is held in memory, so memory use is independent of the
+    size of the file.
+
+    Args:
+        file (TextIO): Open text file positioned at the start of the array.
+        chunk_size (int): Number of characters to read per refill.
+
+    Raises:
+        ValueError: If the file does not contain a JSON array.
+        json.JSONDecodeError: If an element cannot be decoded.
+    """
+    return _iter_elements(file, chunk_size, in_array=False)
+
+
+def iter_json_array_range(
+    path: str, start: int, end: int, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[Any]:
+    """
+    Lazily yield the array elements stored in bytes ``[start, end)`` of a file.
+
+    The range must begin at the first byte of a record, as returned by
+    ``find_record_boundaries``.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        reader = codecs.getreader("utf-8")(_ByteRange(f, end - start))
+        yield from _iter_elements(reader, chunk_size, in_array=True)
+
+
+def find_record_boundaries(path: str, num_shards: int) -> List[Tuple[int, int]]:
+    """
+    Split a JSON array of flat objects into byte ranges at record boundaries.
+
+    Each split point is found by seeking to an evenly spaced offset and
+    scanning forward to the next ``}, {`` gap between records, so the file
+    is never read in full. A gap is only taken once the records following
+    it decode, which skips gaps inside string values. Records must not
+    contain nested objects.
+
+    Args:
+        path (str): Path to the JSON file.
+        num_shards (int): Desired number of ranges. Fewer are returned for
+            files too small to split that many times.
+
+    Returns:
+        List[Tuple[int, int]]: Contiguous ``(start, end)`` byte ranges covering
+        every record of the array, in file order.
+    """
+    if num_shards < 1:
+        raise ValueError("num_shards must be at least 1")
+
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        first = _find_first_record(f)
+        if first is None:
+            return []
+
+        starts = [first]
+        for shard in range(1, num_shards):
+            target = first + (size - first) * shard // num_shards
+            boundary = _find_next_record(f, max(target, starts[-1] + 1))
+            if boundary is None:
+                break
+            if boundary > starts[-1]:
+                starts.append(boundary)
+
+    return list(zip(starts, starts[1:] + [size]))
+
+
+class _ByteRange:
+    """
+    Read-only view of ``length`` bytes of a binary file from its current position.
+    """
+
+    def __init__(self, file: BinaryIO, length: int) -> None:
+        self._file = file
+        self._remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+
+def _find_first_record(f: BinaryIO) -> Optional[int]:
+    f.seek(0)
+    head = f.read(DEFAULT_CHUNK_SIZE)
+    stripped = head.lstrip()
+    if not stripped.startswith(b"["):
+        raise ValueError("Expected a top-level JSON array")
+    body = stripped[1:].lstrip()
+    if not body or body.startswith(b"]"):
+        return None
+    return len(head) - len(body)
+
+
+def _find_next_record(f: BinaryIO, offset: int) -> Optional[int]:
+    # Overlap consecutive reads so a gap split across two blocks is still found
+    overlap = 4096
+    block_size = 1 << 16
+    while True:
+        f.seek(offset)
+        block = f.read(block_size)
+        for match in _RECORD_GAP.finditer(block):
+            candidate = offset + match.end() - 1
+            if _is_record_start(f, candidate):
+                return candidate
+        if len(block) < block_size:
+            return None
+        offset += block_size - overlap
+
+
+def _is_record_start(f: BinaryIO, offset: int) -> bool:
+    """
+    Whether the ``{`` at ``offset`` begins a record of the top-level array.
+
+    From a record boundary, ``_CONFIRM_RECORDS`` records decode one after the
+    other, each followed by a comma, or the array closes at the end of the
+    file. From a gap inside a string value, decoding soon runs into the
+    string's closing quote instead.
+    """
+    f.seek(offset)
+    reader = codecs.getreader("utf-8")(f)
+    decoder = json.JSONDecoder()
+    read_size = 1 << 16
+    text = reader.read(read_size)
+    pos = 0
+
+    def next_char() -> str:
+        nonlocal text, pos
+        while True:
+            while pos < len(text) and text[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(text):
+                return text[pos]
+            more = reader.read(read_size)
+            if not more:
+                return ""
+            text += more
+
+    for _ in range(_CONFIRM_RECORDS):
+        while True:
+            try:
+                _, pos = decoder.raw_decode(text, pos)
+                break
+            except json.JSONDecodeError:
+                # A record cut off by the end of the text is read further,
+                # up to a bound that no flat record comes near
+                more = reader.read(read_size)
+                if not more or len(text) >= DEFAULT_CHUNK_SIZE:
+                    return False
+                text += more
+
+        separator = next_char()
+        if separator == "]":
+            pos += 1
+            return next_char() == ""
+        if separator != ",":
+            return False
+        pos += 1
+        if next_char() != "{":
+            return False
+    return True
+
+
+def _iter_elements(file: TextIO, chunk_size: int, in_array: bool) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def refill() -> bool:
+        nonlocal buffer, pos, eof
+        chunk = file.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip(chars: str) -> None:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+            if pos < len(buffer) or not refill():
+                return
+
+    if not in_array:
+        skip(_WHITESPACE)
+        if pos >= len(buffer) or buffer[pos] != "[":
+            raise ValueError("Expected a top-level JSON array")
+        pos += 1
+
+    while True:
+        skip(_WHITESPACE + ",")
+        if pos >= len(buffer):
+            # A byte range may legitimately stop between two records
+            if in_array:
+                return
+            raise ValueError("Unterminated JSON array")
+        if buffer[pos] == "]":
+            return
+
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # The element is cut off by the end of the buffer - read more
+            if eof or not refill():
+                raise
+            continue
+
+        # A scalar ending exactly at the buffer boundary may be truncated
+        if end == len(buffer) and not eof and refill():
+            continue
+
+        pos = end
+        yield value
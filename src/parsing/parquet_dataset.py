@@ -0,0 +1,314 @@
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from glob import glob
+from typing import Any, Collection, Dict, Iterator, List, Optional, Set
+
+import fastparquet
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Manifest describing the part files of a multi-part parquet dataset
+MANIFEST_FILE: str = "_manifest.json"
+
+# Column every dataset of the pipeline is keyed and partitioned by
+KEY_COLUMN: str = "matchid"
+
+# Engine every dataset of the pipeline is written and read with. Parts carry
+# fastparquet's pandas metadata and dictionary encoding, which pyarrow reads
+# back as object columns instead of categoricals.
+PARQUET_ENGINE: str = "fastparquet"
+
+
+def read_parquet_dataset(
+    path: str,
+    columns: Optional[List[str]] = None,
+    matchids: Optional[Collection[int]] = None,
+) -> pd.DataFrame:
+    """
+    Read a parquet file or a multi-part parquet dataset directory.
+
+    Part files are read one at a time and concatenated in manifest order.
+    Categorical columns are merged with ``union_categoricals`` because each
+    part carries its own dictionary, which a plain ``pd.read_parquet`` on the
+    directory does not reconcile.
+
+    Args:
+        path (str): Path to a parquet file or dataset directory.
+        columns (Optional[List[str]]): Subset of columns to read.
+        matchids (Optional[Collection[int]]): Only return rows of these matches.
+            Parts whose manifest entry lists none of them are not read at all,
+            and the rows of other matches are dropped as each row group is
+            read.
+
+    Returns:
+        pd.DataFrame: The dataset, with a fresh RangeIndex.
+    """
+    read_columns = columns
+    if matchids is not None:
+        matchids = set(matchids)
+        if columns is not None and KEY_COLUMN not in columns:
+            read_columns = columns + [KEY_COLUMN]
+
+    if os.path.isdir(path):
+        entries = list_part_entries(path)
+        parts = [
+            os.path.join(path, part["file"])
+            for part in entries
+            if matchids is None
+            or "matchids" not in part
+            or not matchids.isdisjoint(part["matchids"])
+        ]
+        if not parts and entries:
+            # Still read one part so an empty result keeps the dataset's columns
+            parts = [os.path.join(path, entries[0]["file"])]
+        frames = [read_part(part, read_columns, matchids) for part in parts]
+        if not frames:
+            if matchids is None:
+                raise FileNotFoundError(f"No parquet parts found in {path}")
+            return pd.DataFrame(columns=columns)
+    else:
+        frames = [read_part(path, read_columns, matchids)]
+
+    df = concat_frames(frames)
+    return df[columns] if read_columns is not columns else df
+
+
+def read_part(
+    path: str, columns: Optional[List[str]], matchids: Optional[Set[int]]
+) -> pd.DataFrame:
+    """
+    Read one parquet file, keeping only the rows of ``matchids`` if given.
+
+    Row groups whose statistics rule out every match are skipped and the rest
+    are filtered one at a time, so at most one row group of other matches is
+    held in memory.
+    fastparquet's own ``row_filter`` is not used, as it loses values of
+    optional string columns.
+    """
+    if matchids is None:
+        return pd.read_parquet(path, columns=columns, engine=PARQUET_ENGINE)
+
+    parquet_file = fastparquet.ParquetFile(path)
+    filters = [(KEY_COLUMN, "in", sorted(matchids))]
+    frames = [
+        frame[frame[KEY_COLUMN].isin(matchids)]
+        for frame in parquet_file.iter_row_groups(filters=filters, columns=columns)
+    ]
+    if not frames:
+        # No row group holds the matches, but the file's columns are kept
+        return parquet_file.to_pandas(columns=columns, filters=filters)
+    return concat_frames(frames)
+
+
+def iter_parquet_dataset(
+    path: str, columns: Optional[List[str]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Read a parquet file or dataset directory one row group at a time.
+
+    Parts are read in manifest order and only one row group is held in memory
+    at once, so a dataset of any size can be streamed. Appended parts and the
+    row groups written by ``columnar.write_records`` bound the chunk size.
+
+    Args:
+        path (str): Path to a parquet file or dataset directory.
+        columns (Optional[List[str]]): Subset of columns to read.
+
+    Returns:
+        Iterator[pd.DataFrame]: One frame per non-empty row group.
+    """
+    parts = list_parts(path) if os.path.isdir(path) else [path]
+    if not parts:
+        raise FileNotFoundError(f"No parquet parts found in {path}")
+    for part in parts:
+        for frame in fastparquet.ParquetFile(part).iter_row_groups(columns=columns):
+            if len(frame):
+                yield frame.reset_index(drop=True)
+
+
+def concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate frames row-wise, keeping categorical columns categorical.
+    """
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+
+    columns: Dict[str, Any] = {}
+    for name in frames[0].columns:
+        parts = [frame[name] for frame in frames]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            columns[name] = union_categoricals(parts)
+        else:
+            columns[name] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def list_parts(path: str) -> List[str]:
+    """
+    List the part files of a dataset directory, in manifest order if present.
+    """
+    return [os.path.join(path, part["file"]) for part in list_part_entries(path)]
+
+
+def list_part_entries(path: str) -> List[Dict[str, Any]]:
+    """
+    List the manifest entries of a dataset directory's parts, in order.
+
+    Directories without a manifest are described by their sorted part files.
+    """
+    manifest = read_manifest(path)
+    if manifest is not None:
+        return manifest["parts"]
+    return [
+        {"file": os.path.basename(part)}
+        for part in sorted(glob(os.path.join(path, "part-*.parquet")))
+    ]
+
+
+def part_file_name(index: int) -> str:
+    return f"part-{index:05d}.parquet"
+
+
+def read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Load the manifest of a dataset directory, or None if it has none.
+    """
+    manifest_file = os.path.join(path, MANIFEST_FILE)
+    if not os.path.isfile(manifest_file):
+        return None
+    with open(manifest_file, "r") as f:
+        return json.load(f)
+
+
+def write_manifest(path: str, manifest: Dict[str, Any]) -> None:
+    """
+    Atomically replace the manifest of a dataset directory.
+    """
+    manifest_file = os.path.join(path, MANIFEST_FILE)
+    tmp_file = manifest_file + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_file, manifest_file)
+
+
+def prepare_output(path: str) -> None:
+    """
+    Remove a previous output at ``path``, whether a single file or a dataset.
+    """
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def open_appendable_dataset(path: str) -> Dict[str, Any]:
+    """
+    Load the manifest of a dataset that new parts will be appended to.
+
+    A missing output becomes an empty dataset, and a single parquet file
+    from a full run becomes the first part of one. The manifest's
+    ``matchids`` lists every match already accounted for, backfilled from
+    the data itself when an older manifest lacks it.
+
+    Returns:
+        Dict[str, Any]: The manifest, already written to disk.
+    """
+    if os.path.isfile(path):
+        tmp_file = path + ".tmp"
+        os.replace(path, tmp_file)
+        os.makedirs(path)
+        os.replace(tmp_file, os.path.join(path, part_file_name(0)))
+    os.makedirs(path, exist_ok=True)
+
+    manifest = read_manifest(path) or {"num_rows": 0, "parts": []}
+    if "matchids" not in manifest:
+        parts = list_part_entries(path)
+        for part in parts:
+            part_file = os.path.join(path, part["file"])
+            ids = pd.read_parquet(
+                part_file, columns=[KEY_COLUMN], engine=PARQUET_ENGINE
+            )
+            part["rows"] = len(ids)
+            part["matchids"] = sorted(int(i) for i in ids[KEY_COLUMN].unique())
+        manifest["parts"] = parts
+        manifest["num_rows"] = sum(part["rows"] for part in parts)
+        manifest["matchids"] = sorted(
+            {i for part in parts for i in part["matchids"]}
+        )
+        write_manifest(path, manifest)
+    return manifest
+
+
+def dataset_matchids(path: str) -> Set[int]:
+    """
+    Return the ids of the matches accounted for in a file or dataset.
+    """
+    if os.path.isdir(path):
+        manifest = read_manifest(path)
+        if manifest is not None and "matchids" in manifest:
+            return set(manifest["matchids"])
+    ids = read_parquet_dataset(path, columns=[KEY_COLUMN])
+    return {int(i) for i in ids[KEY_COLUMN].unique()}
+
+
+def next_part_file(path: str, manifest: Dict[str, Any]) -> str:
+    """
+    Path of the part file that the next appended part should be written to.
+    """
+    return os.path.join(path, part_file_name(len(manifest["parts"])))
+
+
+def register_part(
+    path: str,
+    manifest: Dict[str, Any],
+    part_file: Optional[str],
+    rows: int,
+    matchids: Collection[int],
+) -> None:
+    """
+    Record a newly written part, and the matches it accounts for, in the manifest.
+
+    ``matchids`` may include matches that contributed no rows (for example
+    ones dropped by a filter) so that they are not reconsidered next time.
+    Pass ``part_file=None`` when no rows were written at all.
+    """
+    matchids = sorted(int(i) for i in matchids)
+    if part_file is not None:
+        manifest["parts"].append(
+            {
+                "file": os.path.basename(part_file),
+                "rows": rows,
+                "matchids": matchids,
+                "appended_at": datetime.now(timezone.utc).isoformat(
+                    timespec="seconds"
+                ),
+            }
+        )
+        manifest["num_rows"] = manifest.get("num_rows", 0) + rows
+    manifest["matchids"] = sorted(set(manifest["matchids"]).union(matchids))
+    write_manifest(path, manifest)
+
+
+def append_frame(
+    path: str,
+    manifest: Dict[str, Any],
+    df: pd.DataFrame,
+    matchids: Collection[int],
+    row_group_size: Optional[int] = None,
+) -> None:
+    """
+    Write ``df`` as a new part of an appendable dataset and register it.
+
+    ``row_group_size`` bounds the rows per row group of the part, which
+    otherwise takes fastparquet's default of one row group per 50M rows.
+    """
+    if df.empty:
+        register_part(path, manifest, None, 0, matchids)
+        return
+
+    part_file = next_part_file(path, manifest)
+    options = {} if row_group_size is None else {"row_group_offsets": row_group_size}
+    df.to_parquet(part_file, index=False, engine=PARQUET_ENGINE, **options)
+    register_part(path, manifest, part_file, len(df), matchids)
@@ -1,11 +1,16 @@
-import json
+import argparse
 import pandas as pd
-from collections import defaultdict
 from pathlib import Path
 import os
 import tqdm
 import warnings
-from typing import List, Dict
+from typing import Dict, Optional
+
+from columnar import DEFAULT_ROW_GROUP_SIZE, ColumnarBuilder, write_records
+from incremental import ingest_new_matches
+from json_stream import iter_json_array
+from parquet_dataset import PARQUET_ENGINE, prepare_output
+from sharded import parse_sharded
 
 # Suppress warnings for cleaner output
 warnings.filterwarnings("ignore")
@@ -16,52 +21,163 @@ data_folder: Path = script_folder.parent.parent / "data"
 output_folder: Path = data_folder / "parsed"
 os.makedirs(output_folder, exist_ok=True)
 
+# Output columns and their storage types. Every record needs a value for the
+# integer columns.
+innings_schema: Dict[str, str] = {
+    "batsman": "dictionary",
+    "bowler": "dictionary",
+    "over": "float64",
+    "team": "dictionary",
+    "innings": "int16",
+    "matchid": "int64",
+    "wicket.kind": "dictionary",
+    "runs.batsman": "int16",
+    "runs.extras": "int16",
+    "runs.total": "int16",
+}
+
 
-def main() -> None:
+def main(
+    stream: bool = False,
+    workers: Optional[int] = None,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    incremental: bool = False,
+    input_file: Optional[str] = None,
+) -> None:
     """
     Main function to parse innings results from a JSON file,
     transform them into a structured DataFrame, and save the output as a parquet file.
+
+    Args:
+        stream (bool): Walk the JSON array one record at a time and write parquet
+            row groups as they fill up, keeping memory flat as the file grows.
+        workers (Optional[int]): Parse byte-range shards of the file in this many
+            processes (-1 for one per core) and write a multi-part dataset.
+        row_group_size (int): Number of deliveries per row group when streaming.
+        incremental (bool): Only parse matches missing from the existing output
+            and append them to it as a new part.
+        input_file (Optional[str]): JSON file to read instead of the provided one,
+            e.g. a file holding just the latest matches.
     """
-    innings_results_file: str = os.path.join(
+    innings_results_file: str = input_file or os.path.join(
         data_folder, "provided_json", "innings_results.json"
     )
+    output_file: str = os.path.join(output_folder, "innings_results.parquet")
+
+    if incremental:
+        print(f"Ingesting new matches from {innings_results_file}")
+        num_rows, matchids = ingest_new_matches(
+            innings_results_file,
+            output_file,
+            innings_schema,
+            row_group_size,
+            desc="Parsing innings results",
+        )
+        print(
+            f"Done. {num_rows} deliveries of {len(matchids)} new matches "
+            f"appended to {output_file}"
+        )
+        return
+
+    if workers is not None:
+        print(f"Parsing {innings_results_file} in parallel")
+        num_rows = parse_sharded(
+            innings_results_file,
+            output_file,
+            innings_schema,
+            workers,
+            row_group_size,
+            desc="Parsing innings results",
+        )
+        print(f"Done. {num_rows} deliveries saved to {output_file}")
+        return
+
+    prepare_output(output_file)
+    if stream:
+        parse_streaming(innings_results_file, output_file, row_group_size)
+        return
+
+    df: pd.DataFrame = parse_innings_results(innings_results_file)
+
+    print("Saving to parquet")
+    df.to_parquet(output_file, index=False, engine=PARQUET_ENGINE)
+    print(f"Done. Results saved to {output_file}")
+
+
+def parse_innings_results(innings_results_file: str) -> pd.DataFrame:
+    """
+    Parse innings results from a JSON file into a DataFrame in memory.
+
+    The array is decoded one delivery at a time straight into typed column
+    buffers, so only the resulting columns are held in memory.
+
+    Args:
+        innings_results_file (str): Path to the JSON array of deliveries.
 
+    Returns:
+        pd.DataFrame: One row per delivery, typed by ``innings_schema``.
+    """
     print(f"Reading from {innings_results_file}")
+    builder = ColumnarBuilder(innings_schema)
     with open(innings_results_file, "r") as f:
-        innings_results: List[Dict] = json.load(f)
-
-    key_columns: List[str] = [
-        "batsman",
-        "bowler",
-        "over",
-        "team",
-        "innings",
-        "matchid",
-        "wicket.kind",
-        "runs.batsman",
-        "runs.extras",
-        "runs.total",
-    ]
-
-    # Initialize a progress bar
-    pbar = tqdm.tqdm(total=len(innings_results), desc="Parsing innings results")
-
-    # Initialize a dictionary to hold parsed results
-    dict_results: Dict[str, List] = defaultdict(list)
-    for innings in innings_results:
-        for key in key_columns:
-            dict_results[key].append(innings.get(key, None))
-        pbar.update(1)
-    pbar.close()
+        for innings in tqdm.tqdm(
+            iter_json_array(f), desc="Parsing innings results", unit="deliveries"
+        ):
+            builder.append(innings)
 
     print("Converting to DataFrame")
-    df: pd.DataFrame = pd.DataFrame(dict_results)
+    return builder.to_frame()
 
-    print("Saving to parquet")
-    output_file: str = os.path.join(output_folder, "innings_results.parquet")
-    df.to_parquet(output_file, index=False)
-    print(f"Done. Results saved to {output_file}")
+
+def parse_streaming(
+    innings_results_file: str, output_file: str, row_group_size: int
+) -> None:
+    """
+    Stream innings results from JSON to parquet, one row group at a time.
+    """
+    print(f"Streaming from {innings_results_file}")
+    with open(innings_results_file, "r") as f:
+        records = tqdm.tqdm(
+            iter_json_array(f), desc="Parsing innings results", unit="deliveries"
+        )
+        num_rows = write_records(records, innings_schema, output_file, row_group_size)
+
+    print(f"Done. {num_rows} deliveries saved to {output_file}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Parse innings results to parquet")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream the JSON array instead of loading it into memory",
+    )
+    mode.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Parse shards of the file in this many processes (-1 for all cores)",
+    )
+    mode.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Append only matches not yet in the output",
+    )
+    parser.add_argument(
+        "--input",
+        dest="input_file",
+        default=None,
+        help="JSON file to parse instead of data/provided_json/innings_results.json",
+    )
+    parser.add_argument(
+        "--row-group-size",
+        type=int,
+        default=DEFAULT_ROW_GROUP_SIZE,
+        help="Number of deliveries per parquet row group when streaming",
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    main()
+    main(**vars(parse_args()))
@@ -1,11 +1,16 @@
-import json
+import argparse
 import pandas as pd
-from collections import defaultdict
 from pathlib import Path
 import os
 import warnings
 import tqdm
-from typing import List, Dict
+from typing import Dict, Optional
+
+from columnar import ColumnarBuilder
+from incremental import ingest_new_matches
+from json_stream import iter_json_array
+from parquet_dataset import PARQUET_ENGINE, prepare_output
+from sharded import parse_sharded
 
 # Suppress warnings for cleaner output
 warnings.filterwarnings("ignore")
@@ -16,53 +21,126 @@ data_folder: Path = script_folder.parent.parent / "data"
 output_folder: Path = data_folder / "parsed"
 os.makedirs(output_folder, exist_ok=True)
 
+# Output columns and their storage types. Every record needs a value for the
+# integer columns.
+match_schema: Dict[str, str] = {
+    "matchid": "int64",
+    "match_type": "dictionary",
+    "dates": "dictionary",
+    "gender": "dictionary",
+    "overs": "int16",
+    "teams": "dictionary",
+    "result": "dictionary",
+    "outcome.wickets": "float64",
+    "outcome.winner": "dictionary",
+    "outcome.runs": "float64",
+    "outcome.method": "dictionary",
+}
+
 
-def main() -> None:
+def main(
+    workers: Optional[int] = None,
+    incremental: bool = False,
+    input_file: Optional[str] = None,
+) -> None:
     """
     Main function to parse match results from a JSON file,
     transform them into a structured DataFrame, and save the output as a parquet file.
+
+    Args:
+        workers (Optional[int]): Parse byte-range shards of the file in this many
+            processes (-1 for one per core) and write a multi-part dataset.
+        incremental (bool): Only parse matches missing from the existing output
+            and append them to it as a new part.
+        input_file (Optional[str]): JSON file to read instead of the provided one,
+            e.g. a file holding just the latest matches.
     """
-    match_results_file: str = os.path.join(
+    match_results_file: str = input_file or os.path.join(
         data_folder, "provided_json", "match_results.json"
     )
+    output_file: str = os.path.join(output_folder, "match_results.parquet")
+
+    if incremental:
+        print(f"Ingesting new matches from {match_results_file}")
+        num_rows, matchids = ingest_new_matches(
+            match_results_file,
+            output_file,
+            match_schema,
+            desc="Parsing match results",
+        )
+        print(
+            f"Done. {num_rows} match rows of {len(matchids)} new matches "
+            f"appended to {output_file}"
+        )
+        return
+
+    if workers is not None:
+        print(f"Parsing {match_results_file} in parallel")
+        num_rows = parse_sharded(
+            match_results_file,
+            output_file,
+            match_schema,
+            workers,
+            desc="Parsing match results",
+        )
+        print(f"Done. {num_rows} match rows saved to {output_file}")
+        return
 
+    prepare_output(output_file)
+    df: pd.DataFrame = parse_match_results(match_results_file)
+
+    print("Saving to parquet")
+    df.to_parquet(output_file, index=False, engine=PARQUET_ENGINE)
+    print(f"Done. Results saved to {output_file}")
+
+
+def parse_match_results(match_results_file: str) -> pd.DataFrame:
+    """
+    Parse match results from a JSON file into a DataFrame in memory.
+
+    The array is decoded one row at a time straight into typed column
+    buffers, so only the resulting columns are held in memory.
+
+    Args:
+        match_results_file (str): Path to the JSON array of match rows.
+
+    Returns:
+        pd.DataFrame: One row per match and team, typed by ``match_schema``.
+    """
     print(f"Reading from {match_results_file}")
+    builder = ColumnarBuilder(match_schema)
     with open(match_results_file, "r") as f:
-        match_results: List[Dict] = json.load(f)
-
-    key_columns: List[str] = [
-        "matchid",
-        "match_type",
-        "dates",
-        "gender",
-        "overs",
-        "teams",
-        "result",
-        "outcome.wickets",
-        "outcome.winner",
-        "outcome.runs",
-        "outcome.method",
-    ]
-
-    # Initialize a progress bar
-    pbar = tqdm.tqdm(total=len(match_results), desc="Parsing match results")
-
-    # Initialize a dictionary to hold parsed results
-    dict_results: Dict[str, List] = defaultdict(list)
-    for match in match_results:
-        for key in key_columns:
-            dict_results[key].append(match.get(key, None))
-        pbar.update(1)
-    pbar.close()
+        for match in tqdm.tqdm(
+            iter_json_array(f), desc="Parsing match results", unit="rows"
+        ):
+            builder.append(match)
 
     print("Converting to DataFrame")
-    df: pd.DataFrame = pd.DataFrame(dict_results)
+    return builder.to_frame()
 
-    print("Saving to parquet")
-    output_file: str = os.path.join(output_folder, "match_results.parquet")
-    df.to_parquet(output_file, index=False)
-    print(f"Done. Results saved to {output_file}")
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Parse match results to parquet")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Parse shards of the file in this many processes (-1 for all cores)",
+    )
+    mode.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Append only matches not yet in the output",
+    )
+    parser.add_argument(
+        "--input",
+        dest="input_file",
+        default=None,
+        help="JSON file to parse instead of data/provided_json/match_results.json",
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    main()
+    main(**vars(parse_args()))
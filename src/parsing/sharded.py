@@ -0,0 +1,116 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Tuple
+
+import tqdm
+
+from columnar import DEFAULT_ROW_GROUP_SIZE, write_records
+from json_stream import find_record_boundaries, iter_json_array_range
+from parquet_dataset import part_file_name, prepare_output, write_manifest
+
+
+def resolve_workers(workers: int) -> int:
+    """
+    Translate a worker count, where -1 means one per CPU core.
+    """
+    if workers == -1:
+        return os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be -1 or at least 1")
+    return workers
+
+
+def parse_sharded(
+    input_file: str,
+    output_path: str,
+    schema: Dict[str, str],
+    workers: int,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    desc: str = "Parsing shards",
+) -> int:
+    """
+    Parse a JSON array in parallel into a multi-part parquet dataset.
+
+    The array is split into one byte range per worker at record boundaries.
+    Each range is decoded in its own process and written to its own part
+    file, and a manifest listing the parts in input order is written last.
+    Read the result with ``parquet_dataset.read_parquet_dataset``.
+
+    Args:
+        input_file (str): Path to the JSON array of flat records.
+        output_path (str): Dataset directory to (re)create.
+        schema (Dict[str, str]): ``ColumnarBuilder`` schema of the output.
+        workers (int): Number of processes, or -1 for one per CPU core.
+        row_group_size (int): Number of records per row group in each part.
+        desc (str): Progress bar label.
+
+    Returns:
+        int: Total number of records written.
+    """
+    workers = resolve_workers(workers)
+    shards = find_record_boundaries(input_file, workers)
+
+    prepare_output(output_path)
+    os.makedirs(output_path)
+
+    parts: List[Dict] = []
+    with ProcessPoolExecutor(max_workers=max(len(shards), 1)) as executor:
+        futures = [
+            executor.submit(
+                parse_shard,
+                input_file,
+                shard,
+                schema,
+                os.path.join(output_path, part_file_name(index)),
+                row_group_size,
+            )
+            for index, shard in enumerate(shards)
+        ]
+        for index, future in enumerate(tqdm.tqdm(futures, desc=desc, unit="shard")):
+            parts.append(
+                {
+                    "file": part_file_name(index),
+                    "rows": future.result(),
+                    "byte_range": list(shards[index]),
+                }
+            )
+
+    num_rows = sum(part["rows"] for part in parts)
+    write_manifest(
+        output_path,
+        {
+            "source": os.path.basename(input_file),
+            "source_size": os.path.getsize(input_file),
+            "num_rows": num_rows,
+            "schema": schema,
+            "parts": parts,
+        },
+    )
+    return num_rows
+
+
+def parse_shard(
+    input_file: str,
+    shard: Tuple[int, int],
+    schema: Dict[str, str],
+    part_file: str,
+    row_group_size: int,
+) -> int:
+    """
+    Parse one byte range of the input into a part file, returning its row count.
+    """
+    return write_records(
+        _iter_shard_records(input_file, shard), schema, part_file, row_group_size
+    )
+
+
+def _iter_shard_records(
+    input_file: str, shard: Tuple[int, int]
+) -> Iterator[Dict[str, Any]]:
+    for record in iter_json_array_range(input_file, *shard):
+        if not isinstance(record, dict):
+            raise ValueError(
+                f"Expected a JSON object in bytes {shard} of {input_file}, "
+                f"got {type(record).__name__}"
+            )
+        yield record
@@ -0,0 +1,90 @@
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s"
+)
+
+# Model package paths
+script_folder = Path(__file__).parent
+model_package_folder = script_folder.parent / "model_package"
+
+# The table is written like every other pipeline dataset
+sys.path.append(str(script_folder.parent / "parsing"))
+from parquet_dataset import PARQUET_ENGINE
+
+# The table is read by run_model, which defines its layout
+sys.path.append(str(model_package_folder))
+from features import feature_matrix
+from run_model import (
+    PREDICTED_COLUMN,
+    PREDICTION_TABLE_COLUMNS,
+    build_data_metadata,
+    data_metadata_path,
+    load_model,
+    prediction_metadata_path,
+    prediction_table_hashes,
+    read_data,
+)
+
+
+def main():
+    model_file = os.path.join(model_package_folder, "expected_runs_model.npz")
+    data_file = os.path.join(model_package_folder, "data.parquet")
+    predictions_file = os.path.join(model_package_folder, "predictions.parquet")
+
+    logging.info(f"Loading data from {data_file}")
+    df = read_data(data_file)
+    logging.info(f"Loading model from {model_file}")
+    model = load_model(model_file)
+
+    logging.info(f"Predicting {len(df)} overs")
+    table = build_prediction_table(model, df)
+
+    logging.info(f"Saving prediction table to {predictions_file}")
+    table.to_parquet(
+        predictions_file, index=False, compression="snappy", engine=PARQUET_ENGINE
+    )
+    metadata = prediction_table_hashes(model_file, data_file)
+    metadata["rows"] = len(table)
+    with open(prediction_metadata_path(predictions_file), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    # Lets run_model validate teams without loading the data, and check the
+    # model and data without hashing them while they are unchanged
+    logging.info(f"Saving data metadata to {data_metadata_path(data_file)}")
+    with open(data_metadata_path(data_file), "w") as f:
+        json.dump(build_data_metadata(df, data_file, [model_file]), f, indent=2)
+
+
+def build_prediction_table(model, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Predict every row of the dataset once and keep only what queries need.
+
+    Args:
+        model: Trained model.
+        df (pd.DataFrame): The model package dataset.
+
+    Returns:
+        pd.DataFrame: The query columns of ``df`` (with the date, when present)
+        and the predicted runs, with integers downcast to their smallest type.
+    """
+    columns = PREDICTION_TABLE_COLUMNS[:-1]
+    if "date" in df.columns:
+        columns = columns[:1] + ["date"] + columns[1:]
+
+    table = df[columns].reset_index(drop=True)
+    for column in ["matchid", "over_num"]:
+        table[column] = pd.to_numeric(table[column], downcast="integer")
+    table[PREDICTED_COLUMN] = model.predict(feature_matrix(df))
+    return table
+
+
+if __name__ == "__main__":
+    main()
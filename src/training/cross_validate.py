@@ -0,0 +1,171 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from statistics import mean, pstdev
+from time import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import tqdm
+from sklearn.metrics import mean_absolute_error, mean_squared_error
+from sklearn.model_selection import GroupKFold
+from threadpoolctl import threadpool_limits
+
+from engines import make_estimator
+
+# Arrays a worker process maps read-only, set once per process by attach_arrays
+_shared: Dict[str, np.ndarray] = {}
+
+SHARED_ARRAYS = ["X", "y", "bounds"]
+
+
+def grouped_folds(groups: np.ndarray, n_splits: int) -> np.ndarray:
+    """
+    Assign each row a fold, keeping all rows of a group in the same fold.
+
+    Raises:
+        ValueError: If there are fewer groups than folds.
+    """
+    folds = np.empty(len(groups), dtype=np.int8)
+    splits = GroupKFold(n_splits=n_splits).split(groups, groups=groups)
+    for fold, (_, validation_rows) in enumerate(splits):
+        folds[validation_rows] = fold
+    return folds
+
+
+def fold_layout(folds: np.ndarray, n_splits: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Order rows by fold, twice over, so the rows of every other fold follow
+    each fold in one contiguous run.
+
+    Args:
+        folds (np.ndarray): Fold of each row.
+        n_splits (int): Number of folds.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The rows to store, in order, and the
+        start of each fold in the first run followed by the number of rows.
+        Fold ``k`` is stored at ``bounds[k]:bounds[k + 1]`` and its training
+        rows at ``bounds[k + 1]:bounds[k] + bounds[-1]``.
+    """
+    order = np.argsort(folds, kind="stable")
+    bounds = np.searchsorted(folds[order], np.arange(n_splits + 1))
+    return np.concatenate([order, order]), bounds
+
+
+def cross_validate(
+    X: np.ndarray,
+    y: np.ndarray,
+    groups: np.ndarray,
+    candidates: List[Dict[str, Any]],
+    n_splits: int,
+    n_jobs: int,
+    random_state: int,
+) -> List[Dict[str, Any]]:
+    """
+    Score model configurations with grouped K-fold cross-validation.
+
+    Every fold of every candidate is fitted in its own task of a process pool.
+    The features and target are saved once to .npy files that each worker
+    maps read-only, so they are neither pickled per task nor copied per
+    worker. Rows are stored in the order of ``fold_layout``, so every fit
+    and validation reads a slice of the mapped arrays rather than a copy.
+
+    Args:
+        X (np.ndarray): Features, one row per over.
+        y (np.ndarray): Target.
+        groups (np.ndarray): Group of each row; a group is never split
+            between training and validation.
+        candidates (List[Dict[str, Any]]): Configurations to compare, as
+            taken by ``engines.make_estimator``.
+        n_splits (int): Number of folds.
+        n_jobs (int): Number of processes, or -1 for one per CPU core. Each
+            model is fitted on a single core.
+        random_state (int): Seed of every model.
+
+    Returns:
+        List[Dict[str, Any]]: The leaderboard: each candidate's
+        hyperparameters, mean and standard deviation of the validation MAE and
+        RMSE, mean fit time and per-fold scores, best (lowest MAE) first.
+    """
+    n_jobs = (os.cpu_count() or 1) if n_jobs == -1 else n_jobs
+    if n_jobs < 1:
+        raise ValueError("n_jobs must be -1 or at least 1")
+
+    order, bounds = fold_layout(grouped_folds(np.asarray(groups), n_splits), n_splits)
+    arrays = {
+        # sklearn fits on float32, so convert once rather than per task
+        "X": np.asarray(X, dtype=np.float32)[order],
+        "y": np.asarray(y, dtype=np.float64)[order],
+        "bounds": bounds,
+    }
+    tasks = [
+        (index, fold) for index in range(len(candidates)) for fold in range(n_splits)
+    ]
+
+    with tempfile.TemporaryDirectory(prefix="cross-validate-") as folder:
+        for name, array in arrays.items():
+            np.save(os.path.join(folder, f"{name}.npy"), array)
+        with ProcessPoolExecutor(
+            max_workers=min(n_jobs, len(tasks)),
+            initializer=attach_arrays,
+            initargs=(folder,),
+        ) as executor:
+            futures = [
+                executor.submit(fit_fold, candidates[index], fold, random_state)
+                for index, fold in tasks
+            ]
+            scores = [
+                future.result()
+                for future in tqdm.tqdm(futures, desc="Cross-validating", unit="fit")
+            ]
+
+    leaderboard = []
+    for index, params in enumerate(candidates):
+        folds = scores[index * n_splits : (index + 1) * n_splits]
+        leaderboard.append(
+            {
+                **params,
+                "mae": mean(fold["mae"] for fold in folds),
+                "mae_std": pstdev(fold["mae"] for fold in folds),
+                "rmse": mean(fold["rmse"] for fold in folds),
+                "rmse_std": pstdev(fold["rmse"] for fold in folds),
+                "fit_s": mean(fold["fit_s"] for fold in folds),
+                "folds": folds,
+            }
+        )
+    leaderboard.sort(key=lambda entry: entry["mae"])
+    return leaderboard
+
+
+def attach_arrays(folder: str):
+    """
+    Map the shared arrays of a cross-validation into this worker process.
+    """
+    for name in SHARED_ARRAYS:
+        _shared[name] = np.load(os.path.join(folder, f"{name}.npy"), mmap_mode="r")
+
+
+def fit_fold(params: Dict[str, Any], fold: int, random_state: int) -> Dict[str, Any]:
+    """
+    Fit a model on every fold but ``fold`` and score it on ``fold``.
+    """
+    X, y, bounds = (_shared[name] for name in SHARED_ARRAYS)
+    start, end = int(bounds[fold]), int(bounds[fold + 1])
+    train_rows = slice(end, start + int(bounds[-1]))
+    validation_rows = slice(start, end)
+
+    model = make_estimator(params, n_jobs=1, random_state=random_state)
+    # Gradient boosting would otherwise start a thread per core in every worker
+    with threadpool_limits(limits=1, user_api="openmp"):
+        start_time = time()
+        model.fit(X[train_rows], y[train_rows])
+        fit_time = time() - start_time
+
+        predictions = model.predict(X[validation_rows])
+    return {
+        "fold": fold,
+        "fit_s": fit_time,
+        "mae": mean_absolute_error(y[validation_rows], predictions),
+        "rmse": float(np.sqrt(mean_squared_error(y[validation_rows], predictions))),
+    }
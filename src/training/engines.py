@@ -0,0 +1,66 @@
+from typing import Any, Dict
+
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+
+FOREST = "forest"
+HIST_GRADIENT_BOOSTING = "hist_gradient_boosting"
+
+# Hyperparameters of each engine, and the values trained when none are given
+ENGINE_PARAMS: Dict[str, Dict[str, Any]] = {
+    FOREST: {
+        "n_estimators": 10,
+        "max_depth": None,
+        "min_samples_leaf": 1,
+    },
+    HIST_GRADIENT_BOOSTING: {
+        "max_iter": 100,
+        "learning_rate": 0.1,
+        "max_leaf_nodes": 31,
+    },
+}
+
+
+def engine_params(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The hyperparameters of a configuration, without its engine.
+
+    Configurations without an ``engine`` key are forests.
+    """
+    engine = config.get("engine", FOREST)
+    return {key: config[key] for key in ENGINE_PARAMS[engine] if key in config}
+
+
+def make_estimator(
+    config: Dict[str, Any], n_jobs: int, random_state: int, verbose: int = 0
+):
+    """
+    Build the unfitted estimator of a configuration.
+
+    The forest fits its trees on ``n_jobs`` threads. Gradient boosting fits
+    one tree after the other on every binned feature, on OpenMP threads that
+    ``n_jobs`` does not limit. Early stopping is off, so ``max_iter`` trees
+    are always fitted and engines are compared on the same grouped split.
+
+    Args:
+        config (Dict[str, Any]): ``engine`` and that engine's
+            ``ENGINE_PARAMS`` keys.
+        n_jobs (int): Forest cores; -1 uses all of them.
+        random_state (int): Seed of the estimator.
+        verbose (int): Verbosity of the estimator.
+
+    Raises:
+        ValueError: If the engine is unknown.
+    """
+    engine = config.get("engine", FOREST)
+    if engine not in ENGINE_PARAMS:
+        raise ValueError(
+            f"Unknown engine {engine}, expected one of {list(ENGINE_PARAMS)}"
+        )
+    params = engine_params(config)
+    if engine == HIST_GRADIENT_BOOSTING:
+        return HistGradientBoostingRegressor(
+            **params, early_stopping=False, random_state=random_state, verbose=verbose
+        )
+    return RandomForestRegressor(
+        **params, n_jobs=n_jobs, random_state=random_state, verbose=verbose
+    )
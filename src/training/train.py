@@ -1,3 +1,5 @@
+import argparse
+import itertools
 import json
 import pandas as pd
 import numpy as np
@@ -6,9 +8,12 @@ from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 from pathlib import Path
 import os
+import sys
 import logging
+import tempfile
 import joblib  # For saving models
 from time import time
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
 # Setup logging
 logging.basicConfig(
@@ -19,18 +24,39 @@ logging.basicConfig(
 script_folder = Path(__file__).parent
 data_folder = script_folder.parent.parent / "data"
 
+# Training data may be a single file or a multi-part dataset
+sys.path.append(str(script_folder.parent / "parsing"))
+from parquet_dataset import iter_parquet_dataset, read_parquet_dataset
+
+# run_model predicts with the forest flattened into NumPy arrays
+model_package_folder = script_folder.parent / "model_package"
+sys.path.append(str(model_package_folder))
+from features import INPUT_FEATURES, feature_matrix
+from forest import FlatForest
+
+# Hyperparameters may be picked by grouped cross-validation
+from cross_validate import cross_validate
+from engines import (
+    ENGINE_PARAMS,
+    FOREST,
+    HIST_GRADIENT_BOOSTING,
+    engine_params,
+    make_estimator,
+)
+
 # Constants
-INPUT_FEATURES = [
-    "initial_batter",
-    "initial_bowler",
-    "num_batsmen",
-    "num_bowlers",
-    "num_deliveries",
-    "remaining_wickets",
-    "remaining_overs",
-]
 TARGET = "runs"
 GROUP_COL = "matchid"
+RANDOM_STATE = 42
+
+# Forest hyperparameters trained when none are given
+DEFAULT_PARAMS: Dict[str, Any] = ENGINE_PARAMS[FOREST]
+
+# Share of matches held out for testing
+TEST_SIZE = 0.2
+
+# Most held-out rows kept to check the exported forest after streaming
+STREAM_SAMPLE_ROWS = 10_000
 
 
 def validate_training_data(df: pd.DataFrame):
@@ -64,52 +90,538 @@ def evaluate_model(model, X, y, dataset_name="Dataset"):
     return mae, rmse
 
 
-def main():
+def fit_and_evaluate(
+    config: Dict[str, Any],
+    n_jobs: int,
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    X_test: np.ndarray,
+    y_test: np.ndarray,
+) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Train a model with the given configuration and evaluate it on both sets.
+
+    Args:
+        config (Dict[str, Any]): ``engine`` and that engine's hyperparameters.
+        n_jobs (int): Cores to fit and predict on; -1 uses all of them.
+
+    Returns:
+        Tuple[Any, Dict[str, Any]]: The model, and the configuration with the
+        fit time, test set predict time and latency, artifact sizes and
+        metrics.
+    """
+    logging.info(f"Starting model training: {config}")
+    model = make_estimator(config, n_jobs, RANDOM_STATE, verbose=1)
+    start_time = time()
+    model.fit(X_train, y_train)
+    fit_time = time() - start_time
+    logging.info(f"Training completed in {fit_time:.2f} seconds")
+
+    logging.info("Evaluating model on training set")
+    train_mae, train_rmse = evaluate_model(
+        model, X_train, y_train, dataset_name="Training"
+    )
+
+    logging.info("Evaluating model on test set")
+    start_time = time()
+    test_mae, test_rmse = evaluate_model(model, X_test, y_test, dataset_name="Test")
+    predict_time = time() - start_time
+
+    result = {
+        **config,
+        "n_jobs": n_jobs,
+        "fit_s": fit_time,
+        "predict_s": predict_time,
+        "predict_ms_per_1k": per_thousand_rows(predict_time, len(X_test)),
+        **measure_artifacts(model, X_test),
+        "train_mae": train_mae,
+        "train_rmse": train_rmse,
+        "test_mae": test_mae,
+        "test_rmse": test_rmse,
+    }
+    return model, result
+
+
+def per_thousand_rows(seconds: float, rows: int) -> float:
+    """
+    Milliseconds taken per 1,000 rows.
+    """
+    return seconds / max(rows, 1) * 1e6
+
+
+def measure_artifacts(model, X: np.ndarray) -> Dict[str, Any]:
+    """
+    Size the pickled and flattened model, and time the flattened model.
+
+    run_model predicts with the flattened model, so its latency is what a
+    request pays, whatever the engine's own ``predict`` costs.
+    """
+    forest = FlatForest.from_estimator(model, feature_names=INPUT_FEATURES)
+    with tempfile.TemporaryDirectory(prefix="train-") as folder:
+        pickle_file = os.path.join(folder, "model.pkl")
+        joblib.dump(model, pickle_file)
+        forest_file = os.path.join(folder, "model.npz")
+        forest.save(forest_file)
+        sizes = {
+            "pickle_bytes": os.path.getsize(pickle_file),
+            "npz_bytes": os.path.getsize(forest_file),
+        }
+    start_time = time()
+    forest.predict(X)
+    flat_time = time() - start_time
+    return {**sizes, "flat_predict_ms_per_1k": per_thousand_rows(flat_time, len(X))}
+
+
+def main(
+    n_estimators: Sequence[int] = (DEFAULT_PARAMS["n_estimators"],),
+    max_depth: Sequence[Optional[int]] = (DEFAULT_PARAMS["max_depth"],),
+    min_samples_leaf: Sequence[int] = (DEFAULT_PARAMS["min_samples_leaf"],),
+    n_jobs: int = -1,
+    cv_folds: Optional[int] = None,
+    stream: bool = False,
+    engine: Sequence[str] = (FOREST,),
+    max_iter: Sequence[int] = (ENGINE_PARAMS[HIST_GRADIENT_BOOSTING]["max_iter"],),
+    learning_rate: Sequence[float] = (
+        ENGINE_PARAMS[HIST_GRADIENT_BOOSTING]["learning_rate"],
+    ),
+    max_leaf_nodes: Sequence[int] = (
+        ENGINE_PARAMS[HIST_GRADIENT_BOOSTING]["max_leaf_nodes"],
+    ),
+):
+    """
+    Train a model for every combination of the hyperparameter values given.
+
+    ``engine`` picks the models trained: the forest, grown with
+    ``n_estimators``, ``max_depth`` and ``min_samples_leaf``, and histogram
+    gradient boosting, grown with ``max_iter``, ``learning_rate`` and
+    ``max_leaf_nodes``. Both are fitted and scored on the same grouped split
+    and both are saved flattened, so run_model serves either one.
+
+    Each configuration's fit time and held-out metrics are logged and saved to
+    data/training/training_configs.json. The test set only reports on the
+    configurations: a run that trains several of them is a comparison and
+    leaves the model package as it is. A single configuration is saved to
+    the model package.
+
+    With ``cv_folds``, the combinations are instead cross-validated on the
+    training set with folds grouped by match, ranked in
+    data/training/cv_leaderboard.json, and only the best one is trained and
+    saved. Cross-validation picks hyperparameters, not engines: with several
+    engines, the leaderboard compares them and nothing is trained.
+
+    With ``stream``, the training data is read one row group at a time and a
+    single forest configuration of ``n_estimators`` trees is trained with
+    ``stream_fit_and_evaluate``, in bounded memory.
+    """
     train_file = os.path.join(data_folder, "training", "training_data.parquet")
+    configs_file = os.path.join(data_folder, "training", "training_configs.json")
+    leaderboard_file = os.path.join(data_folder, "training", "cv_leaderboard.json")
+
+    if stream:
+        if cv_folds or max(map(len, [n_estimators, max_depth, min_samples_leaf])) > 1:
+            raise ValueError("Streaming trains a single configuration")
+        if list(engine) != [FOREST]:
+            raise ValueError("Streaming only trains the forest engine")
+        params = {
+            "engine": FOREST,
+            "n_estimators": n_estimators[0],
+            "max_depth": max_depth[0],
+            "min_samples_leaf": min_samples_leaf[0],
+        }
+        model, result, X_sample = stream_fit_and_evaluate(train_file, params, n_jobs)
+        logging.info(f"Saving configuration results to {configs_file}")
+        with open(configs_file, "w") as f:
+            json.dump({"selected": result, "configurations": [result]}, f, indent=2)
+        save_model(model, X_sample)
+        return
 
     # Load data
     logging.info(f"Loading data from {train_file}")
-    df = pd.read_parquet(train_file)
+    df = read_parquet_dataset(train_file)
 
     # Validate data
     logging.info("Validating training data")
     validate_training_data(df)
 
-    # Features and target
-    X = df[INPUT_FEATURES]
-    y = df[TARGET]
-    groups = df[GROUP_COL]
+    # Features and target, built once in the types the forest fits on. The
+    # frame is no longer needed.
+    X = feature_matrix(df)
+    y = df[TARGET].to_numpy(dtype=np.float64)
+    groups = df[GROUP_COL].to_numpy()
+    del df
 
     # Grouped split by matchid
     logging.info("Splitting data into train and test sets")
-    gss = GroupShuffleSplit(n_splits=1, test_size=0.2, random_state=42)
+    gss = GroupShuffleSplit(n_splits=1, test_size=TEST_SIZE, random_state=RANDOM_STATE)
     train_idx, test_idx = next(gss.split(X, y, groups=groups))
 
-    X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
-    y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
+    X_train, X_test = X[train_idx], X[test_idx]
+    y_train, y_test = y[train_idx], y[test_idx]
 
-    # Train model
-    logging.info("Starting model training")
-    start_time = time()
-    model = RandomForestRegressor(n_estimators=10, random_state=42, verbose=1)
-    model.fit(X_train, y_train)
-    end_time = time()
-    logging.info(f"Training completed in {end_time - start_time:.2f} seconds")
+    grids = {
+        FOREST: [n_estimators, max_depth, min_samples_leaf],
+        HIST_GRADIENT_BOOSTING: [max_iter, learning_rate, max_leaf_nodes],
+    }
+    candidates = [
+        {"engine": name, **dict(zip(ENGINE_PARAMS[name], values))}
+        for name in engine
+        for values in itertools.product(*grids[name])
+    ]
 
-    # Evaluate model
-    logging.info("Evaluating model on training set")
-    evaluate_model(model, X_train, y_train, dataset_name="Training")
+    # Pick the configuration by cross-validation, leaving the test set unseen
+    if cv_folds:
+        logging.info(
+            f"Cross-validating {len(candidates)} configurations on {cv_folds} "
+            "folds grouped by match"
+        )
+        leaderboard = cross_validate(
+            X_train,
+            y_train,
+            groups[train_idx],
+            candidates,
+            cv_folds,
+            n_jobs,
+            RANDOM_STATE,
+        )
+        log_leaderboard(leaderboard)
+        logging.info(f"Saving leaderboard to {leaderboard_file}")
+        with open(leaderboard_file, "w") as f:
+            json.dump(leaderboard, f, indent=2)
+        if len(set(engine)) > 1:
+            logging.info(
+                f"Cross-validated {len(set(engine))} engines; the model package "
+                "is unchanged. Choose one with --engine to train and save it"
+            )
+            return
+        best = leaderboard[0]
+        candidates = [{"engine": best["engine"], **engine_params(best)}]
 
-    logging.info("Evaluating model on test set")
-    evaluate_model(model, X_test, y_test, dataset_name="Test")
+    # Train and evaluate every configuration. Picking one by its test MAE
+    # would bias the reported MAE, so only a lone configuration is saved.
+    model, results = None, []
+    for config in candidates:
+        model, result = fit_and_evaluate(
+            config, n_jobs, X_train, y_train, X_test, y_test
+        )
+        results.append(result)
+    selected = results[0] if len(results) == 1 else None
+    log_configurations(results, selected)
 
-    # Save the model
-    model_file = os.path.join(
-        script_folder.parent, "model_package", "expected_runs_model.pkl"
-    )
+    logging.info(f"Saving configuration results to {configs_file}")
+    with open(configs_file, "w") as f:
+        json.dump({"selected": selected, "configurations": results}, f, indent=2)
+
+    if selected is None:
+        logging.info(
+            f"Compared {len(results)} configurations; the model package is "
+            "unchanged. Train a single configuration, or pick one with "
+            "--cv-folds, to save it"
+        )
+        return
+    save_model(model, X_test)
+
+
+def save_model(model, X_check: np.ndarray):
+    """
+    Save the model to the model package, pickled and as a flattened forest.
+    """
+    model_file = os.path.join(model_package_folder, "expected_runs_model.pkl")
     logging.info(f"Saving model to {model_file}")
     joblib.dump(model, model_file)
 
+    # Export the flattened forest that run_model loads without sklearn
+    forest_file = os.path.join(model_package_folder, "expected_runs_model.npz")
+    logging.info(f"Exporting flattened forest to {forest_file}")
+    export_forest(model, X_check, forest_file)
+
+
+def holdout_matchids(matchids: np.ndarray) -> Set[int]:
+    """
+    Matches held out for testing: those the in-memory grouped split holds out.
+
+    GroupShuffleSplit shuffles the distinct groups, so splitting the distinct
+    match ids picks the same matches as splitting every row by match.
+    """
+    matchids = np.unique(matchids)
+    gss = GroupShuffleSplit(n_splits=1, test_size=TEST_SIZE, random_state=RANDOM_STATE)
+    _, test_idx = next(gss.split(matchids, groups=matchids))
+    return set(matchids[test_idx].tolist())
+
+
+def stream_fit_and_evaluate(
+    train_file: str, params: Dict[str, Any], n_jobs: int
+) -> Tuple[RandomForestRegressor, Dict[str, Any], np.ndarray]:
+    """
+    Train a forest on training data read one row group at a time.
+
+    The test matches are picked from the match ids alone. The
+    ``params["n_estimators"]`` trees are spread evenly over the chunks with
+    training rows, each growing its share with ``warm_start``, so the forest
+    has the same size however many row groups the data was written in. A
+    second pass scores the finished forest on the training and test rows.
+    Only one chunk is held in memory at once.
+
+    Args:
+        train_file (str): Training data file or multi-part dataset.
+        params (Dict[str, Any]): Forest configuration; ``n_estimators`` is
+            the number of trees of the forest.
+        n_jobs (int): Cores to fit and predict on; -1 uses all of them.
+
+    Raises:
+        ValueError: If there are fewer trees than chunks with training rows.
+
+    Returns:
+        Tuple[RandomForestRegressor, Dict[str, Any], np.ndarray]: The model,
+        its results in the layout of ``fit_and_evaluate`` and some held-out
+        features to check the exported forest on.
+    """
+    columns = INPUT_FEATURES + [TARGET, GROUP_COL]
+
+    logging.info(f"Splitting the matches of {train_file} into train and test sets")
+    chunk_matchids = [
+        set(chunk[GROUP_COL].unique().tolist())
+        for chunk in iter_parquet_dataset(train_file, columns=[GROUP_COL])
+    ]
+    matchids = set().union(*chunk_matchids)
+    test_matchids = holdout_matchids(np.fromiter(matchids, dtype=np.int64))
+
+    # Trees grown on each chunk with training rows, in chunk order
+    num_chunks = sum(1 for ids in chunk_matchids if ids - test_matchids)
+    num_trees = params["n_estimators"]
+    if num_chunks == 0:
+        raise ValueError("Training data has no rows outside the test matches.")
+    if num_trees < num_chunks:
+        raise ValueError(
+            f"{num_trees} trees cannot cover the {num_chunks} row groups of "
+            f"{train_file}. Train more trees or write larger row groups."
+        )
+    schedule = iter(
+        [
+            num_trees // num_chunks + (i < num_trees % num_chunks)
+            for i in range(num_chunks)
+        ]
+    )
+
+    def chunks():
+        for chunk in iter_parquet_dataset(train_file, columns=columns):
+            validate_training_data(chunk)
+            is_test = chunk[GROUP_COL].isin(test_matchids).to_numpy()
+            X = feature_matrix(chunk)
+            y = chunk[TARGET].to_numpy(dtype=np.float64)
+            yield X[~is_test], y[~is_test], X[is_test], y[is_test]
+
+    model = RandomForestRegressor(
+        **{**engine_params(params), "n_estimators": 0},
+        warm_start=True,
+        n_jobs=n_jobs,
+        random_state=RANDOM_STATE,
+        verbose=1,
+    )
+    logging.info(
+        f"Starting streamed model training: {num_trees} trees over {num_chunks} chunks"
+    )
+    fit_time = 0.0
+    for X_train, y_train, _, _ in chunks():
+        if len(X_train) == 0:
+            continue
+        model.set_params(n_estimators=model.n_estimators + next(schedule))
+        start_time = time()
+        model.fit(X_train, y_train)
+        fit_time += time() - start_time
+    logging.info(
+        f"Training completed in {fit_time:.2f} seconds: {model.n_estimators} trees"
+    )
+
+    # Sums of absolute and squared errors, and row counts, per set
+    errors = {name: np.zeros(3) for name in ["Training", "Test"]}
+    predict_time = 0.0
+    X_sample = np.empty((0, len(INPUT_FEATURES)), dtype=np.float32)
+    for X_train, y_train, X_test, y_test in chunks():
+        for name, X, y in [("Training", X_train, y_train), ("Test", X_test, y_test)]:
+            if len(X) == 0:
+                continue
+            start_time = time()
+            residuals = model.predict(X) - y
+            if name == "Test":
+                predict_time += time() - start_time
+            errors[name] += [np.abs(residuals).sum(), (residuals**2).sum(), len(y)]
+        if len(X_sample) < STREAM_SAMPLE_ROWS:
+            X_sample = np.concatenate(
+                [X_sample, X_test[: STREAM_SAMPLE_ROWS - len(X_sample)]]
+            )
+
+    metrics = {}
+    for name, (absolute, squared, count) in errors.items():
+        if count == 0:
+            raise ValueError(f"{name} set is empty.")
+        metrics[name] = (absolute / count, float(np.sqrt(squared / count)))
+        logging.info(f"{name} MAE: {metrics[name][0]}")
+        logging.info(f"{name} RMSE: {metrics[name][1]}")
+
+    result = {
+        **params,
+        "n_estimators": model.n_estimators,
+        "n_jobs": n_jobs,
+        "fit_s": fit_time,
+        "predict_s": predict_time,
+        "predict_ms_per_1k": per_thousand_rows(predict_time, int(errors["Test"][2])),
+        **measure_artifacts(model, X_sample),
+        "train_mae": metrics["Training"][0],
+        "train_rmse": metrics["Training"][1],
+        "test_mae": metrics["Test"][0],
+        "test_rmse": metrics["Test"][1],
+    }
+    return model, result, X_sample
+
+
+def log_configurations(
+    results: List[Dict[str, Any]], selected: Optional[Dict[str, Any]]
+):
+    """
+    Log a table of the configurations' speed, size and held-out accuracy,
+    marking the one saved to the model package, if any.
+    """
+    lines = [
+        "Configurations (fit s, predict ms per 1k rows, flattened predict ms "
+        "per 1k rows, npz MB, pickle MB, test MAE, test RMSE):"
+    ]
+    for result in results:
+        marker = " <- saved" if result is selected else ""
+        lines.append(
+            f"  {describe_config(result)}: {result['fit_s']:.2f}, "
+            f"{result['predict_ms_per_1k']:.3f}, "
+            f"{result['flat_predict_ms_per_1k']:.3f}, "
+            f"{result['npz_bytes'] / 1e6:.2f}, {result['pickle_bytes'] / 1e6:.2f}, "
+            f"{result['test_mae']:.4f}, {result['test_rmse']:.4f}{marker}"
+        )
+    logging.info("\n".join(lines))
+
+
+def describe_config(config: Dict[str, Any]) -> str:
+    params = ", ".join(f"{key}={value}" for key, value in engine_params(config).items())
+    return f"{config.get('engine', FOREST)} {params}"
+
+
+def log_leaderboard(leaderboard: List[Dict[str, Any]]):
+    """
+    Log the cross-validation leaderboard, best configuration first.
+    """
+    lines = ["Cross-validation leaderboard (MAE, RMSE, mean fit s):"]
+    for rank, entry in enumerate(leaderboard, 1):
+        lines.append(
+            f"  {rank}. {describe_config(entry)}: {entry['mae']:.4f} +/- {entry['mae_std']:.4f}, "
+            f"{entry['rmse']:.4f} +/- {entry['rmse_std']:.4f}, {entry['fit_s']:.2f}"
+        )
+    logging.info("\n".join(lines))
+
+
+def export_forest(model, X: np.ndarray, forest_file: str) -> FlatForest:
+    """
+    Flatten the trained forest or boosted trees into NumPy arrays and save them.
+
+    Raises:
+        ValueError: If the flattened forest does not reproduce the model's
+            predictions for ``X``.
+    """
+    forest = FlatForest.from_estimator(model, feature_names=INPUT_FEATURES)
+    # Forest threads add their trees' predictions in whatever order they
+    # finish, so compare against the trees added in order. Boosted trees are
+    # always added in order.
+    n_jobs = model.get_params().get("n_jobs")
+    model.set_params(**({} if n_jobs is None else {"n_jobs": None}))
+    try:
+        expected = model.predict(X)
+    finally:
+        model.set_params(**({} if n_jobs is None else {"n_jobs": n_jobs}))
+    if not np.array_equal(forest.predict(X), expected):
+        raise ValueError("Flattened forest does not match the trained model")
+    forest.save(forest_file)
+    return forest
+
+
+def parse_max_depth(value: str) -> Optional[int]:
+    return None if value.lower() == "none" else int(value)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Train the expected runs model. Several values of an option "
+        "or several engines train and compare every combination without saving "
+        "any of them, unless --cv-folds picks one"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=list(ENGINE_PARAMS),
+        nargs="+",
+        default=[FOREST],
+        help="Models to train: a random forest and/or histogram gradient "
+        "boosting, compared side by side. Only a run of a single engine saves "
+        "a model",
+    )
+    parser.add_argument(
+        "--n-estimators",
+        type=int,
+        nargs="+",
+        default=[DEFAULT_PARAMS["n_estimators"]],
+        help="Number of forest trees",
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=parse_max_depth,
+        nargs="+",
+        default=[DEFAULT_PARAMS["max_depth"]],
+        help="Deepest a forest tree may grow ('none' for no limit)",
+    )
+    parser.add_argument(
+        "--min-samples-leaf",
+        type=int,
+        nargs="+",
+        default=[DEFAULT_PARAMS["min_samples_leaf"]],
+        help="Fewest overs in a forest leaf",
+    )
+    parser.add_argument(
+        "--max-iter",
+        type=int,
+        nargs="+",
+        default=[ENGINE_PARAMS[HIST_GRADIENT_BOOSTING]["max_iter"]],
+        help="Number of gradient boosted trees",
+    )
+    parser.add_argument(
+        "--learning-rate",
+        type=float,
+        nargs="+",
+        default=[ENGINE_PARAMS[HIST_GRADIENT_BOOSTING]["learning_rate"]],
+        help="Gradient boosting shrinkage of each tree",
+    )
+    parser.add_argument(
+        "--max-leaf-nodes",
+        type=int,
+        nargs="+",
+        default=[ENGINE_PARAMS[HIST_GRADIENT_BOOSTING]["max_leaf_nodes"]],
+        help="Most leaves of a gradient boosted tree",
+    )
+    parser.add_argument(
+        "--n-jobs",
+        type=int,
+        default=-1,
+        help="Cores to fit and predict on (-1 for all of them). With "
+        "--cv-folds, the number of cross-validation processes",
+    )
+    parser.add_argument(
+        "--cv-folds",
+        type=int,
+        default=None,
+        help="Pick the configuration by cross-validation on this many folds "
+        "grouped by match, then train only the best one",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read the training data one row group at a time and spread the "
+        "--n-estimators trees over the row groups, in bounded memory",
+    )
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
-    main()
+    main(**vars(parse_args()))
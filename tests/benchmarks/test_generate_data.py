@@ -0,0 +1,110 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Import the generator and the parser schemas its output must fit
+src_folder = Path(__file__).parents[2] / "src"
+sys.path.append(str(src_folder / "benchmarks"))
+sys.path.append(str(src_folder / "parsing"))
+from columnar import ColumnarBuilder
+from generate_data import generate, get_team_names
+from parse_innings_results import innings_schema
+from parse_match_results import match_schema
+
+data_folder = Path(__file__).parents[2] / "data"
+
+test_result_folder = data_folder / "tests"
+os.makedirs(test_result_folder, exist_ok=True)
+log_file = test_result_folder / "test_generate_data.json"
+
+
+def load(folder):
+    with open(folder / "match_results.json") as f:
+        matches = json.load(f)
+    with open(folder / "innings_results.json") as f:
+        deliveries = json.load(f)
+    return matches, deliveries
+
+
+@pytest.fixture(scope="module")
+def generated(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("synthetic")
+    counts = generate(str(folder), num_matches=60, overs=20, num_teams=20, seed=4)
+    return folder, counts
+
+
+def test_seed_is_deterministic(generated, tmp_path):
+    folder, _ = generated
+    generate(str(tmp_path), num_matches=60, overs=20, num_teams=20, seed=4)
+    for name in ["match_results.json", "innings_results.json"]:
+        assert (folder / name).read_bytes() == (tmp_path / name).read_bytes()
+
+
+def test_records_fit_parser_schemas(generated):
+    folder, counts = generated
+    matches, deliveries = load(folder)
+    assert (len(matches), len(deliveries)) == (counts["matches"], counts["deliveries"])
+
+    for schema, records in [(match_schema, matches), (innings_schema, deliveries)]:
+        builder = ColumnarBuilder(schema)
+        for record in records:
+            builder.append(record)
+        assert len(builder) == len(records)
+
+
+def test_configuration_is_respected(generated):
+    folder, _ = generated
+    matches, deliveries = load(folder)
+
+    assert {match["overs"] for match in matches} == {20}
+    assert max(int(delivery["over"]) for delivery in deliveries) < 20
+    assert {match["teams"] for match in matches} <= set(get_team_names(20))
+    assert len(get_team_names(20)) == 20
+
+
+def test_outcomes_agree_with_deliveries(generated):
+    """Recorded winners, margins and ties follow from the runs and wickets."""
+    folder, _ = generated
+    matches, deliveries = load(folder)
+
+    runs, wickets = {}, {}
+    for delivery in {json.dumps(d, sort_keys=True): d for d in deliveries}.values():
+        key = (delivery["matchid"], delivery["team"])
+        runs[key] = runs.get(key, 0) + delivery["runs.total"]
+        if delivery.get("wicket.kind") not in (None, "retired hurt"):
+            wickets[key] = wickets.get(key, 0) + 1
+
+    for match in matches:
+        if match.get("result") == "no result" or "outcome.method" in match:
+            continue
+        teams = [m["teams"] for m in matches if m["matchid"] == match["matchid"]]
+        totals = {team: runs.get((match["matchid"], team), 0) for team in teams}
+        if match.get("result") == "tie":
+            assert len(set(totals.values())) == 1
+        elif "outcome.runs" in match:
+            winner = match["outcome.winner"]
+            loser = [team for team in teams if team != winner][0]
+            assert totals[winner] - totals[loser] == match["outcome.runs"]
+        else:
+            winner = match["outcome.winner"]
+            lost = wickets.get((match["matchid"], winner), 0)
+            assert match["outcome.wickets"] == 10 - lost
+
+
+if __name__ == "__main__":
+    results = {"status": "success", "errors": []}
+    try:
+        pytest.main([__file__])
+    except SystemExit as e:
+        if e.code != 0:
+            results["status"] = "failure"
+            results["errors"].append(f"Test suite failed with exit code {e.code}")
+            with open(log_file, "w") as f:
+                json.dump(results, f)
+            exit(1)
+
+    with open(log_file, "w") as f:
+        json.dump(results, f)
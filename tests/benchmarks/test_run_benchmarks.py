@@ -0,0 +1,151 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Import the benchmark harness
+src_folder = Path(__file__).parents[2] / "src"
+sys.path.append(str(src_folder / "benchmarks"))
+from run_benchmarks import (
+    STAGES,
+    STARTUP_SCENARIOS,
+    batch,
+    compare,
+    parse_stage_args,
+    run,
+    startup,
+)
+
+data_folder = Path(__file__).parents[2] / "data"
+
+test_result_folder = data_folder / "tests"
+os.makedirs(test_result_folder, exist_ok=True)
+log_file = test_result_folder / "test_run_benchmarks.json"
+
+
+def write_results(path, wall_times):
+    stages = {
+        name: {"wall_s": wall, "cpu_s": wall, "peak_rss_mb": 100.0}
+        for name, wall in wall_times.items()
+    }
+    with open(path, "w") as f:
+        json.dump({"stages": stages}, f)
+    return str(path)
+
+
+def test_compare_flags_slowdowns_beyond_threshold(tmp_path):
+    baseline = write_results(tmp_path / "base.json", {"a": 2.0, "b": 2.0, "c": 2.0})
+    current = write_results(tmp_path / "new.json", {"a": 2.1, "b": 3.0, "c": 1.0})
+
+    assert compare(baseline, current, threshold=0.1) == ["b"]
+    assert compare(baseline, current, threshold=0.6) == []
+
+
+def test_compare_ignores_tiny_absolute_slowdowns(tmp_path):
+    baseline = write_results(tmp_path / "base.json", {"a": 0.01})
+    current = write_results(tmp_path / "new.json", {"a": 0.03, "new_stage": 5.0})
+
+    assert compare(baseline, current) == []
+
+
+def test_parse_stage_args():
+    parsed = parse_stage_args(["parse_innings_results=--workers -1 --row-group-size 5"])
+    assert parsed == {
+        "parse_innings_results": ["--workers", "-1", "--row-group-size", "5"]
+    }
+    with pytest.raises(ValueError):
+        parse_stage_args(["not_a_stage=--fast"])
+
+
+@pytest.fixture(scope="module")
+def benchmark_run(tmp_path_factory):
+    """Results and workspace of one benchmark run on a few synthetic matches."""
+    folder = tmp_path_factory.mktemp("benchmark")
+    output = folder / "results.json"
+    workspace = folder / "workspace"
+    results = run(matches=6, seed=1, output=str(output), workspace=str(workspace))
+    return results, output, workspace
+
+
+def test_run_measures_every_stage(benchmark_run):
+    results, output, workspace = benchmark_run
+
+    with open(output) as f:
+        assert json.load(f) == results
+    assert list(results["stages"]) == [stage["name"] for stage in STAGES]
+    assert results["input"]["matches"] == 6
+    for name, stage in results["stages"].items():
+        assert stage["wall_s"] > 0, name
+        assert stage["cpu_s"] > 0, name
+        assert stage["peak_rss_mb"] > 0, name
+        assert stage["rows"] > 0, name
+        throughput = stage["rows"] / stage["wall_s"]
+        assert stage["rows_per_s"] == pytest.approx(throughput, rel=0.01)
+
+    # Stage outputs stay in the workspace, not in the checkout
+    assert (workspace / "src" / "model_package" / "data.parquet").exists()
+
+
+def test_startup_measures_every_scenario(benchmark_run, tmp_path):
+    _, _, workspace = benchmark_run
+    output = tmp_path / "startup.json"
+    results = startup(
+        model_package=str(workspace / "src" / "model_package"),
+        repeat=1,
+        output=str(output),
+    )
+
+    with open(output) as f:
+        assert json.load(f) == results
+    assert list(results["stages"]) == [s["name"] for s in STARTUP_SCENARIOS]
+    for name, stage in results["stages"].items():
+        assert stage["wall_s"] > 0, name
+        assert stage["peak_rss_mb"] > 0, name
+    assert compare(str(output), str(output)) == []
+
+
+def test_startup_checks_exit_codes(benchmark_run, tmp_path):
+    _, _, workspace = benchmark_run
+    with pytest.raises(RuntimeError, match="help exited with 3"):
+        startup(
+            model_package=str(workspace / "src" / "model_package"),
+            command=f"{sys.executable} -c 'exit(3)'",
+            output=str(tmp_path / "startup.json"),
+        )
+
+
+def test_batch_beats_single_queries(benchmark_run, tmp_path):
+    _, _, workspace = benchmark_run
+    output = tmp_path / "batch.json"
+    results = batch(
+        model_package=str(workspace / "src" / "model_package"),
+        queries=50,
+        repeat=3,
+        output=str(output),
+    )
+
+    with open(output) as f:
+        assert json.load(f) == results
+    assert list(results["stages"]) == ["batch", "single_queries"]
+    assert results["queries"] == 50 and results["overs"] > 0
+    stages = results["stages"]
+    assert stages["batch"]["wall_s"] < stages["single_queries"]["wall_s"]
+    assert compare(str(output), str(output)) == []
+
+
+if __name__ == "__main__":
+    results = {"status": "success", "errors": []}
+    try:
+        pytest.main([__file__])
+    except SystemExit as e:
+        if e.code != 0:
+            results["status"] = "failure"
+            results["errors"].append(f"Test suite failed with exit code {e.code}")
+            with open(log_file, "w") as f:
+                json.dump(results, f)
+            exit(1)
+
+    with open(log_file, "w") as f:
+        json.dump(results, f)
@@ -0,0 +1,98 @@
+import sys
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+import pytest
+
+# Synthetic data comes from the benchmark generator, taken through the stages
+src_folder = Path(__file__).parents[1] / "src"
+for folder in ["benchmarks", "parsing", "dataset_curation"]:
+    sys.path.append(str(src_folder / folder))
+from create_training_data import create_training_data
+from filter_innings_results import filter_innings
+from generate_data import generate
+from parquet_dataset import PARQUET_ENGINE, read_parquet_dataset
+from parse_innings_results import parse_innings_results
+from parse_match_results import parse_match_results
+
+# Short innings between a few teams keep the generated data small
+SYNTHETIC_OVERS = 10
+SYNTHETIC_TEAMS = 6
+
+
+@pytest.fixture
+def as_stored(tmp_path_factory):
+    """
+    Return a function giving a frame as the next stage reads it back, from
+    the parquet file the pipeline saves it to.
+    """
+
+    def store(df: pd.DataFrame) -> pd.DataFrame:
+        path = tmp_path_factory.mktemp("stored") / "data.parquet"
+        df.to_parquet(path, index=False, engine=PARQUET_ENGINE)
+        return read_parquet_dataset(path)
+
+    return store
+
+
+@pytest.fixture
+def synthetic_json(tmp_path_factory):
+    """
+    Write generated match and innings results in the provided JSON layout.
+
+    Returns a function of ``(num_matches, seed)`` and an optional output
+    folder, giving the folder the two JSON files were written to.
+    """
+
+    def make(num_matches: int, seed: int, folder: Optional[Path] = None) -> Path:
+        folder = folder or tmp_path_factory.mktemp("provided_json")
+        folder.mkdir(parents=True, exist_ok=True)
+        generate(str(folder), num_matches, SYNTHETIC_OVERS, SYNTHETIC_TEAMS, seed)
+        return folder
+
+    return make
+
+
+@pytest.fixture
+def synthetic_parsed(synthetic_json, as_stored):
+    """
+    Parse generated results, returning a function of ``(num_matches, seed)``
+    that gives the match and innings results frames, as saved.
+    """
+
+    def make(num_matches: int, seed: int):
+        folder = synthetic_json(num_matches, seed)
+        return (
+            as_stored(parse_match_results(str(folder / "match_results.json"))),
+            as_stored(parse_innings_results(str(folder / "innings_results.json"))),
+        )
+
+    return make
+
+
+@pytest.fixture
+def synthetic_filtered(synthetic_parsed, as_stored):
+    """
+    Filter generated results, returning a function of ``(num_matches, seed)``
+    that gives the filtered innings, as saved.
+    """
+
+    def make(num_matches: int, seed: int) -> pd.DataFrame:
+        match_results, innings_results = synthetic_parsed(num_matches, seed)
+        return as_stored(filter_innings(innings_results, match_results))
+
+    return make
+
+
+@pytest.fixture
+def synthetic_training(synthetic_filtered):
+    """
+    Curate generated results, returning a function of ``(num_matches, seed)``
+    that gives the training data.
+    """
+
+    def make(num_matches: int, seed: int) -> pd.DataFrame:
+        return create_training_data(synthetic_filtered(num_matches, seed))
+
+    return make
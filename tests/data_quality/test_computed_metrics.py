@@ -1,174 +1,197 @@
 import pandas as pd
 import json
 import pytest
-import numpy as np
 from pathlib import Path
-from tqdm import tqdm
 import os
-from typing import Dict, Tuple
+import sys
+from typing import List
+
+# Import the dataset reader
+script_folder = Path(__file__).parents[2] / "src" / "parsing"
+sys.path.append(str(script_folder))
+from parquet_dataset import read_parquet_dataset
 
 # Define data paths
 data_folder = Path(__file__).parents[2] / "data"
 
-training_df = pd.read_parquet(data_folder / "training/training_data.parquet")
-match_data = pd.read_parquet(data_folder / "parsed/match_results.parquet")
-innings_data = pd.read_parquet(data_folder / "parsed/innings_results.parquet")
+training_df = read_parquet_dataset(data_folder / "training/training_data.parquet")
+match_data = read_parquet_dataset(data_folder / "parsed/match_results.parquet")
+innings_data = read_parquet_dataset(data_folder / "parsed/innings_results.parquet")
 
 test_result_folder = data_folder / "tests"
 os.makedirs(test_result_folder, exist_ok=True)
 log_file = test_result_folder / "test_computed_metrics.json"
 
 
-def validate_run_difference(
-    computed_group: pd.DataFrame,
-    match_id: int,
-    winner: str,
-    loser: str,
-    run_diff_true: float,
-) -> None:
+def team_aggregates(df: pd.DataFrame, **aggregations) -> pd.DataFrame:
     """
-    Validate that the computed run difference aligns with the ground truth.
-
-    Args:
-        computed_group (pd.DataFrame): The computed metrics for the match.
-        match_id (int): The match ID.
-        winner (str): Winning team's name.
-        loser (str): Losing team's name.
-        run_diff_true (float): True run difference from match data.
-
-    Raises:
-        AssertionError: If the computed run difference does not match the ground truth.
-    """
-    match_teams = [winner, loser]
-    total_runs = {
-        team: computed_group[computed_group["team"] == team]["runs"].sum()
-        for team in match_teams
-    }
-
-    # Check for discrepancies
-    if total_runs[winner] - total_runs[loser] < run_diff_true:
-        winner_innings = innings_data[
-            (innings_data["matchid"] == match_id) & (innings_data["team"] == winner)
-        ]
-        loser_innings = innings_data[
-            (innings_data["matchid"] == match_id) & (innings_data["team"] == loser)
-        ]
-
-        winner_runs = winner_innings["runs.total"].sum()
-        loser_runs = loser_innings["runs.total"].sum()
-
-        diff_runs = winner_runs - loser_runs
-
-        # Account for potential bugs in match data
-        assert (
-            diff_runs >= run_diff_true
-        ), f"Run difference mismatch in match {match_id}"
-    else:
-        assert (
-            total_runs[winner] - total_runs[loser] >= run_diff_true
-        ), f"Computed run difference does not meet expected value in match {match_id}"
-
-
-def validate_wicket_difference(
-    computed_group: pd.DataFrame,
-    match_teams: Tuple[str, str],
-    winner: str,
-    wickets_true: int,
-) -> None:
-    """
-    Validate that the computed remaining wickets align with the ground truth.
+    Aggregate ``df`` once per match and team.
 
-    Args:
-        computed_group (pd.DataFrame): The computed metrics for the match.
-        match_teams (Tuple[str, str]): Tuple of the match's two teams.
-        winner (str): Winning team's name.
-        wickets_true (int): True number of remaining wickets from match data.
+    Team names are compared as plain strings, since each dataset's
+    categorical team column has its own categories.
 
-    Raises:
-        AssertionError: If the computed remaining wickets do not match the ground truth.
+    Returns:
+        pd.DataFrame: One row per match and team with ``matchid``, ``team``
+        and a column per aggregation.
     """
-    remaining_wickets = {
-        team: computed_group[computed_group["team"] == team]["remaining_wickets"].min()
-        for team in match_teams
-    }
-
-    assert (
-        remaining_wickets[winner] == wickets_true
-    ), f"Wicket difference mismatch for winner {winner} in match {match_teams}"
+    return (
+        df.assign(team=df["team"].astype(object))
+        .groupby(["matchid", "team"], sort=False)
+        .agg(**aggregations)
+        .reset_index()
+    )
 
 
-def validate_tie_or_draw(
-    computed_group: pd.DataFrame, match_teams: Tuple[str, str]
-) -> None:
+def merge_team(
+    outcomes: pd.DataFrame, aggregates: pd.DataFrame, team_column: str, prefix: str
+) -> pd.DataFrame:
     """
-    Validate that the computed runs for tied matches are equal for both teams.
-
-    Args:
-        computed_group (pd.DataFrame): The computed metrics for the match.
-        match_teams (Tuple[str, str]): Tuple of the match's two teams.
-
-    Raises:
-        AssertionError: If the computed runs for tied matches do not match.
+    Merge the aggregates of the team named in ``team_column`` into ``outcomes``.
     """
-    total_runs = {
-        team: computed_group[computed_group["team"] == team]["runs"].sum()
-        for team in match_teams
-    }
-
-    assert (
-        total_runs[match_teams[0]] == total_runs[match_teams[1]]
-    ), f"Tie validation failed for teams {match_teams}"
+    aggregates = aggregates.rename(
+        columns={
+            name: f"{prefix}_{name}"
+            for name in aggregates.columns
+            if name not in ["matchid", "team"]
+        }
+    )
+    return outcomes.merge(
+        aggregates.rename(columns={"team": team_column}),
+        on=["matchid", team_column],
+        how="left",
+    )
+
+
+def build_validation_table(
+    training_df: pd.DataFrame, match_data: pd.DataFrame, innings_data: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Compute each match's metrics once and line them up with its outcome.
 
+    The result, gender and method are read from a match's first row in
+    ``match_data``, and the winner, run margin and wickets margin from its
+    last. The loser is the first listed team that did not win. Run totals
+    and the fewest remaining wickets of each team are aggregated from the
+    training data, and run totals from the innings results, in one pass each.
 
-def test_computed_metrics() -> None:
+    Args:
+        training_df (pd.DataFrame): Computed training data.
+        match_data (pd.DataFrame): Parsed match results, a row per match team.
+        innings_data (pd.DataFrame): Parsed innings results.
+
+    Returns:
+        pd.DataFrame: One row per match that is validated, with the boolean
+        columns ``by_runs``, ``by_wickets``, ``tie`` and ``unknown`` marking
+        which check applies, and ``runs_ok``, ``wickets_ok`` and ``tie_ok``
+        holding their outcome.
     """
-    Test that computed metrics align with ground truth from match results.
-
-    This function iterates through matches, validating runs and wickets based on match results.
+    first = match_data.drop_duplicates("matchid", keep="first").set_index("matchid")
+    last = match_data.drop_duplicates("matchid", keep="last").set_index("matchid")
+    teams = match_data.drop_duplicates(["matchid", "teams"])
+    team_order = teams.groupby("matchid").cumcount()
+    listed = teams.assign(team=teams["teams"].astype(object)).set_index("matchid")
+
+    outcomes = pd.DataFrame(
+        {
+            "result": first["result"].astype(object),
+            "gender": first["gender"].astype(object),
+            "method": first["outcome.method"].astype(object),
+            "winner": last["outcome.winner"].astype(object),
+            "run_diff_true": last["outcome.runs"].astype(float),
+            "wickets_true": last["outcome.wickets"].astype(float),
+            "team_a": listed["team"][(team_order == 0).to_numpy()],
+            "team_b": listed["team"][(team_order == 1).to_numpy()],
+        }
+    )
+    outcomes = outcomes[
+        (outcomes["result"] != "no result") & (outcomes["gender"] != "female")
+    ].copy()
+    outcomes["loser"] = outcomes["team_a"].where(
+        outcomes["team_a"] != outcomes["winner"], outcomes["team_b"]
+    )
+    outcomes = outcomes.rename_axis("matchid").reset_index()
+
+    # Teams without rows in a dataset scored no runs in it
+    computed = team_aggregates(
+        training_df, runs=("runs", "sum"), wickets=("remaining_wickets", "min")
+    )
+    innings = team_aggregates(innings_data, runs=("runs.total", "sum"))
+    for team_column in ["winner", "loser", "team_a", "team_b"]:
+        outcomes = merge_team(outcomes, computed, team_column, team_column)
+        outcomes[f"{team_column}_runs"] = outcomes[f"{team_column}_runs"].fillna(0)
+    for team_column in ["winner", "loser"]:
+        outcomes = merge_team(outcomes, innings, team_column, f"{team_column}_innings")
+        column = f"{team_column}_innings_runs"
+        outcomes[column] = outcomes[column].fillna(0)
+
+    # The first check that applies to a match is the one it gets. Duckworth-Lewis
+    # results are not validated.
+    pending = outcomes["method"] != "D/L"
+    outcomes["by_runs"] = pending & outcomes["run_diff_true"].notna()
+    pending &= ~outcomes["by_runs"]
+    outcomes["by_wickets"] = pending & outcomes["wickets_true"].notna()
+    pending &= ~outcomes["by_wickets"]
+    outcomes["tie"] = pending & (
+        outcomes["result"].isna() | (outcomes["result"] == "tie")
+    )
+    outcomes["unknown"] = pending & ~outcomes["tie"]
+
+    # Account for potential bugs in match data: a computed run difference
+    # short of the margin is accepted if the innings results are short too
+    run_diff = outcomes["winner_runs"] - outcomes["loser_runs"]
+    innings_diff = outcomes["winner_innings_runs"] - outcomes["loser_innings_runs"]
+    outcomes["runs_ok"] = (run_diff >= outcomes["run_diff_true"]) | (
+        innings_diff >= outcomes["run_diff_true"]
+    )
+    outcomes["wickets_ok"] = outcomes["winner_wickets"] == outcomes["wickets_true"]
+    outcomes["tie_ok"] = outcomes["team_a_runs"] == outcomes["team_b_runs"]
+    return outcomes
+
+
+def failing_matches(outcomes: pd.DataFrame, applies: str, ok: str) -> List[int]:
+    """
+    Ids of the matches a check applies to that fail it.
     """
-    matches_grouped = match_data.groupby(by="matchid")
+    failing = outcomes[outcomes[applies] & ~outcomes[ok]]
+    return sorted(int(match_id) for match_id in failing["matchid"])
 
-    with tqdm(
-        total=len(matches_grouped), desc="Testing Computed Metrics", unit="matchid"
-    ) as pbar:
-        for match_id, group in matches_grouped:
-            if (
-                group.iloc[0]["result"] == "no result"
-                or group.iloc[0]["gender"] == "female"
-            ):
-                pbar.update(1)
-                continue
 
-            computed_group = training_df[training_df["matchid"] == match_id]
-            match_teams = group["teams"].unique()
+@pytest.fixture(scope="module")
+def outcomes() -> pd.DataFrame:
+    return build_validation_table(training_df, match_data, innings_data)
 
-            winner = group.iloc[-1]["outcome.winner"]
-            loser = [team for team in match_teams if team != winner][0]
 
-            run_diff_true = group.iloc[-1]["outcome.runs"]
-            wickets_true = group.iloc[-1]["outcome.wickets"]
+def test_outcomes_are_known(outcomes: pd.DataFrame) -> None:
+    """
+    Test every validated match was decided by runs, wickets or a tie.
+    """
+    unknown = outcomes.loc[outcomes["unknown"], "matchid"]
+    unknown = sorted(int(match_id) for match_id in unknown)
+    assert not unknown, f"Unknown data quality error in matches {unknown}"
 
-            if group.iloc[0]["outcome.method"] == "D/L":
-                # Duckworth-Lewis method not validated in this test
-                pass
 
-            elif ~np.isnan(run_diff_true):
-                validate_run_difference(
-                    computed_group, match_id, winner, loser, run_diff_true
-                )
+def test_run_differences(outcomes: pd.DataFrame) -> None:
+    """
+    Test the winner's computed runs beat the loser's by at least the margin.
+    """
+    failing = failing_matches(outcomes, "by_runs", "runs_ok")
+    assert not failing, f"Run difference mismatch in matches {failing}"
 
-            elif ~np.isnan(wickets_true):
-                validate_wicket_difference(
-                    computed_group, match_teams, winner, wickets_true
-                )
 
-            elif group.iloc[0]["result"] in ["tie", None]:
-                validate_tie_or_draw(computed_group, match_teams)
+def test_wicket_differences(outcomes: pd.DataFrame) -> None:
+    """
+    Test the winner's fewest computed remaining wickets equal the margin.
+    """
+    failing = failing_matches(outcomes, "by_wickets", "wickets_ok")
+    assert not failing, f"Wicket difference mismatch in matches {failing}"
 
-            else:
-                raise ValueError(f"Unknown data quality error in match {match_id}")
 
-            pbar.update(1)
+def test_ties(outcomes: pd.DataFrame) -> None:
+    """
+    Test both teams of a tied match have the same computed runs.
+    """
+    failing = failing_matches(outcomes, "tie", "tie_ok")
+    assert not failing, f"Tie validation failed in matches {failing}"
 
 
 if __name__ == "__main__":
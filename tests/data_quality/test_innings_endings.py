@@ -5,16 +5,25 @@ from pathlib import Path
 from tqdm import tqdm
 from typing import Dict
 import os
+import sys
 import pytest
 import json
 
+# Import the dataset reader and the match metadata index
+script_folder = Path(__file__).parents[2] / "src" / "parsing"
+sys.path.append(str(script_folder))
+sys.path.append(str(script_folder.parent / "dataset_curation"))
+from parquet_dataset import read_parquet_dataset
+from filter_innings_results import build_match_index, get_match_metadata
+
 # Define data paths
 data_folder = Path(__file__).parents[2] / "data"
 
-filtered_innings_df = pd.read_parquet(
+filtered_innings_df = read_parquet_dataset(
     data_folder / "intermediate/filtered_innings.parquet"
 )
-match_data = pd.read_parquet(data_folder / "parsed/match_results.parquet")
+match_data = read_parquet_dataset(data_folder / "parsed/match_results.parquet")
+match_index = build_match_index(match_data)
 
 
 test_result_folder = data_folder / "tests"
@@ -22,32 +31,6 @@ os.makedirs(test_result_folder, exist_ok=True)
 log_file = test_result_folder / "test_innings_endings.json"
 
 
-def get_match_metadata(
-    match_results: pd.DataFrame, match_id: int, team: str
-) -> Dict[str, any]:
-    """
-    Fetch metadata for a given match and team.
-
-    Args:
-        match_results (pd.DataFrame): DataFrame containing match results.
-        match_id (int): Match identifier.
-        team (str): Team name for the current inning.
-
-    Returns:
-        Dict[str, any]: Metadata dictionary for the match.
-    """
-    match_result = match_results[match_results["matchid"] == match_id]
-
-    return {
-        "winner": match_result["outcome.winner"].iloc[0],
-        "overs": match_result["overs"].iloc[0],
-        "wickets": match_result["outcome.wickets"].iloc[0],
-        "runs": match_result["outcome.runs"].iloc[0],
-        "method": match_result["outcome.method"].iloc[0],
-        "opponent": match_result[match_result["teams"] != team]["teams"].iloc[0],
-    }
-
-
 def test_inning_endings() -> None:
     """
     Test and categorize how innings end to ensure data integrity.
@@ -65,7 +48,7 @@ def test_inning_endings() -> None:
         for (match_id, inning), group in innings_grouped:
             # Fetch match metadata for the current group
             team = group["team"].iloc[0]
-            match_meta = get_match_metadata(match_data, match_id, team)
+            match_meta = get_match_metadata(match_index, match_id, team)
 
             last_remaining_wickets = group.iloc[-1]["remaining_wickets"]
             last_remaining_overs = group.iloc[-1]["remaining_overs"]
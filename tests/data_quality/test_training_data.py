@@ -1,9 +1,14 @@
-import pandas as pd
 from pathlib import Path
 import os
+import sys
 import pytest
 import json
 
+# Import the dataset reader
+script_folder = Path(__file__).parents[2] / "src" / "parsing"
+sys.path.append(str(script_folder))
+from parquet_dataset import read_parquet_dataset
+
 # Define data path
 data_folder = Path(__file__).parents[2] / "data"
 training_data_path = data_folder / "training/training_data.parquet"
@@ -13,7 +18,7 @@ os.makedirs(test_result_folder, exist_ok=True)
 log_file = test_result_folder / "test_training_data.json"
 
 # Load training data
-training_df = pd.read_parquet(training_data_path)
+training_df = read_parquet_dataset(training_data_path)
 
 
 def test_no_missing_values() -> None:
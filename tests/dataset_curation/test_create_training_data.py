@@ -0,0 +1,79 @@
+import json
+import os
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+import pytest
+
+# Import the curation stage
+script_folder = Path(__file__).parents[2] / "src" / "dataset_curation"
+sys.path.append(str(script_folder))
+from create_training_data import TRAINING_COLUMNS, create_training_data
+from features import COLUMN_DTYPES
+
+data_folder = Path(__file__).parents[2] / "data"
+
+test_result_folder = data_folder / "tests"
+os.makedirs(test_result_folder, exist_ok=True)
+log_file = test_result_folder / "test_create_training_data.json"
+
+
+def create_training_data_loop(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reference implementation: the per-group loop the aggregation replaced.
+    """
+    df_grouped = df.groupby(by=["matchid", "innings", "over_int"])
+    train_dict: Dict[str, List] = defaultdict(list)
+    for (matchid, inning, over_num), group in df_grouped:
+        train_dict["matchid"].append(matchid)
+        train_dict["date"].append(group["date"].iloc[0])
+        train_dict["team"].append(group["team"].iloc[0])
+        train_dict["opponent"].append(group["opponent"].iloc[0])
+        train_dict["inning"].append(inning)
+        train_dict["over_num"].append(over_num)
+        train_dict["initial_batter"].append(group["batsman_number"].iloc[0])
+        train_dict["initial_bowler"].append(group["bowler_number"].iloc[0])
+        train_dict["num_batsmen"].append(group["batsman_number"].nunique())
+        train_dict["num_bowlers"].append(group["bowler_number"].nunique())
+        train_dict["num_deliveries"].append(len(group))
+        train_dict["remaining_wickets"].append(group["remaining_wickets"].min())
+        train_dict["remaining_overs"].append(group["remaining_overs"].iloc[0])
+        train_dict["runs"].append(group["runs.total"].sum())
+    return pd.DataFrame(train_dict)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_matches_group_loop(synthetic_filtered, seed):
+    """The named aggregation reproduces the group loop, in the compact dtypes."""
+    df = synthetic_filtered(num_matches=8, seed=seed)
+    # Deliveries of different matches arrive interleaved
+    df = df.sample(frac=1, random_state=seed).sort_values("matchid", kind="stable")
+    expected = create_training_data_loop(df).astype(COLUMN_DTYPES)
+    actual = create_training_data(df)
+
+    assert list(actual.columns) == TRAINING_COLUMNS
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_empty_input(synthetic_filtered):
+    df = synthetic_filtered(num_matches=1, seed=0).iloc[:0]
+    assert list(create_training_data(df).columns) == TRAINING_COLUMNS
+
+
+if __name__ == "__main__":
+    results = {"status": "success", "errors": []}
+    try:
+        pytest.main([__file__])
+    except SystemExit as e:
+        if e.code != 0:
+            results["status"] = "failure"
+            results["errors"].append(f"Test suite failed with exit code {e.code}")
+            with open(log_file, "w") as f:
+                json.dump(results, f)
+            exit(1)
+
+    with open(log_file, "w") as f:
+        json.dump(results, f)
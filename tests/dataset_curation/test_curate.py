@@ -0,0 +1,95 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Import the partitioned curation runner
+script_folder = Path(__file__).parents[2] / "src" / "dataset_curation"
+sys.path.append(str(script_folder))
+import curate
+from create_training_data import create_training_data
+from filter_innings_results import filter_innings
+from parquet_dataset import PARQUET_ENGINE, read_parquet_dataset
+
+data_folder = Path(__file__).parents[2] / "data"
+
+test_result_folder = data_folder / "tests"
+os.makedirs(test_result_folder, exist_ok=True)
+log_file = test_result_folder / "test_curate.json"
+
+
+@pytest.fixture
+def curation_folders(tmp_path, monkeypatch, synthetic_parsed):
+    # Includes a women's match and a match without a result, both filtered out
+    match_results, innings_results = synthetic_parsed(num_matches=20, seed=2)
+    os.makedirs(tmp_path / "data" / "parsed")
+    for folder in ["intermediate", "training", "model_package"]:
+        os.makedirs(tmp_path / "data" / folder)
+    for name, df in [
+        ("match_results", match_results),
+        ("innings_results", innings_results),
+    ]:
+        df.to_parquet(
+            tmp_path / f"data/parsed/{name}.parquet", index=False, engine=PARQUET_ENGINE
+        )
+
+    monkeypatch.setattr(curate, "data_folder", tmp_path / "data")
+    monkeypatch.setattr(curate, "script_folder", tmp_path / "data" / "curation")
+    return tmp_path / "data", match_results, innings_results
+
+
+def test_partition_matchids():
+    assert curate.partition_matchids([7, 3, 4, 10, 1], 3) == [[3], [1, 4, 7, 10]]
+    assert curate.partition_matchids([], 4) == []
+    with pytest.raises(ValueError):
+        curate.partition_matchids([1], 0)
+
+
+@pytest.mark.parametrize("workers,buckets", [(1, 1), (2, 2), (2, 5), (3, 40)])
+def test_output_independent_of_partitioning(
+    curation_folders, as_stored, workers, buckets
+):
+    """Any worker and bucket count reproduces the serial curation exactly."""
+    data_path, match_results, innings_results = curation_folders
+    expected_filtered = as_stored(filter_innings(innings_results, match_results))
+    expected_training = as_stored(create_training_data(expected_filtered))
+
+    curate.main(workers=workers, buckets=buckets)
+
+    pd.testing.assert_frame_equal(
+        read_parquet_dataset(data_path / "intermediate/filtered_innings.parquet"),
+        expected_filtered,
+    )
+    pd.testing.assert_frame_equal(
+        read_parquet_dataset(data_path / "training/training_data.parquet"),
+        expected_training,
+    )
+    pd.testing.assert_frame_equal(
+        read_parquet_dataset(data_path / "model_package/data.parquet"),
+        expected_training,
+    )
+    assert not os.path.exists(data_path / "intermediate/_curation_buckets")
+
+
+def test_buckets_must_be_positive(curation_folders):
+    with pytest.raises(ValueError, match="at least 1"):
+        curate.main(workers=1, buckets=0)
+
+
+if __name__ == "__main__":
+    results = {"status": "success", "errors": []}
+    try:
+        pytest.main([__file__])
+    except SystemExit as e:
+        if e.code != 0:
+            results["status"] = "failure"
+            results["errors"].append(f"Test suite failed with exit code {e.code}")
+            with open(log_file, "w") as f:
+                json.dump(results, f)
+            exit(1)
+
+    with open(log_file, "w") as f:
+        json.dump(results, f)
@@ -0,0 +1,106 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Import the fused pipeline and the individual stages
+script_folder = Path(__file__).parents[2] / "src" / "dataset_curation"
+sys.path.append(str(script_folder))
+import fused_pipeline
+from create_training_data import create_training_data
+from filter_innings_results import filter_innings
+from q3a import select_q3a_columns
+
+data_folder = Path(__file__).parents[2] / "data"
+
+test_result_folder = data_folder / "tests"
+os.makedirs(test_result_folder, exist_ok=True)
+log_file = test_result_folder / "test_fused_pipeline.json"
+
+
+@pytest.fixture
+def pipeline_folder(tmp_path, monkeypatch, synthetic_json):
+    # Includes a women's match and a match without a result, both filtered out
+    synthetic_json(num_matches=20, seed=2, folder=tmp_path / "data" / "provided_json")
+    os.makedirs(tmp_path / "model_package")
+    monkeypatch.setattr(fused_pipeline, "data_folder", tmp_path / "data")
+    monkeypatch.setattr(fused_pipeline, "script_folder", tmp_path / "curation")
+    return tmp_path
+
+
+def test_outputs_match_staged_run(pipeline_folder):
+    """Skipping the parquet round trips between stages changes no output."""
+    data_path = pipeline_folder / "data"
+    fused_pipeline.main(materialize=["parsed", "filtered"])
+
+    # Replay the DVC stages from the materialized files
+    filtered = filter_innings(
+        pd.read_parquet(data_path / "parsed/innings_results.parquet"),
+        pd.read_parquet(data_path / "parsed/match_results.parquet"),
+    )
+    filtered.to_parquet(pipeline_folder / "filtered.parquet", index=False)
+    filtered = pd.read_parquet(pipeline_folder / "filtered.parquet")
+    training = create_training_data(filtered)
+
+    pd.testing.assert_frame_equal(
+        pd.read_parquet(data_path / "intermediate/filtered_innings.parquet"), filtered
+    )
+    pd.testing.assert_frame_equal(
+        pd.read_parquet(data_path / "training/training_data.parquet"), training
+    )
+    pd.testing.assert_frame_equal(
+        pd.read_parquet(pipeline_folder / "model_package/data.parquet"), training
+    )
+    with open(data_path / "intermediate/q3a.csv") as f:
+        assert f.read() == select_q3a_columns(filtered).to_csv(index=False)
+
+
+def test_intermediates_only_when_asked(pipeline_folder):
+    data_path = pipeline_folder / "data"
+    fused_pipeline.main()
+
+    assert (data_path / "intermediate/q3a.csv").exists()
+    assert (data_path / "training/training_data.parquet").exists()
+    assert not (data_path / "intermediate/filtered_innings.parquet").exists()
+    assert not (data_path / "parsed").exists()
+
+    with pytest.raises(ValueError):
+        fused_pipeline.main(materialize=["training"])
+
+
+def test_json_is_streamed(pipeline_folder, monkeypatch):
+    """The provided JSON is decoded record by record, never loaded whole."""
+    json_path = pipeline_folder / "data" / "provided_json"
+    expected = {
+        name: json.loads((json_path / f"{name}.json").read_text())
+        for name in ["innings_results", "match_results"]
+    }
+
+    def load(*args, **kwargs):
+        raise AssertionError("json.load was called")
+
+    monkeypatch.setattr(json, "load", load)
+    outputs = fused_pipeline.run_pipeline(
+        str(json_path / "innings_results.json"), str(json_path / "match_results.json")
+    )
+    for name, records in expected.items():
+        assert list(outputs[name]["matchid"]) == [row["matchid"] for row in records]
+
+
+if __name__ == "__main__":
+    results = {"status": "success", "errors": []}
+    try:
+        pytest.main([__file__])
+    except SystemExit as e:
+        if e.code != 0:
+            results["status"] = "failure"
+            results["errors"].append(f"Test suite failed with exit code {e.code}")
+            with open(log_file, "w") as f:
+                json.dump(results, f)
+            exit(1)
+
+    with open(log_file, "w") as f:
+        json.dump(results, f)
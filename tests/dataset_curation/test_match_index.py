@@ -0,0 +1,80 @@
+import json
+import math
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Import the curation stage
+script_folder = Path(__file__).parents[2] / "src" / "dataset_curation"
+sys.path.append(str(script_folder))
+from filter_innings_results import build_match_index, get_match_metadata
+
+data_folder = Path(__file__).parents[2] / "data"
+
+test_result_folder = data_folder / "tests"
+os.makedirs(test_result_folder, exist_ok=True)
+log_file = test_result_folder / "test_match_index.json"
+
+MATCH_RESULTS = pd.DataFrame(
+    {
+        "matchid": [11, 11, 12, 12, 13, 13],
+        "dates": ["2019-01-01"] * 2 + ["2019-02-01"] * 2 + ["2019-03-01"] * 2,
+        "teams": ["India", "Kenya", "Nepal", "Oman", "India", "Nepal"],
+        "overs": [50, 50, 50, 50, 20, 20],
+        "outcome.winner": ["India", "India", "Oman", "Oman", None, None],
+        "outcome.wickets": [4.0, 4.0, math.nan, math.nan, math.nan, math.nan],
+        "outcome.runs": [math.nan, math.nan, 21.0, 21.0, math.nan, math.nan],
+        "outcome.method": [None, None, "D/L", "D/L", None, None],
+    }
+).astype({"dates": "category", "teams": "category", "outcome.method": "category"})
+
+
+def scan_match_metadata(match_results, match_id, team):
+    """The per-lookup boolean scan the index replaces."""
+    match_result = match_results[match_results["matchid"] == match_id]
+    return {
+        "date": match_result["dates"].values[0],
+        "winner": match_result["outcome.winner"].values[0],
+        "overs": match_result["overs"].values[0],
+        "wickets": match_result["outcome.wickets"].values[0],
+        "runs": match_result["outcome.runs"].values[0],
+        "method": match_result["outcome.method"].values[0],
+        "opponent": match_result[match_result["teams"] != team]["teams"].values[0],
+    }
+
+
+@pytest.mark.parametrize(
+    "match_id,team", [(11, "India"), (11, "Kenya"), (12, "Oman"), (13, "Nepal")]
+)
+def test_index_matches_scan(match_id, team):
+    """Indexed lookups return the same metadata as scanning the match results."""
+    expected = scan_match_metadata(MATCH_RESULTS, match_id, team)
+    actual = get_match_metadata(build_match_index(MATCH_RESULTS), match_id, team)
+
+    assert actual.keys() == expected.keys()
+    for key, value in expected.items():
+        assert actual[key] == value or (pd.isna(actual[key]) and pd.isna(value))
+
+
+def test_unknown_match():
+    with pytest.raises(KeyError):
+        get_match_metadata(build_match_index(MATCH_RESULTS), 99, "India")
+
+
+if __name__ == "__main__":
+    results = {"status": "success", "errors": []}
+    try:
+        pytest.main([__file__])
+    except SystemExit as e:
+        if e.code != 0:
+            results["status"] = "failure"
+            results["errors"].append(f"Test suite failed with exit code {e.code}")
+            with open(log_file, "w") as f:
+                json.dump(results, f)
+            exit(1)
+
+    with open(log_file, "w") as f:
+        json.dump(results, f)
@@ -0,0 +1,77 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+# Fixtures shared by the run_model, batch and server tests
+script_folder = Path(__file__).parents[2] / "src" / "model_package"
+sys.path.append(str(script_folder))
+from features import INPUT_FEATURES
+
+# Innings of the mock data: two matches of India, on different dates
+MOCK_INNINGS = [
+    ("India", "England", "2023-12-01"),
+    ("England", "India", "2023-12-01"),
+    ("India", "Pakistan", "2023-12-05"),
+    ("Pakistan", "India", "2023-12-05"),
+]
+
+
+class CountingModel:
+    """
+    Wrap a model and count its predict calls and the rows it predicts.
+
+    Every other attribute, such as ``feature_names_in_``, is the wrapped
+    model's, so the wrapper is given the same input as the model would be.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.calls = 0
+        self.rows = 0
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def predict(self, X):
+        self.calls += 1
+        self.rows += len(X)
+        return self.model.predict(X)
+
+
+@pytest.fixture(scope="module")
+def mock_data():
+    rows = []
+    for matchid, (team, opponent, date) in enumerate(MOCK_INNINGS):
+        for over_num in range(1, 11):
+            rows.append(
+                {
+                    "matchid": matchid // 2,
+                    "date": date,
+                    "team": team,
+                    "opponent": opponent,
+                    "over_num": over_num,
+                    "initial_batter": 1 + over_num // 4,
+                    "initial_bowler": 1 + over_num % 5,
+                    "num_batsmen": 2,
+                    "num_bowlers": 1,
+                    "num_deliveries": 6,
+                    "remaining_wickets": 10 - over_num // 3,
+                    "remaining_overs": 50 - over_num,
+                    "runs": over_num % 7,
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture(scope="module")
+def model(mock_data):
+    model = RandomForestRegressor(n_estimators=3, random_state=0)
+    return model.fit(mock_data[INPUT_FEATURES], mock_data["runs"])
+
+
+@pytest.fixture
+def counting_model(model):
+    return CountingModel(model)
@@ -0,0 +1,129 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import joblib
+import pytest
+from typer.testing import CliRunner
+
+# Import the main app and the batch helper
+script_folder = Path(__file__).parents[2] / "src" / "model_package"
+sys.path.append(str(script_folder))
+from run_model import QueryIndex, app, filter_data, parse_query, predict, run_batch
+
+data_folder = Path(__file__).parents[2] / "data"
+
+test_result_folder = data_folder / "tests"
+os.makedirs(test_result_folder, exist_ok=True)
+log_file = test_result_folder / "test_batch_queries.json"
+
+runner = CliRunner()
+
+QUERIES = [
+    {"batting_team": "India", "end_over": 3},
+    {"batting_team": "Atlantis"},
+    {"batting_team": "england", "start_over": 2, "end_over": 6, "num_matches": -1},
+    {"batting_team": "India", "bowling_team": "Pakistan", "match_order": "newest"},
+]
+
+
+def single_query(model, data, query):
+    result = predict(model, filter_data(QueryIndex(data), **parse_query(query)))
+    return json.loads(result.to_json(orient="records"))
+
+
+def test_batch_matches_single_queries(model, counting_model, mock_data):
+    lines = [json.dumps(query) + "\n" for query in QUERIES]
+    index = QueryIndex(mock_data)
+    answers = [json.loads(line) for line in run_batch(counting_model, index, lines)]
+
+    assert counting_model.calls == 1
+    assert [answer["line"] for answer in answers] == [1, 2, 3, 4]
+    assert [answer["query"] for answer in answers] == QUERIES
+    for query, answer in zip(QUERIES, answers):
+        if query["batting_team"] == "Atlantis":
+            assert "Batting team 'Atlantis' not found" in answer["error"]
+            assert "predictions" not in answer
+        else:
+            assert answer["predictions"] == single_query(model, mock_data, query)
+
+
+@pytest.mark.parametrize("max_rows", [1, 8])
+def test_batch_predicts_in_chunks(
+    monkeypatch, model, counting_model, mock_data, max_rows
+):
+    lines = [json.dumps(query) + "\n" for query in QUERIES]
+    index = QueryIndex(mock_data)
+    expected = list(run_batch(model, index, lines))
+
+    monkeypatch.setattr("run_model.BATCH_PREDICT_ROWS", max_rows)
+    assert list(run_batch(counting_model, index, lines)) == expected
+    # Queries of 3, 5 and 5 overs are never split across calls
+    assert counting_model.calls == (3 if max_rows == 1 else 2)
+    assert counting_model.rows == 13
+
+
+def test_batch_reports_bad_lines(model, mock_data):
+    lines = [
+        "not json\n",
+        "\n",
+        "[1]\n",
+        '{"end_over": "x"}\n',
+        '{"batting_team": "India"}',
+    ]
+    answers = [
+        json.loads(line) for line in run_batch(model, QueryIndex(mock_data), lines)
+    ]
+
+    assert [answer["line"] for answer in answers] == [1, 3, 4, 5]
+    assert all("error" in answer for answer in answers[:3])
+    assert len(answers[3]["predictions"]) == 5
+
+
+def test_batch_without_valid_queries(model, mock_data):
+    lines = ['{"batting_team": "Atlantis"}']
+    answers = list(run_batch(model, QueryIndex(mock_data), lines))
+    assert len(answers) == 1 and "error" in json.loads(answers[0])
+
+
+def test_batch_cli(tmp_path, model, mock_data):
+    data_path = tmp_path / "data.parquet"
+    model_path = tmp_path / "model.pkl"
+    batch_path = tmp_path / "queries.jsonl"
+    mock_data.to_parquet(data_path)
+    joblib.dump(model, model_path)
+    batch_path.write_text("".join(json.dumps(query) + "\n" for query in QUERIES))
+
+    result = runner.invoke(
+        app,
+        [
+            "--model",
+            str(model_path),
+            "--data",
+            str(data_path),
+            "--batch",
+            str(batch_path),
+        ],
+    )
+
+    assert result.exit_code == 0
+    answers = [json.loads(line) for line in result.stdout.splitlines() if line]
+    assert [answer["query"] for answer in answers] == QUERIES
+    assert answers[0]["predictions"] == single_query(model, mock_data, QUERIES[0])
+
+
+if __name__ == "__main__":
+    results = {"status": "success", "errors": []}
+    try:
+        pytest.main([__file__])
+    except SystemExit as e:
+        if e.code != 0:
+            results["status"] = "failure"
+            results["errors"].append(f"Test suite failed with exit code {e.code}")
+            with open(log_file, "w") as f:
+                json.dump(results, f)
+            exit(1)
+
+    with open(log_file, "w") as f:
+        json.dump(results, f)
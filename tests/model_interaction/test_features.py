@@ -0,0 +1,99 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Import the feature layer shared by curation, training and run_model
+script_folder = Path(__file__).parents[2] / "src" / "model_package"
+sys.path.append(str(script_folder))
+from features import COLUMN_DTYPES, INPUT_FEATURES, compact_columns, feature_matrix
+
+data_folder = Path(__file__).parents[2] / "data"
+
+test_result_folder = data_folder / "tests"
+os.makedirs(test_result_folder, exist_ok=True)
+log_file = test_result_folder / "test_features.json"
+
+
+@pytest.fixture
+def overs():
+    """A few overs with the largest values the features take."""
+    return pd.DataFrame(
+        {
+            "matchid": [1, 1, 2],
+            "team": ["India", "India", "England"],
+            "inning": [1, 1, 2],
+            "over_num": [1, 2, 50],
+            "initial_batter": [1, 3, 11],
+            "initial_bowler": [11, 2, 1],
+            "num_batsmen": [2, 3, 1],
+            "num_bowlers": [1, 1, 2],
+            "num_deliveries": [6, 8, 12],
+            "remaining_wickets": [10, 9, 0],
+            "remaining_overs": [50, 49, 0],
+            "runs": [0, 36, 7],
+        }
+    )
+
+
+def test_compact_columns(overs):
+    compact = compact_columns(overs)
+
+    for column, dtype in COLUMN_DTYPES.items():
+        assert compact[column].dtype == dtype, column
+    assert compact["team"].dtype == overs["team"].dtype
+    pd.testing.assert_frame_equal(compact.astype(overs.dtypes), overs)
+    columns = list(COLUMN_DTYPES)
+    assert compact[columns].memory_usage(index=False).sum() < (
+        overs[columns].memory_usage(index=False).sum() / 3
+    )
+
+
+def test_compact_columns_checks_ranges(overs):
+    overs.loc[2, "runs"] = 40000
+    with pytest.raises(ValueError, match="runs holds values from 0 to 40000"):
+        compact_columns(overs)
+    assert compact_columns(overs.iloc[:0]).dtypes["runs"] == "int16"
+
+
+def test_feature_matrix(overs):
+    matrix = feature_matrix(compact_columns(overs))
+
+    assert matrix.dtype == np.float32
+    assert matrix.flags.c_contiguous
+    np.testing.assert_array_equal(matrix, overs[INPUT_FEATURES].to_numpy())
+    assert feature_matrix(overs, ["runs"]).shape == (3, 1)
+
+
+def test_import_does_not_load_numpy():
+    script = (
+        "import sys\n"
+        f"sys.path.insert(0, {str(script_folder)!r})\n"
+        "import features\n"
+        "print('numpy' in sys.modules)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "False"
+
+
+if __name__ == "__main__":
+    results = {"status": "success", "errors": []}
+    try:
+        pytest.main([__file__])
+    except SystemExit as e:
+        if e.code != 0:
+            results["status"] = "failure"
+            results["errors"].append(f"Test suite failed with exit code {e.code}")
+            with open(log_file, "w") as f:
+                json.dump(results, f)
+            exit(1)
+
+    with open(log_file, "w") as f:
+        json.dump(results, f)
@@ -0,0 +1,220 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+
+# Import the flattened forest and the loader run_model uses
+script_folder = Path(__file__).parents[2] / "src" / "model_package"
+sys.path.append(str(script_folder))
+from forest import NODE_ARRAYS, FlatForest, map_npz_arrays
+from run_model import INPUT_FEATURES, load_model
+
+data_folder = Path(__file__).parents[2] / "data"
+
+test_result_folder = data_folder / "tests"
+os.makedirs(test_result_folder, exist_ok=True)
+log_file = test_result_folder / "test_forest.json"
+
+
+@pytest.fixture(scope="module")
+def training_data():
+    """Random overs with integer features, like the training data."""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        rng.integers(0, 50, size=(2000, len(INPUT_FEATURES))), columns=INPUT_FEATURES
+    )
+    y = X["remaining_overs"] * 0.1 + rng.normal(size=len(X))
+    return X, y
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"n_estimators": 10, "random_state": 0},
+        {"n_estimators": 3, "max_depth": 4, "random_state": 1},
+        {"n_estimators": 5, "min_samples_leaf": 20, "random_state": 2},
+    ],
+)
+def test_predictions_match_estimator(training_data, params):
+    X, y = training_data
+    model = RandomForestRegressor(**params).fit(X, y)
+    forest = FlatForest.from_estimator(model)
+
+    assert np.array_equal(forest.predict(X), model.predict(X))
+    assert np.array_equal(forest.predict(X.iloc[:3]), model.predict(X.iloc[:3]))
+    assert forest.predict(X.iloc[:0]).shape == (0,)
+
+
+@pytest.mark.parametrize("max_pairs", [1, 5000, 10**9])
+def test_tree_groups_predict_the_same(training_data, monkeypatch, max_pairs):
+    """Walking the trees one, a few or all at a time gives the same predictions."""
+    X, y = training_data
+    model = RandomForestRegressor(n_estimators=7, random_state=3).fit(X, y)
+    forest = FlatForest.from_estimator(model)
+
+    monkeypatch.setattr("forest.WALK_MAX_PAIRS", max_pairs)
+    assert np.array_equal(forest.predict(X), model.predict(X))
+    assert np.array_equal(forest.predict(X.iloc[:3]), model.predict(X.iloc[:3]))
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"max_iter": 20},
+        {"max_iter": 5, "learning_rate": 0.3, "max_depth": 3},
+    ],
+)
+def test_boosted_predictions_match_estimator(training_data, params, tmp_path):
+    X, y = training_data
+    model = HistGradientBoostingRegressor(**params, early_stopping=False)
+    model.fit(X, y)
+    forest = FlatForest.from_estimator(model)
+
+    assert not forest.average
+    assert np.array_equal(forest.predict(X), model.predict(X))
+    forest.save(tmp_path / "model.npz")
+    loaded = load_model(str(tmp_path / "model.npz"))
+    assert loaded.base == forest.base and not loaded.average
+    assert np.array_equal(loaded.predict(X), model.predict(X))
+
+    with pytest.raises(ValueError, match="squared error"):
+        FlatForest.from_estimator(
+            HistGradientBoostingRegressor(loss="absolute_error", max_iter=2).fit(X, y)
+        )
+
+
+def test_load_forest_saved_without_base(training_data, tmp_path):
+    X, y = training_data
+    model = RandomForestRegressor(n_estimators=2, random_state=0).fit(X, y)
+    forest = FlatForest.from_estimator(model)
+    path = tmp_path / "model.npz"
+    np.savez(
+        path,
+        roots=forest.roots,
+        max_depth=forest.max_depth,
+        n_features=forest.n_features,
+        feature_names=np.array(forest.feature_names),
+        **{name: getattr(forest, name) for name in NODE_ARRAYS},
+    )
+    assert np.array_equal(FlatForest.load(str(path)).predict(X), model.predict(X))
+
+
+def test_save_and_load(training_data, tmp_path):
+    X, y = training_data
+    model = RandomForestRegressor(n_estimators=4, random_state=0).fit(X, y)
+    path = tmp_path / "model.npz"
+    FlatForest.from_estimator(model).save(path)
+
+    loaded = load_model(str(path))
+    assert isinstance(loaded, FlatForest)
+    assert loaded.feature_names == INPUT_FEATURES
+    assert np.array_equal(loaded.predict(X), model.predict(X))
+
+
+def test_load_maps_node_arrays(training_data, tmp_path):
+    X, y = training_data
+    model = RandomForestRegressor(n_estimators=4, random_state=0).fit(X, y)
+    path = tmp_path / "model.npz"
+    FlatForest.from_estimator(model).save(path)
+
+    mapped = FlatForest.load(str(path))
+    read = FlatForest.load(str(path), mmap=False)
+    for name in ["roots"] + NODE_ARRAYS:
+        assert isinstance(getattr(mapped, name).base, np.memmap), name
+        assert not getattr(mapped, name).flags.writeable, name
+        assert np.array_equal(getattr(mapped, name), getattr(read, name)), name
+    assert np.array_equal(mapped.predict(X), model.predict(X))
+
+
+def test_compressed_files_are_read(training_data, tmp_path):
+    X, y = training_data
+    model = RandomForestRegressor(n_estimators=2, random_state=0).fit(X, y)
+    forest = FlatForest.from_estimator(model)
+    path = tmp_path / "model.npz"
+    np.savez_compressed(
+        path,
+        roots=forest.roots,
+        max_depth=forest.max_depth,
+        n_features=forest.n_features,
+        feature_names=np.array(forest.feature_names),
+        **{name: getattr(forest, name) for name in NODE_ARRAYS},
+    )
+
+    assert map_npz_arrays(str(path), NODE_ARRAYS) == {}
+    assert np.array_equal(FlatForest.load(str(path)).predict(X), model.predict(X))
+
+
+def test_invalid_inputs(training_data):
+    X, y = training_data
+    forest = FlatForest.from_estimator(
+        RandomForestRegressor(n_estimators=2, random_state=0).fit(X, y)
+    )
+    with pytest.raises(ValueError, match="do not match"):
+        forest.predict(X[INPUT_FEATURES[::-1]])
+    with pytest.raises(ValueError, match="Expected 7 features"):
+        forest.predict(X.to_numpy()[:, :3])
+    with pytest.raises(ValueError, match="fitted"):
+        FlatForest.from_estimator(RandomForestRegressor())
+
+
+def test_live_predictions_do_not_import_sklearn(training_data, tmp_path):
+    X, y = training_data
+    df = X.assign(
+        matchid=np.arange(len(X)) // 50,
+        team="India",
+        opponent="England",
+        over_num=np.arange(len(X)) % 50 + 1,
+    )
+    df.to_parquet(tmp_path / "data.parquet")
+    model = RandomForestRegressor(n_estimators=2, random_state=0).fit(X, y)
+    FlatForest.from_estimator(model).save(tmp_path / "model.npz")
+
+    args = [
+        "run_model.py",
+        "--model",
+        str(tmp_path / "model.npz"),
+        "--data",
+        str(tmp_path / "data.parquet"),
+        "--predictions",
+        str(tmp_path / "missing.parquet"),
+        "--batting-team",
+        "India",
+    ]
+    script = (
+        "import sys\n"
+        f"sys.path.insert(0, {str(script_folder)!r})\n"
+        "import run_model\n"
+        f"sys.argv = {args!r}\n"
+        "try:\n"
+        "    run_model.app()\n"
+        "except SystemExit as e:\n"
+        "    assert e.code == 0, e.code\n"
+        "print('sklearn' in sys.modules)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    assert "predicted_runs" in result.stdout
+    assert result.stdout.strip().endswith("False")
+
+
+if __name__ == "__main__":
+    results = {"status": "success", "errors": []}
+    try:
+        pytest.main([__file__])
+    except SystemExit as e:
+        if e.code != 0:
+            results["status"] = "failure"
+            results["errors"].append(f"Test suite failed with exit code {e.code}")
+            with open(log_file, "w") as f:
+                json.dump(results, f)
+            exit(1)
+
+    with open(log_file, "w") as f:
+        json.dump(results, f)
@@ -0,0 +1,283 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+import typer
+from sklearn.ensemble import RandomForestRegressor
+from typer.testing import CliRunner
+
+# Import the table builder and the app that reads the table
+src_folder = Path(__file__).parents[2] / "src"
+sys.path.append(str(src_folder / "model_package"))
+sys.path.append(str(src_folder / "training"))
+import build_predictions
+import run_model
+from forest import FlatForest
+from run_model import (
+    INPUT_FEATURES,
+    QueryIndex,
+    app,
+    filter_data,
+    load_data_metadata,
+    load_prediction_table,
+    validate_query,
+)
+
+data_folder = Path(__file__).parents[2] / "data"
+
+test_result_folder = data_folder / "tests"
+os.makedirs(test_result_folder, exist_ok=True)
+log_file = test_result_folder / "test_prediction_table.json"
+
+runner = CliRunner()
+
+
+@pytest.fixture
+def model_package(tmp_path, monkeypatch):
+    """A model package folder with data, a model and its prediction table."""
+    rows = []
+    for matchid, (team, opponent) in enumerate(
+        [("India", "England"), ("England", "India"), ("India", "Pakistan")]
+    ):
+        for over_num in range(1, 21):
+            rows.append(
+                {
+                    "matchid": 10 + matchid // 2 * 3,
+                    "date": f"2023-12-0{1 + matchid // 2}",
+                    "team": team,
+                    "opponent": opponent,
+                    "over_num": over_num,
+                    "initial_batter": 1 + over_num // 6,
+                    "initial_bowler": 1 + over_num % 5,
+                    "num_batsmen": 2,
+                    "num_bowlers": 1 + over_num % 2,
+                    "num_deliveries": 6,
+                    "remaining_wickets": 10 - over_num // 3,
+                    "remaining_overs": 50 - over_num,
+                    "runs": (over_num * 7 + matchid) % 11,
+                }
+            )
+    df = pd.DataFrame(rows)
+    df.to_parquet(tmp_path / "data.parquet")
+    model = RandomForestRegressor(n_estimators=4, random_state=0)
+    model.fit(df[INPUT_FEATURES], df["runs"])
+    FlatForest.from_estimator(model).save(tmp_path / "expected_runs_model.npz")
+
+    monkeypatch.setattr(build_predictions, "model_package_folder", tmp_path)
+    build_predictions.main()
+    return tmp_path
+
+
+def cli_args(folder, *query):
+    return [
+        "--model",
+        str(folder / "expected_runs_model.npz"),
+        "--data",
+        str(folder / "data.parquet"),
+        "--predictions",
+        str(folder / "predictions.parquet"),
+        *query,
+    ]
+
+
+def live_args(folder, *query):
+    args = cli_args(folder, *query)
+    args[args.index("--predictions") + 1] = str(folder / "missing.parquet")
+    return args
+
+
+def test_table_is_built_with_hashes(model_package):
+    with open(model_package / "predictions.json") as f:
+        metadata = json.load(f)
+    table = pd.read_parquet(model_package / "predictions.parquet")
+
+    assert metadata["rows"] == len(table) == 60
+    assert len(metadata["model_sha256"]) == len(metadata["data_sha256"]) == 64
+    assert list(table.columns) == [
+        "matchid",
+        "date",
+        "team",
+        "opponent",
+        "over_num",
+        "predicted_runs",
+    ]
+    assert table["over_num"].dtype == "int8"
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        ["--batting-team", "India"],
+        ["--batting-team", "india", "--bowling-team", "PAKISTAN", "--end-over", "20"],
+        ["--batting-team", "India", "--num-matches", "-1", "--start-over", "4"],
+        ["--batting-team", "England", "--match-order", "newest", "--end-over", "50"],
+    ],
+)
+def test_lookups_match_live_predictions(model_package, query):
+    table = load_prediction_table(
+        str(model_package / "expected_runs_model.npz"),
+        str(model_package / "data.parquet"),
+        str(model_package / "predictions.parquet"),
+    )
+    assert table is not None
+
+    looked_up = runner.invoke(app, cli_args(model_package, *query))
+    live = runner.invoke(app, live_args(model_package, *query))
+    assert looked_up.exit_code == live.exit_code == 0
+    assert looked_up.stdout == live.stdout
+
+
+def test_batch_lookups_match_live_predictions(model_package, tmp_path):
+    batch_path = tmp_path / "queries.jsonl"
+    batch_path.write_text(
+        '{"batting_team": "India", "end_over": 12, "num_matches": 2}\n'
+        '{"batting_team": "Atlantis"}\n'
+    )
+    looked_up = runner.invoke(app, cli_args(model_package, "--batch", str(batch_path)))
+    live = runner.invoke(app, live_args(model_package, "--batch", str(batch_path)))
+    assert looked_up.exit_code == live.exit_code == 0
+    assert looked_up.stdout == live.stdout
+
+
+def test_stale_table_falls_back_to_live_predictions(model_package):
+    model_path = model_package / "expected_runs_model.npz"
+    df = pd.read_parquet(model_package / "data.parquet")
+    retrained = RandomForestRegressor(n_estimators=2, random_state=1)
+    retrained.fit(df[INPUT_FEATURES], df["runs"])
+    FlatForest.from_estimator(retrained).save(model_path)
+
+    assert (
+        load_prediction_table(
+            str(model_path),
+            str(model_package / "data.parquet"),
+            str(model_package / "predictions.parquet"),
+        )
+        is None
+    )
+    query = ["--batting-team", "India", "--end-over", "20"]
+    result = runner.invoke(app, cli_args(model_package, *query))
+    live = runner.invoke(app, live_args(model_package, *query))
+    assert result.exit_code == 0
+    assert result.stdout == live.stdout
+
+
+def test_lookups_do_not_import_sklearn(model_package):
+    args = ["run_model.py"] + cli_args(model_package, "--batting-team", "India")
+    script = (
+        "import sys\n"
+        f"sys.path.insert(0, {str(src_folder / 'model_package')!r})\n"
+        "import run_model\n"
+        f"sys.argv = {args!r}\n"
+        "try:\n"
+        "    run_model.app()\n"
+        "except SystemExit as e:\n"
+        "    assert e.code == 0, e.code\n"
+        "print('sklearn' in sys.modules)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip().endswith("False")
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        ("Atlantis", "None", 1, 5, 1),
+        ("india", "Atlantis", 1, 5, 1),
+        ("India", "england", 6, 5, 1),
+        ("England", "None", 1, 5, 0),
+        ("ENGLAND", "india", 1, 5, -1),
+    ],
+)
+def test_metadata_validation_matches_filters(model_package, query):
+    metadata = load_data_metadata(str(model_package / "data.parquet"))
+    index = QueryIndex(pd.read_parquet(model_package / "data.parquet"))
+
+    def error(function, *args):
+        try:
+            function(*args)
+        except typer.BadParameter as e:
+            return str(e)
+
+    expected = error(filter_data, index, *query, "oldest")
+    assert error(validate_query, metadata, *query) == expected
+    assert expected is not None or query[-1] == -1
+
+
+def test_unchanged_files_are_not_rehashed(model_package, monkeypatch):
+    """Recorded hashes are used while the files keep their size and mtime."""
+    hashed = []
+    hash_file_contents = run_model.hash_file_contents.__wrapped__
+
+    def counting_hash(path, size, mtime_ns):
+        hashed.append(os.path.basename(path))
+        return hash_file_contents(path, size, mtime_ns)
+
+    monkeypatch.setattr(run_model, "hash_file_contents", counting_hash)
+    data_path = model_package / "data.parquet"
+    table_paths = [
+        str(model_package / name)
+        for name in ["expected_runs_model.npz", "data.parquet", "predictions.parquet"]
+    ]
+    assert load_data_metadata(str(data_path)) is not None
+    assert load_prediction_table(*table_paths) is not None
+    assert hashed == []
+
+    # A touched file is hashed again, and still matches
+    stat = os.stat(data_path)
+    os.utime(data_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert load_data_metadata(str(data_path)) is not None
+    assert load_prediction_table(*table_paths) is not None
+    assert hashed == ["data.parquet", "data.parquet"]
+
+
+def test_stale_metadata_is_ignored(model_package):
+    data_path = model_package / "data.parquet"
+    df = pd.read_parquet(data_path)
+    df.loc[df["team"] == "England", "team"] = "Scotland"
+    df.to_parquet(data_path)
+
+    assert load_data_metadata(str(data_path)) is None
+    result = runner.invoke(app, cli_args(model_package, "--batting-team", "Scotland"))
+    assert result.exit_code == 0
+
+
+def test_validation_errors_do_not_import_pandas(model_package):
+    args = ["run_model.py"] + cli_args(model_package, "--batting-team", "Atlantis")
+    script = (
+        "import sys\n"
+        f"sys.path.insert(0, {str(src_folder / 'model_package')!r})\n"
+        "import run_model\n"
+        f"sys.argv = {args!r}\n"
+        "try:\n"
+        "    run_model.app()\n"
+        "except SystemExit as e:\n"
+        "    assert e.code == 2, e.code\n"
+        "print('pandas' in sys.modules)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    assert "Batting team 'Atlantis' not found" in result.stderr
+    assert result.stdout.strip().endswith("False")
+
+
+if __name__ == "__main__":
+    results = {"status": "success", "errors": []}
+    try:
+        pytest.main([__file__])
+    except SystemExit as e:
+        if e.code != 0:
+            results["status"] = "failure"
+            results["errors"].append(f"Test suite failed with exit code {e.code}")
+            with open(log_file, "w") as f:
+                json.dump(results, f)
+            exit(1)
+
+    with open(log_file, "w") as f:
+        json.dump(results, f)
@@ -0,0 +1,136 @@
+import http.client
+import json
+import os
+import sys
+import threading
+import types
+from pathlib import Path
+
+import pytest
+
+# Import the cache and the server that uses it
+script_folder = Path(__file__).parents[2] / "src" / "model_package"
+sys.path.append(str(script_folder))
+import run_model
+from run_model import QueryCache, QueryIndex, query_key, run_batch
+from serve_model import make_server
+
+data_folder = Path(__file__).parents[2] / "data"
+
+test_result_folder = data_folder / "tests"
+os.makedirs(test_result_folder, exist_ok=True)
+log_file = test_result_folder / "test_query_cache.json"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    fake_time = types.SimpleNamespace(monotonic=lambda: now[0])
+    monkeypatch.setattr(run_model, "time", fake_time)
+    return now
+
+
+def test_lru_eviction():
+    cache = QueryCache(max_size=2, ttl=None)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats() == {
+        "hits": 3,
+        "misses": 1,
+        "size": 2,
+        "max_size": 2,
+        "ttl": None,
+    }
+
+
+def test_ttl_expiry(clock):
+    cache = QueryCache(max_size=10, ttl=5)
+    cache.put("a", 1)
+    clock[0] = 5
+    assert cache.get("a") == 1
+    clock[0] = 5.5
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_disabled_cache():
+    cache = QueryCache(max_size=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+
+
+def test_query_key_normalization():
+    key = query_key("India", "None", -3, 60, -1, "oldest")
+    assert key == query_key("INDIA", "None", 1, 50, -1, "newest")
+    assert query_key("India", "ENGLAND", 1, 5, 2, "oldest") == query_key(
+        "india", "england", 1, 5, 2, "oldest"
+    )
+    assert query_key("India", "None", 1, 5, 2, "oldest") != query_key(
+        "India", "None", 1, 5, 2, "newest"
+    )
+    assert query_key("India", "None", 10, 5, 1, "oldest")[2:4] == (10, 5)
+
+
+def test_server_caches_responses(counting_model, mock_data):
+    server = make_server(counting_model, mock_data, port=0, cache_ttl=None)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def get(path):
+        connection = http.client.HTTPConnection(*server.server_address)
+        connection.request("GET", path)
+        response = connection.getresponse()
+        body = response.read()
+        connection.close()
+        return response.status, body
+
+    try:
+        first = get("/predict?batting_team=India&start_over=0&end_over=4")
+        rows = counting_model.rows
+        second = get("/predict?batting_team=india&start_over=1&end_over=4")
+        errors = [get("/predict?batting_team=Atlantis") for _ in range(2)]
+        stats = json.loads(get("/stats")[1])["cache"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert first == second and first[0] == 200
+    assert counting_model.rows == rows == 4
+    assert [status for status, _ in errors] == [400, 400]
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 3, 1)
+
+
+def test_batch_predicts_repeated_queries_once(counting_model, mock_data):
+    lines = [
+        '{"batting_team": "India", "end_over": 3}',
+        '{"batting_team": "england", "end_over": 3}',
+        '{"batting_team": "INDIA", "start_over": -1, "end_over": 3}',
+    ]
+    answers = [
+        json.loads(line)
+        for line in run_batch(counting_model, QueryIndex(mock_data), lines)
+    ]
+
+    assert counting_model.rows == 6
+    assert answers[0]["predictions"] == answers[2]["predictions"]
+    assert [answer["line"] for answer in answers] == [1, 2, 3]
+
+
+if __name__ == "__main__":
+    results = {"status": "success", "errors": []}
+    try:
+        pytest.main([__file__])
+    except SystemExit as e:
+        if e.code != 0:
+            results["status"] = "failure"
+            results["errors"].append(f"Test suite failed with exit code {e.code}")
+            with open(log_file, "w") as f:
+                json.dump(results, f)
+            exit(1)
+
+    with open(log_file, "w") as f:
+        json.dump(results, f)
@@ -0,0 +1,155 @@
+import json
+import os
+import random
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+import typer
+
+# Import the indexed query filters
+script_folder = Path(__file__).parents[2] / "src" / "model_package"
+sys.path.append(str(script_folder))
+from run_model import QueryIndex, filter_data
+
+data_folder = Path(__file__).parents[2] / "data"
+
+test_result_folder = data_folder / "tests"
+os.makedirs(test_result_folder, exist_ok=True)
+log_file = test_result_folder / "test_query_index.json"
+
+TEAMS = ["India", "England", "Pakistan", "New Zealand", "Ireland"]
+
+
+def reference_filter(
+    df, batting_team, bowling_team, start_over, end_over, num_matches, match_order
+):
+    """The column-scanning filters the index replaces."""
+    valid_teams = df.team.unique()
+    if batting_team.lower() not in map(str.lower, valid_teams):
+        valid_teams_str = ", ".join(sorted(valid_teams))
+        raise typer.BadParameter(
+            f"Batting team '{batting_team}' not found. "
+            f"Please choose from: {valid_teams_str}"
+        )
+    df = df.loc[df["team"].str.lower() == batting_team.lower()]
+
+    if bowling_team != "None":
+        valid_opponents = df.opponent.unique()
+        if bowling_team.lower() not in map(str.lower, valid_opponents):
+            valid_opponents_str = ", ".join(sorted(valid_opponents))
+            raise typer.BadParameter(
+                f"Bowling team '{bowling_team}' never played {df.iloc[0]['team']}. "
+                f"Please choose from: {valid_opponents_str}"
+            )
+        df = df.loc[df["opponent"].str.lower() == bowling_team.lower()]
+
+    if start_over > end_over:
+        raise typer.BadParameter("Start over must be less than or equal to end over")
+    start_over, end_over = max(start_over, 1), min(end_over, 50)
+    df = df.loc[(df["over_num"] >= start_over) & (df["over_num"] <= end_over)]
+
+    if num_matches != -1:
+        if num_matches < 1:
+            raise typer.BadParameter("Number of matches must be at least 1.")
+        if len(df["matchid"].unique()) >= num_matches:
+            if match_order not in ["oldest", "newest"]:
+                raise typer.BadParameter(
+                    f"match-order must be oldest or newest, not {match_order}"
+                )
+            asc = match_order == "oldest"
+            matches = df.sort_values("date", ascending=asc)["matchid"].unique()
+            df = df[df["matchid"].isin(matches[:num_matches])]
+
+    if df.empty:
+        raise typer.BadParameter(
+            "No data available after applying filters. Please check your inputs."
+        )
+    return df
+
+
+@pytest.fixture(scope="module")
+def scattered_matches():
+    """Matches on distinct dates, not in date order, with innings of any length."""
+    rng = random.Random(3)
+    days = rng.sample(range(1000), 60)
+    rows = []
+    for matchid, day in enumerate(days, start=100):
+        date = (pd.Timestamp("2015-01-01") + pd.Timedelta(days=day)).date()
+        first, second = rng.sample(TEAMS, 2)
+        for team, opponent in [(first, second), (second, first)]:
+            for over_num in range(1, rng.randint(1, 50) + 1):
+                rows.append(
+                    {
+                        "matchid": matchid,
+                        "date": date.isoformat(),
+                        "team": team,
+                        "opponent": opponent,
+                        "over_num": over_num,
+                        "remaining_overs": 50 - over_num,
+                    }
+                )
+    return pd.DataFrame(rows)
+
+
+def random_queries(count):
+    rng = random.Random(7)
+    for _ in range(count):
+        start_over = rng.randint(-2, 52)
+        yield {
+            "batting_team": rng.choice(TEAMS + ["Atlantis"]).swapcase(),
+            "bowling_team": rng.choice(TEAMS + ["None", "None", "Atlantis"]),
+            "start_over": start_over,
+            "end_over": start_over + rng.randint(-3, 55),
+            "num_matches": rng.choice([-1, 0, 1, 2, 5, 40]),
+            "match_order": rng.choice(["oldest", "newest", "newest", "random"]),
+        }
+
+
+def run(filter_function, data, query):
+    try:
+        return filter_function(data, **query)
+    except typer.BadParameter as e:
+        return str(e)
+
+
+def test_index_matches_column_scans(scattered_matches):
+    index = QueryIndex(scattered_matches)
+    selected = 0
+    for query in random_queries(600):
+        expected = run(reference_filter, scattered_matches, query)
+        result = run(filter_data, index, query)
+        if isinstance(expected, str):
+            assert result == expected, query
+        else:
+            pd.testing.assert_frame_equal(result, expected)
+            selected += 1
+    assert selected > 100
+
+
+def test_same_day_matches_are_ordered_by_matchid(scattered_matches):
+    df = scattered_matches.copy()
+    df["date"] = "2020-01-01"
+    index = QueryIndex(df)
+    oldest = filter_data(index, "India", "None", 1, 50, 1, "oldest")
+    newest = filter_data(index, "India", "None", 1, 50, 1, "newest")
+    india_matches = df.loc[df["team"] == "India", "matchid"]
+    assert set(oldest["matchid"]) == {india_matches.min()}
+    assert set(newest["matchid"]) == {india_matches.max()}
+
+
+if __name__ == "__main__":
+    results = {"status": "success", "errors": []}
+    try:
+        pytest.main([__file__])
+    except SystemExit as e:
+        if e.code != 0:
+            results["status"] = "failure"
+            results["errors"].append(f"Test suite failed with exit code {e.code}")
+            with open(log_file, "w") as f:
+                json.dump(results, f)
+            exit(1)
+
+    with open(log_file, "w") as f:
+        json.dump(results, f)
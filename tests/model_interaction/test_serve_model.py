@@ -0,0 +1,159 @@
+import http.client
+import json
+import os
+import socket
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+# Import the server and the run_model steps it reuses
+script_folder = Path(__file__).parents[2] / "src" / "model_package"
+sys.path.append(str(script_folder))
+from run_model import QUERY_DEFAULTS, QueryIndex, filter_data, parse_query, predict
+from serve_model import make_server
+
+data_folder = Path(__file__).parents[2] / "data"
+
+test_result_folder = data_folder / "tests"
+os.makedirs(test_result_folder, exist_ok=True)
+log_file = test_result_folder / "test_serve_model.json"
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__("localhost")
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+@pytest.fixture(scope="module")
+def server(model, mock_data):
+    server = make_server(model, mock_data, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, method, path, body=None):
+    connection = http.client.HTTPConnection(*server.server_address)
+    connection.request(method, path, body=body)
+    response = connection.getresponse()
+    payload = json.loads(response.read())
+    connection.close()
+    return response.status, payload
+
+
+def expected_predictions(model, data, **query):
+    result = predict(model, filter_data(QueryIndex(data), **parse_query(query)))
+    return json.loads(result.to_json(orient="records"))
+
+
+def test_get_matches_run_model(server, model, mock_data):
+    status, payload = request(
+        server, "GET", "/predict?batting_team=india&end_over=7&num_matches=-1"
+    )
+    assert status == 200
+    expected = expected_predictions(
+        model, mock_data, batting_team="india", end_over=7, num_matches=-1
+    )
+    assert payload["predictions"] == expected
+    assert len(expected) == 14
+
+
+def test_post_json_query(server, model, mock_data):
+    query = {"batting_team": "India", "bowling_team": "Pakistan", "end_over": 10}
+    status, payload = request(server, "POST", "/predict", json.dumps(query))
+    assert status == 200
+    assert payload["predictions"] == expected_predictions(model, mock_data, **query)
+    assert {row["bowling_team"] for row in payload["predictions"]} == {"Pakistan"}
+
+
+def test_invalid_queries(server):
+    status, payload = request(server, "GET", "/predict?batting_team=Nowhere")
+    assert status == 400
+    assert "Batting team 'Nowhere' not found" in payload["error"]
+
+    status, payload = request(server, "GET", "/predict?batting_team=India&colour=red")
+    assert status == 400
+    assert "Unknown query parameters: colour" in payload["error"]
+
+    status, payload = request(server, "POST", "/predict", "[1, 2]")
+    assert status == 400
+
+    status, _ = request(server, "GET", "/elsewhere")
+    assert status == 404
+
+
+def test_health(server, mock_data):
+    assert request(server, "GET", "/health") == (
+        200,
+        {"status": "ok", "rows": len(mock_data)},
+    )
+
+
+def test_concurrent_requests(server, model, mock_data):
+    queries = [
+        {"batting_team": team, "end_over": end_over}
+        for team in ["India", "England", "Pakistan"]
+        for end_over in range(1, 11)
+    ]
+
+    def send(query):
+        return request(server, "POST", "/predict", json.dumps(query))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        responses = list(executor.map(send, queries))
+
+    for query, (status, payload) in zip(queries, responses):
+        assert status == 200
+        assert payload["predictions"] == expected_predictions(
+            model, mock_data, **query
+        )
+
+
+def test_unix_socket(tmp_path, model, mock_data):
+    socket_path = str(tmp_path / "predict.sock")
+    server = make_server(model, mock_data, socket_path=socket_path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        connection = UnixHTTPConnection(socket_path)
+        connection.request("GET", "/predict?batting_team=England")
+        response = connection.getresponse()
+        assert response.status == 200
+        assert json.loads(response.read())["predictions"] == expected_predictions(
+            model, mock_data, batting_team="England"
+        )
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_parse_query_defaults_and_types():
+    assert parse_query({}) == QUERY_DEFAULTS
+    assert parse_query({"start_over": "3", "num_matches": -1})["start_over"] == 3
+    with pytest.raises(ValueError):
+        parse_query({"end_over": "ten"})
+
+
+if __name__ == "__main__":
+    results = {"status": "success", "errors": []}
+    try:
+        pytest.main([__file__])
+    except SystemExit as e:
+        if e.code != 0:
+            results["status"] = "failure"
+            results["errors"].append(f"Test suite failed with exit code {e.code}")
+            with open(log_file, "w") as f:
+                json.dump(results, f)
+            exit(1)
+
+    with open(log_file, "w") as f:
+        json.dump(results, f)
@@ -0,0 +1,109 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Import the columnar builder
+script_folder = Path(__file__).parents[2] / "src" / "parsing"
+sys.path.append(str(script_folder))
+from columnar import ColumnarBuilder, ParquetRowGroupWriter
+
+data_folder = Path(__file__).parents[2] / "data"
+
+test_result_folder = data_folder / "tests"
+os.makedirs(test_result_folder, exist_ok=True)
+log_file = test_result_folder / "test_columnar.json"
+
+SCHEMA = {
+    "batsman": "dictionary",
+    "over": "float64",
+    "matchid": "int64",
+    "wicket.kind": "dictionary",
+    "runs.total": "int16",
+}
+
+
+def make_record(i: int) -> dict:
+    record = {"batsman": f"player_{i % 300}", "over": f"{i // 6}.{i % 6 + 1}"}
+    record.update({"matchid": 1000 + i // 120, "runs.total": i % 7})
+    if i % 11 == 0:
+        record["wicket.kind"] = "caught" if i % 2 else "bowled"
+    return record
+
+
+def test_typed_frame():
+    """Columns come out with the declared dtypes and values."""
+    builder = ColumnarBuilder(SCHEMA)
+    records = [make_record(i) for i in range(50)]
+    for record in records:
+        builder.append(record)
+
+    df = builder.to_frame()
+    assert len(builder) == len(df) == 50
+    assert str(df["batsman"].dtype) == "category"
+    assert df["runs.total"].dtype == np.int16
+    assert df["over"].dtype == np.float64
+    assert df["matchid"].dtype == np.int64
+
+    expected = pd.DataFrame(records).reindex(columns=list(SCHEMA))
+    assert df["batsman"].tolist() == expected["batsman"].tolist()
+    assert df["over"].tolist() == [float(x) for x in expected["over"]]
+    assert df["wicket.kind"].isna().tolist() == expected["wicket.kind"].isna().tolist()
+
+
+def test_missing_integer_rejected():
+    """A missing integer raises and leaves the buffers aligned."""
+    builder = ColumnarBuilder(SCHEMA)
+    builder.append(make_record(1))
+    with pytest.raises(ValueError, match="Missing value for int16 column 'runs.total'"):
+        builder.append({"batsman": "x", "over": 0.1, "matchid": 1})
+    assert len(builder.to_frame()) == 1
+
+
+def test_unknown_type_rejected():
+    with pytest.raises(ValueError, match="Unsupported column types"):
+        ColumnarBuilder({"a": "object"})
+
+
+def test_row_groups_roundtrip(tmp_path):
+    """Row groups with a growing dictionary read back as one consistent frame."""
+    output_file = str(tmp_path / "out.parquet")
+    builder = ColumnarBuilder(SCHEMA)
+    writer = ParquetRowGroupWriter(output_file)
+    records = [make_record(i) for i in range(1000)]
+    for record in records:
+        builder.append(record)
+        if len(builder) == 64:
+            writer.write(builder.to_frame())
+            builder.clear()
+    writer.write(builder.to_frame())
+    writer.close()
+
+    df = pd.read_parquet(output_file)
+    assert writer.num_rows == len(df) == len(records)
+    assert df["batsman"].tolist() == [r["batsman"] for r in records]
+    assert df["runs.total"].dtype == np.int16
+    kinds = df["wicket.kind"].tolist()
+    assert [k if isinstance(k, str) else None for k in kinds] == [
+        r.get("wicket.kind") for r in records
+    ]
+
+
+if __name__ == "__main__":
+    results = {"status": "success", "errors": []}
+    try:
+        pytest.main([__file__])
+    except SystemExit as e:
+        if e.code != 0:
+            results["status"] = "failure"
+            results["errors"].append(f"Test suite failed with exit code {e.code}")
+            with open(log_file, "w") as f:
+                json.dump(results, f)
+            exit(1)
+
+    with open(log_file, "w") as f:
+        json.dump(results, f)
@@ -0,0 +1,172 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Import the incremental ingestion helpers
+script_folder = Path(__file__).parents[2] / "src" / "parsing"
+sys.path.append(str(script_folder))
+from columnar import write_records
+from incremental import ingest_new_matches
+from parquet_dataset import (
+    append_frame,
+    dataset_matchids,
+    iter_parquet_dataset,
+    open_appendable_dataset,
+    read_manifest,
+    read_parquet_dataset,
+)
+
+data_folder = Path(__file__).parents[2] / "data"
+
+test_result_folder = data_folder / "tests"
+os.makedirs(test_result_folder, exist_ok=True)
+log_file = test_result_folder / "test_incremental.json"
+
+SCHEMA = {
+    "batsman": "dictionary",
+    "matchid": "int64",
+    "wicket.kind": "dictionary",
+    "runs.total": "int16",
+}
+
+
+def make_records(matchids):
+    return [
+        {
+            "batsman": f"Player {matchid % 5}-{i % 3}",
+            "matchid": matchid,
+            "runs.total": i % 7,
+            **({"wicket.kind": "bowled"} if i == 4 else {}),
+        }
+        for matchid in matchids
+        for i in range(6)
+    ]
+
+
+def write_json(path, records):
+    with open(path, "w") as f:
+        json.dump(records, f)
+    return str(path)
+
+
+def to_objects(df):
+    return {
+        name: df[name].astype(object).where(df[name].notna(), None).tolist()
+        for name in df.columns
+    }
+
+
+def test_ingest_appends_only_new_matches(tmp_path):
+    """Re-ingesting a grown file appends exactly the matches that are new."""
+    output_path = str(tmp_path / "out.parquet")
+    first = write_json(tmp_path / "first.json", make_records([1, 2, 3]))
+    full = write_json(tmp_path / "full.json", make_records([1, 2, 3, 4, 5]))
+
+    assert ingest_new_matches(first, output_path, SCHEMA, 4) == (18, {1, 2, 3})
+    assert ingest_new_matches(full, output_path, SCHEMA, 4) == (12, {4, 5})
+    assert ingest_new_matches(full, output_path, SCHEMA, 4) == (0, set())
+
+    manifest = read_manifest(output_path)
+    assert [part["matchids"] for part in manifest["parts"]] == [[1, 2, 3], [4, 5]]
+    assert manifest["num_rows"] == 30
+    assert dataset_matchids(output_path) == {1, 2, 3, 4, 5}
+
+    df = read_parquet_dataset(output_path)
+    assert to_objects(df) == {
+        name: [record.get(name) for record in make_records([1, 2, 3, 4, 5])]
+        for name in SCHEMA
+    }
+
+
+def test_read_selected_matches(tmp_path):
+    """Reading by match id only returns, and only opens, the parts needed."""
+    output_path = str(tmp_path / "out.parquet")
+    for name, matchids in [("a.json", [1, 2]), ("b.json", [3])]:
+        input_file = write_json(tmp_path / name, make_records(matchids))
+        ingest_new_matches(input_file, output_path, SCHEMA)
+    os.remove(os.path.join(output_path, read_manifest(output_path)["parts"][0]["file"]))
+
+    df = read_parquet_dataset(output_path, columns=["runs.total"], matchids=[3])
+    assert list(df.columns) == ["runs.total"]
+    assert len(df) == 6
+
+
+def test_read_selected_matches_of_file(tmp_path):
+    """A single file is filtered by match id, across its row groups."""
+    output_path = str(tmp_path / "out.parquet")
+    write_records(make_records([1, 2, 3, 4]), SCHEMA, output_path, 5)
+
+    df = read_parquet_dataset(output_path, matchids=[2, 4])
+    assert sorted(set(df["matchid"])) == [2, 4]
+    assert len(df) == 12
+    assert isinstance(df["batsman"].dtype, pd.CategoricalDtype)
+    assert len(read_parquet_dataset(output_path, matchids=[])) == 0
+
+
+def test_read_keeps_categoricals(tmp_path):
+    """Dictionary columns read back as categoricals whichever engines are installed."""
+    output_path = str(tmp_path / "out.parquet")
+    write_records(make_records([1, 2]), SCHEMA, output_path, 100)
+    manifest = open_appendable_dataset(output_path)
+    append_frame(output_path, manifest, read_parquet_dataset(output_path), [3])
+
+    df = read_parquet_dataset(output_path)
+    assert len(df) == 24
+    for name in ["batsman", "wicket.kind"]:
+        assert isinstance(df[name].dtype, pd.CategoricalDtype), name
+    assert str(df["runs.total"].dtype) == "int16"
+
+
+def test_single_file_becomes_first_part(tmp_path):
+    """A full-run output file is adopted as the first part of the dataset."""
+    output_path = str(tmp_path / "out.parquet")
+    write_records(make_records([7, 8]), SCHEMA, output_path, 100)
+
+    manifest = open_appendable_dataset(output_path)
+    assert os.path.isdir(output_path)
+    assert manifest["matchids"] == [7, 8]
+    assert manifest["num_rows"] == 12
+
+    # Matches that produced no rows are still recorded as processed
+    append_frame(output_path, manifest, pd.DataFrame(), [9])
+    assert dataset_matchids(output_path) == {7, 8, 9}
+    assert len(read_manifest(output_path)["parts"]) == 1
+    assert len(read_parquet_dataset(output_path)) == 12
+
+
+def test_stream_row_groups(tmp_path):
+    """Streaming yields every row group of every part, in manifest order."""
+    output_path = str(tmp_path / "out.parquet")
+    write_records(make_records([1, 2, 3]), SCHEMA, output_path, 5)
+    manifest = open_appendable_dataset(output_path)
+    append_frame(output_path, manifest, pd.DataFrame(make_records([4])), [4])
+
+    chunks = list(iter_parquet_dataset(output_path, columns=["matchid"]))
+    assert [len(chunk) for chunk in chunks] == [5, 5, 5, 3, 6]
+    assert all(list(chunk.columns) == ["matchid"] for chunk in chunks)
+    streamed = pd.concat(chunks, ignore_index=True)["matchid"].tolist()
+    assert streamed == read_parquet_dataset(output_path)["matchid"].tolist()
+
+    os.makedirs(tmp_path / "empty")
+    with pytest.raises(FileNotFoundError):
+        next(iter_parquet_dataset(str(tmp_path / "empty")))
+
+
+if __name__ == "__main__":
+    results = {"status": "success", "errors": []}
+    try:
+        pytest.main([__file__])
+    except SystemExit as e:
+        if e.code != 0:
+            results["status"] = "failure"
+            results["errors"].append(f"Test suite failed with exit code {e.code}")
+            with open(log_file, "w") as f:
+                json.dump(results, f)
+            exit(1)
+
+    with open(log_file, "w") as f:
+        json.dump(results, f)
@@ -0,0 +1,70 @@
+import io
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Import the streaming decoder
+script_folder = Path(__file__).parents[2] / "src" / "parsing"
+sys.path.append(str(script_folder))
+from json_stream import iter_json_array
+
+data_folder = Path(__file__).parents[2] / "data"
+
+test_result_folder = data_folder / "tests"
+os.makedirs(test_result_folder, exist_ok=True)
+log_file = test_result_folder / "test_json_stream.json"
+
+RECORDS = [
+    {"batsman": "A Player", "over": 0.1, "runs.total": 4, "wicket.kind": None},
+    {"batsman": "Ünïcödé [x], {y}", "over": 12.6, "runs.total": 0},
+    {"nested": {"list": [1, 2, {"a": "]"}]}, "escaped": "quote \" and \\ slash"},
+    12345,
+    "plain string",
+    [],
+    {},
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64, 1 << 20])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_matches_json_load(chunk_size, indent):
+    """Streaming must yield exactly what json.load returns, for any chunking."""
+    text = json.dumps(RECORDS, indent=indent)
+    parsed = list(iter_json_array(io.StringIO(text), chunk_size=chunk_size))
+    assert parsed == json.loads(text)
+
+
+def test_empty_array():
+    """An empty array yields nothing."""
+    assert list(iter_json_array(io.StringIO("  [ \n ]  "), chunk_size=2)) == []
+
+
+def test_not_an_array():
+    """A top-level object is rejected."""
+    with pytest.raises(ValueError, match="Expected a top-level JSON array"):
+        list(iter_json_array(io.StringIO('{"a": 1}')))
+
+
+def test_truncated_array():
+    """A truncated file raises rather than silently dropping records."""
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(io.StringIO('[{"a": 1}, {"b": '), chunk_size=4))
+
+
+if __name__ == "__main__":
+    results = {"status": "success", "errors": []}
+    try:
+        pytest.main([__file__])
+    except SystemExit as e:
+        if e.code != 0:
+            results["status"] = "failure"
+            results["errors"].append(f"Test suite failed with exit code {e.code}")
+            with open(log_file, "w") as f:
+                json.dump(results, f)
+            exit(1)
+
+    with open(log_file, "w") as f:
+        json.dump(results, f)
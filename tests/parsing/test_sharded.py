@@ -0,0 +1,123 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Import the sharded parser
+script_folder = Path(__file__).parents[2] / "src" / "parsing"
+sys.path.append(str(script_folder))
+from columnar import ColumnarBuilder
+from json_stream import find_record_boundaries, iter_json_array_range
+from parquet_dataset import MANIFEST_FILE, read_manifest, read_parquet_dataset
+from sharded import parse_sharded
+
+data_folder = Path(__file__).parents[2] / "data"
+
+test_result_folder = data_folder / "tests"
+os.makedirs(test_result_folder, exist_ok=True)
+log_file = test_result_folder / "test_sharded.json"
+
+SCHEMA = {
+    "batsman": "dictionary",
+    "over": "float64",
+    "matchid": "int64",
+    "wicket.kind": "dictionary",
+    "runs.total": "int16",
+}
+
+RECORDS = [
+    {
+        "batsman": f"Plâyer {i % 37}",
+        "over": float(f"{i // 6}.{i % 6 + 1}"),
+        "matchid": 1000 + i // 50,
+        "runs.total": i % 7,
+        **({"wicket.kind": "caught"} if i % 13 == 0 else {}),
+    }
+    for i in range(500)
+]
+
+
+@pytest.fixture(params=[None, 2], ids=["compact", "indented"])
+def json_file(request, tmp_path):
+    path = tmp_path / "records.json"
+    with open(path, "w") as f:
+        json.dump(RECORDS, f, indent=request.param)
+    return str(path)
+
+
+@pytest.mark.parametrize("num_shards", [1, 2, 3, 8, 1000])
+def test_shards_cover_all_records(json_file, num_shards):
+    """The byte ranges partition the array exactly, in order."""
+    shards = find_record_boundaries(json_file, num_shards)
+    assert 1 <= len(shards) <= num_shards
+    assert all(a[1] == b[0] for a, b in zip(shards, shards[1:]))
+
+    parsed = [r for shard in shards for r in iter_json_array_range(json_file, *shard)]
+    assert parsed == RECORDS
+
+
+@pytest.mark.parametrize("num_shards", [2, 3, 8, 1000])
+def test_gaps_inside_strings_are_skipped(tmp_path, num_shards):
+    """A ``}, {`` inside a string value is not taken for a record boundary."""
+    notes = ['a}, {b', 'c}, {"d": 1}, {e', "f}, {}, g", "h}, {}]"]
+    records = [
+        {"matchid": i, "note": notes[i % len(notes)] * (1 + i % 3)}
+        for i in range(300)
+    ]
+    path = tmp_path / "notes.json"
+    path.write_text(json.dumps(records))
+
+    shards = find_record_boundaries(str(path), num_shards)
+    parsed = [r for shard in shards for r in iter_json_array_range(str(path), *shard)]
+    assert parsed == records
+
+
+def test_empty_array(tmp_path):
+    path = tmp_path / "empty.json"
+    path.write_text(" [ ] ")
+    assert find_record_boundaries(str(path), 4) == []
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_parse_sharded_matches_serial(json_file, tmp_path, workers):
+    """A sharded parse reads back exactly like a single-process parse."""
+    output_path = str(tmp_path / "out.parquet")
+    num_rows = parse_sharded(json_file, output_path, SCHEMA, workers, 40)
+    assert num_rows == len(RECORDS)
+
+    manifest = read_manifest(output_path)
+    assert manifest["num_rows"] == len(RECORDS)
+    assert len(manifest["parts"]) == workers
+    assert os.path.isfile(os.path.join(output_path, MANIFEST_FILE))
+
+    builder = ColumnarBuilder(SCHEMA)
+    for record in RECORDS:
+        builder.append(record)
+    expected = builder.to_frame()
+
+    df = read_parquet_dataset(output_path)
+    assert list(df.columns) == list(SCHEMA)
+    assert isinstance(df["batsman"].dtype, pd.CategoricalDtype)
+    for name in SCHEMA:
+        left = expected[name].astype(object).where(expected[name].notna(), None)
+        right = df[name].astype(object).where(df[name].notna(), None)
+        assert left.tolist() == right.tolist()
+
+
+if __name__ == "__main__":
+    results = {"status": "success", "errors": []}
+    try:
+        pytest.main([__file__])
+    except SystemExit as e:
+        if e.code != 0:
+            results["status"] = "failure"
+            results["errors"].append(f"Test suite failed with exit code {e.code}")
+            with open(log_file, "w") as f:
+                json.dump(results, f)
+            exit(1)
+
+    with open(log_file, "w") as f:
+        json.dump(results, f)
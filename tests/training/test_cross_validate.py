@@ -0,0 +1,111 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error
+
+# Import the cross-validation helpers
+script_folder = Path(__file__).parents[2] / "src" / "training"
+sys.path.append(str(script_folder))
+from cross_validate import cross_validate, fold_layout, grouped_folds
+
+# Paths
+data_folder = script_folder.parents[1] / "data"
+test_result_folder = data_folder / "tests"
+os.makedirs(test_result_folder, exist_ok=True)
+log_file = test_result_folder / "test_cross_validate.json"
+
+
+@pytest.fixture(scope="module")
+def overs():
+    """Features, target and match of a few hundred random overs."""
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 11, size=(600, 7))
+    y = X[:, 0] * 0.5 + rng.normal(size=len(X))
+    groups = np.arange(len(X)) // 30
+    return X, y, groups
+
+
+def test_folds_keep_matches_together(overs):
+    _, _, groups = overs
+    folds = grouped_folds(groups, 4)
+
+    assert set(folds) == {0, 1, 2, 3}
+    for group in np.unique(groups):
+        assert len(set(folds[groups == group])) == 1
+    with pytest.raises(ValueError):
+        grouped_folds(groups[:60], 3)
+
+
+def test_fold_layout_slices_training_rows(overs):
+    _, _, groups = overs
+    folds = grouped_folds(groups, 4)
+    order, bounds = fold_layout(folds, 4)
+
+    assert bounds[0] == 0 and bounds[-1] == len(folds)
+    for fold in range(4):
+        validation = order[bounds[fold] : bounds[fold + 1]]
+        train = order[bounds[fold + 1] : bounds[fold] + bounds[-1]]
+        assert list(validation) == list(np.flatnonzero(folds == fold))
+        assert sorted(train) == list(np.flatnonzero(folds != fold))
+
+
+def test_leaderboard_ranks_candidates(overs):
+    X, y, groups = overs
+    candidates = [
+        {"n_estimators": 2, "max_depth": 1},
+        {"n_estimators": 5, "max_depth": None},
+        {"n_estimators": 3, "max_depth": 3},
+        {"engine": "hist_gradient_boosting", "max_iter": 10, "learning_rate": 0.2},
+    ]
+    leaderboard = cross_validate(X, y, groups, candidates, 3, 2, 42)
+
+    assert len(leaderboard) == 4
+    assert [entry["mae"] for entry in leaderboard] == sorted(
+        entry["mae"] for entry in leaderboard
+    )
+    forests = [entry for entry in leaderboard if "n_estimators" in entry]
+    assert sorted(entry["n_estimators"] for entry in forests) == [2, 3, 5]
+    for entry in leaderboard:
+        assert [fold["fold"] for fold in entry["folds"]] == [0, 1, 2]
+        assert entry["mae"] == pytest.approx(
+            np.mean([fold["mae"] for fold in entry["folds"]])
+        )
+    json.dumps(leaderboard)
+
+
+def test_scores_match_serial_fits(overs):
+    X, y, groups = overs
+    params = {"n_estimators": 3, "max_depth": 4}
+    (entry,) = cross_validate(X, y, groups, [params], 3, 3, 7)
+
+    folds = grouped_folds(groups, 3)
+    order, bounds = fold_layout(folds, 3)
+    for fold in range(3):
+        # Each fold is fitted on the other folds' rows in the order they are stored
+        train = order[bounds[fold + 1] : bounds[fold] + bounds[-1]]
+        validation = folds == fold
+        model = RandomForestRegressor(**params, random_state=7)
+        model.fit(X[train].astype(np.float32), y[train])
+        expected = mean_absolute_error(y[validation], model.predict(X[validation]))
+        assert entry["folds"][fold]["mae"] == pytest.approx(expected)
+
+
+if __name__ == "__main__":
+    results = {"status": "success", "errors": []}
+    try:
+        pytest.main([__file__])
+    except SystemExit as e:
+        if e.code != 0:
+            results["status"] = "failure"
+            results["errors"].append(f"Test suite failed with exit code {e.code}")
+            with open(log_file, "w") as f:
+                json.dump(results, f)
+            exit(1)
+
+    with open(log_file, "w") as f:
+        json.dump(results, f)
@@ -13,7 +13,13 @@ from unittest.mock import patch
 # Import the main app
 script_folder = Path(__file__).parents[2] / "src" / "training"
 sys.path.append(str(script_folder))
+import train
 from train import main  # Replace with the actual name of your training script
+from parquet_dataset import iter_parquet_dataset, read_parquet_dataset
+
+# Streamed training reads the file the curation stage writes
+sys.path.append(str(script_folder.parent / "dataset_curation"))
+import create_training_data
 
 # Paths
 data_folder = script_folder.parents[1] / "data"
@@ -29,7 +35,7 @@ log_file = test_result_folder / "test_training.json"
 def training_data():
     """Load the training data for tests."""
     assert training_data_path.exists(), "Training data file is missing"
-    df = pd.read_parquet(training_data_path)
+    df = read_parquet_dataset(training_data_path)
     assert not df.empty, "Training data should not be empty"
     return df
 
@@ -133,6 +139,199 @@ def test_training_metrics_logging(caplog):
     ), "Test RMSE not logged"
 
 
+@pytest.fixture
+def synthetic_training_folder(tmp_path, synthetic_training):
+    """A data folder with a small training dataset, and a model package folder."""
+    df = synthetic_training(num_matches=60, seed=0)
+    os.makedirs(tmp_path / "data" / "training")
+    os.makedirs(tmp_path / "model_package")
+    df.to_parquet(tmp_path / "data" / "training" / "training_data.parquet")
+    return tmp_path
+
+
+def test_configurations_are_compared(synthetic_training_folder, caplog):
+    """Test every configuration is trained and logged, and none is saved."""
+    folder = synthetic_training_folder
+    with patch("train.data_folder", folder / "data"), patch(
+        "train.model_package_folder", folder / "model_package"
+    ):
+        with caplog.at_level(logging.INFO):
+            main(n_estimators=[2, 4], max_depth=[3, None], n_jobs=2)
+
+    with open(folder / "data" / "training" / "training_configs.json") as f:
+        configs = json.load(f)
+    results = configs["configurations"]
+    assert [(r["n_estimators"], r["max_depth"]) for r in results] == [
+        (2, 3),
+        (2, None),
+        (4, 3),
+        (4, None),
+    ]
+    assert configs["selected"] is None
+    assert all(r["fit_s"] > 0 and r["n_jobs"] == 2 for r in results)
+    assert "<- saved" not in caplog.text
+    assert not os.listdir(folder / "model_package")
+
+
+def test_single_configuration_is_saved(synthetic_training_folder, caplog):
+    """Test a single configuration is trained and saved to the model package."""
+    folder = synthetic_training_folder
+    with patch("train.data_folder", folder / "data"), patch(
+        "train.model_package_folder", folder / "model_package"
+    ):
+        with caplog.at_level(logging.INFO):
+            main(n_estimators=[4], max_depth=[3], n_jobs=2)
+
+    with open(folder / "data" / "training" / "training_configs.json") as f:
+        configs = json.load(f)
+    assert configs["selected"] == configs["configurations"][0]
+    assert "<- saved" in caplog.text
+
+    model = joblib.load(folder / "model_package" / "expected_runs_model.pkl")
+    assert model.n_estimators == 4
+    assert model.max_depth == 3
+    assert (folder / "model_package" / "expected_runs_model.npz").exists()
+
+
+def test_cross_validation_picks_configuration(synthetic_training_folder, caplog):
+    """Test cross-validation ranks the configurations and trains only the best."""
+    folder = synthetic_training_folder
+    with patch("train.data_folder", folder / "data"), patch(
+        "train.model_package_folder", folder / "model_package"
+    ):
+        with caplog.at_level(logging.INFO):
+            main(n_estimators=[2, 3], min_samples_leaf=[1, 50], n_jobs=2, cv_folds=3)
+
+    with open(folder / "data" / "training" / "cv_leaderboard.json") as f:
+        leaderboard = json.load(f)
+    with open(folder / "data" / "training" / "training_configs.json") as f:
+        configs = json.load(f)
+    assert len(leaderboard) == 4
+    assert all(len(entry["folds"]) == 3 for entry in leaderboard)
+    assert len(configs["configurations"]) == 1
+    for key in ["n_estimators", "max_depth", "min_samples_leaf"]:
+        assert configs["selected"][key] == leaderboard[0][key]
+    assert "Cross-validation leaderboard" in caplog.text
+    assert "Test MAE" in caplog.text
+
+
+def test_engines_are_compared(synthetic_training_folder, caplog):
+    """Test both engines are reported side by side, and neither is served."""
+    folder = synthetic_training_folder
+    with patch("train.data_folder", folder / "data"), patch(
+        "train.model_package_folder", folder / "model_package"
+    ):
+        with caplog.at_level(logging.INFO):
+            main(
+                engine=["forest", "hist_gradient_boosting"],
+                n_estimators=[3],
+                max_iter=[5, 20],
+                n_jobs=2,
+            )
+
+    with open(folder / "data" / "training" / "training_configs.json") as f:
+        configs = json.load(f)
+    results = configs["configurations"]
+    assert [(r["engine"], r.get("max_iter")) for r in results] == [
+        ("forest", None),
+        ("hist_gradient_boosting", 5),
+        ("hist_gradient_boosting", 20),
+    ]
+    for result in results:
+        assert result["pickle_bytes"] > 0 and result["npz_bytes"] > 0
+        assert result["predict_ms_per_1k"] > 0
+        assert result["flat_predict_ms_per_1k"] > 0
+    assert "hist_gradient_boosting max_iter=20" in caplog.text
+    assert configs["selected"] is None
+    assert not os.listdir(folder / "model_package")
+
+
+def test_cross_validation_does_not_pick_engine(synthetic_training_folder, caplog):
+    """Test cross-validating both engines ranks them and trains neither."""
+    folder = synthetic_training_folder
+    with patch("train.data_folder", folder / "data"), patch(
+        "train.model_package_folder", folder / "model_package"
+    ):
+        with caplog.at_level(logging.INFO):
+            main(
+                engine=["forest", "hist_gradient_boosting"],
+                n_estimators=[3],
+                max_iter=[5],
+                n_jobs=2,
+                cv_folds=3,
+            )
+
+    with open(folder / "data" / "training" / "cv_leaderboard.json") as f:
+        leaderboard = json.load(f)
+    assert sorted(entry["engine"] for entry in leaderboard) == [
+        "forest",
+        "hist_gradient_boosting",
+    ]
+    assert not (folder / "data" / "training" / "training_configs.json").exists()
+    assert not os.listdir(folder / "model_package")
+    assert "Choose one with --engine" in caplog.text
+
+
+def test_streaming_trains_on_written_row_groups(tmp_path, synthetic_filtered, caplog):
+    """Test streamed training spreads its trees over the written row groups."""
+    filtered = synthetic_filtered(num_matches=60, seed=0)
+    for folder in ["data/intermediate", "data/training", "model_package"]:
+        os.makedirs(tmp_path / folder)
+    filtered.to_parquet(tmp_path / "data" / "intermediate" / "filtered_innings.parquet")
+
+    with patch("create_training_data.data_folder", tmp_path / "data"), patch(
+        "create_training_data.output_folder", tmp_path / "data" / "training"
+    ), patch("create_training_data.script_folder", tmp_path / "dataset_curation"):
+        create_training_data.main(row_group_size=400)
+    data_path = tmp_path / "data" / "training" / "training_data.parquet"
+    df = read_parquet_dataset(data_path)
+    sizes = [len(chunk) for chunk in iter_parquet_dataset(data_path)]
+    assert len(sizes) == 3
+    assert sum(sizes) == len(df) and max(sizes) <= 400
+
+    with patch("train.data_folder", tmp_path / "data"), patch(
+        "train.model_package_folder", tmp_path / "model_package"
+    ):
+        with caplog.at_level(logging.INFO):
+            main(n_estimators=[7], max_depth=[5], n_jobs=2, stream=True)
+        with pytest.raises(ValueError, match="single configuration"):
+            main(n_estimators=[2, 3], stream=True)
+        with pytest.raises(ValueError, match="cannot cover the 3 row groups"):
+            main(n_estimators=[2], stream=True)
+
+    with open(tmp_path / "data" / "training" / "training_configs.json") as f:
+        configs = json.load(f)
+    (result,) = configs["configurations"]
+    assert result["n_estimators"] == 7
+    assert result["max_depth"] == 5
+    assert "Test MAE" in caplog.text
+
+    # The in-memory grouped split holds out the same matches
+    gss = GroupShuffleSplit(n_splits=1, test_size=0.2, random_state=42)
+    _, test_idx = next(gss.split(df, groups=df["matchid"]))
+    expected = set(df["matchid"].iloc[test_idx])
+    assert train.holdout_matchids(df["matchid"].to_numpy()) == expected
+
+    model = joblib.load(tmp_path / "model_package" / "expected_runs_model.pkl")
+    assert model.n_estimators == 7
+    assert (tmp_path / "model_package" / "expected_runs_model.npz").exists()
+
+
+def test_parse_args(monkeypatch):
+    """Test hyperparameters take several values, and 'none' for no depth limit."""
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["train.py", "--n-estimators", "10", "50", "--max-depth", "none", "8"],
+    )
+    args = train.parse_args()
+    assert args.n_estimators == [10, 50]
+    assert args.max_depth == [None, 8]
+    assert args.min_samples_leaf == [1]
+    assert args.n_jobs == -1
+    assert args.engine == ["forest"]
+
+
 if __name__ == "__main__":
     results = {"status": "success", "errors": []}
     try: